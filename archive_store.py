@@ -0,0 +1,179 @@
+"""Content-addressed store of downloaded Blender archives, shared across builds and runs."""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import requests
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the hex sha256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_or_copy(src: str, dst: str):
+    """Hardlink src to dst, copying instead when hardlinks are not possible (other filesystem, Windows FAT...)."""
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp_dst = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(src, tmp_dst)
+    except OSError:
+        shutil.copyfile(src, tmp_dst)
+    os.replace(tmp_dst, dst)
+
+
+class ArchiveStore:
+    """Archives live in objects/<sha256>, index.json maps each download URL to its sha256 and size.
+
+    Entries are evicted least recently used first, whenever the store would grow over max_bytes
+    or leave less than min_free_bytes free on its disk. A hit is only returned after the blob
+    matches its recorded size and sha256 and the server still reports the same Content-Length,
+    otherwise the entry is treated as corrupt or stale and evicted. The Content-Length is asked through
+    session (a pooled one can be shared with the downloads) and given up after timeout seconds.
+    """
+
+    def __init__(self, root: str, max_bytes: int, min_free_bytes: int = 0, verify: bool = True,
+                 session: requests.Session = None, timeout: float = 10):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, "index.json")
+        self.max_bytes = max_bytes
+        self.min_free_bytes = min_free_bytes
+        self.verify = verify
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.lock = threading.RLock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, sha256)
+
+    def staging_path(self, url: str) -> str:
+        """A path inside the store to write a new archive to before add(..., move=True)."""
+        name = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.root, "staging", f"{name}.{os.getpid()}.{threading.get_ident()}")
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index: dict):
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(index, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def _remove_entry(self, index: dict, url: str):
+        entry = index.pop(url, None)
+        if entry is None:
+            return
+        if any(other["sha256"] == entry["sha256"] for other in index.values()):
+            return
+        blob = self.blob_path(entry["sha256"])
+        if os.path.exists(blob):
+            os.remove(blob)
+
+    def _is_stale(self, url: str, entry: dict) -> bool:
+        """Compare the stored size with the server's Content-Length. Unreachable or slow servers and
+        unusable answers do not make an entry stale.
+        """
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            length = int(response.headers["Content-Length"]) if response.status_code == 200 else None
+        except (requests.RequestException, KeyError, ValueError) as exc:
+            print(f"-> archive store: could not check {url} upstream ({exc}), keeping it")
+            return False
+        return length is not None and length != entry["size"]
+
+    def lookup(self, url: str, sha256: str = None):
+        """Return the blob path stored for url, or None on a miss. Corrupt or stale entries are evicted,
+        as are entries whose sha256 differs from the expected (published) sha256.
+        """
+        with self.lock:
+            index = self._load_index()
+            entry = index.get(url)
+            if entry is None:
+                return None
+            blob = self.blob_path(entry["sha256"])
+            problem = None
+            if not os.path.exists(blob):
+                problem = "missing blob"
+            elif os.path.getsize(blob) != entry["size"]:
+                problem = "size mismatch"
+            elif sha256 is not None and entry["sha256"] != sha256:
+                problem = "differs from published sha256"
+            elif self.verify and file_sha256(blob) != entry["sha256"]:
+                problem = "sha256 mismatch"
+            elif self._is_stale(url, entry):
+                problem = "changed upstream"
+            if problem is not None:
+                print(f"-> archive store: evicting {url} ({problem})")
+                self._remove_entry(index, url)
+                self._save_index(index)
+                return None
+
+            entry["last_used"] = time.time()
+            self._save_index(index)
+            print(f"-> archive store hit for {url} (sha256 {entry['sha256']})")
+            return blob
+
+    def add(self, url: str, path: str, sha256: str = None, move: bool = False):
+        """Store the archive at path under url and return its blob path, or None when it does not fit the budget."""
+        if sha256 is None:
+            sha256 = file_sha256(path)
+        size = os.path.getsize(path)
+        with self.lock:
+            index = self._load_index()
+            blob = self.blob_path(sha256)
+            if not os.path.exists(blob) and not self._make_room(index, size, exclude=url):
+                print(f"-> archive store: no room for {size} bytes, not storing {url}")
+                self._save_index(index)
+                if move:
+                    os.remove(path)
+                return None
+
+            if os.path.exists(blob):
+                if move:
+                    os.remove(path)
+            elif move:
+                os.replace(path, blob)
+            else:
+                link_or_copy(path, blob)
+            index[url] = {"sha256": sha256, "size": size, "last_used": time.time()}
+            self._save_index(index)
+            print(f"-> archive store: stored {url} (sha256 {sha256})")
+            return blob
+
+    def evict(self, url: str):
+        with self.lock:
+            index = self._load_index()
+            if url in index:
+                print(f"-> archive store: evicting {url}")
+                self._remove_entry(index, url)
+                self._save_index(index)
+
+    def _make_room(self, index: dict, size: int, exclude: str = None) -> bool:
+        """Evict least recently used entries until size more bytes fit both budgets."""
+        def store_bytes():
+            return sum(entry["size"] for entry in {e["sha256"]: e for e in index.values()}.values())
+
+        by_age = sorted((entry["last_used"], url) for url, entry in index.items() if url != exclude)
+        while True:
+            free = shutil.disk_usage(self.root).free
+            if store_bytes() + size <= self.max_bytes and free - size >= self.min_free_bytes:
+                return True
+            if not by_age:
+                return False
+            _, url = by_age.pop(0)
+            print(f"-> archive store: evicting least recently used {url}")
+            self._remove_entry(index, url)
@@ -1,27 +1,367 @@
 import os
 import re
+import json
 import subprocess
 import requests
+import urllib3
 import tarfile
 import shutil
+import hashlib
+import lzma
+import threading
+import fnmatch
+import time
+import contextlib
+import functools
+import collections
+import signal
+from concurrent.futures import ThreadPoolExecutor
 import get_blender_release as gbr
+from archive_store import ArchiveStore, file_sha256, link_or_copy
+from registry import RegistryClient, load_credentials, parse_reference
+import oci
+from dedup import dedupe_trees
+from metrics import MetricsRecorder
 
 
 MIN_FREE_GB = float(os.environ.get("MIN_FREE_GB", "12"))
+# Registries to publish to, comma separated (e.g. "docker.io,ghcr.io"). Images are built once, tagged for the
+# first registry, and every push goes to all of them concurrently.
+REGISTRIES = [registry.strip() for registry in os.environ.get("DOCKER_REGISTRY", "docker.io").split(",") if registry.strip()] or ["docker.io"]
 CONTAINER_RUNTIME = os.environ.get("CONTAINER_RUNTIME", "podman")
 SKIP_IMAGE_PUSH = os.environ.get("SKIP_IMAGE_PUSH") == "1"
 REVERSE_BUILD_ORDER = os.environ.get("REVERSE_BUILD_ORDER") == "1"
 KEEP_IMAGES = os.environ.get("KEEP_IMAGES") == "1"
 KEEP_BUILD_DIRS = os.environ.get("KEEP_BUILD_DIRS") == "1"
+# Number of releases in flight at once in build_containers (1 = strictly one after another). With more,
+# downloads, builds and pushes of different releases overlap, each stage limited to its own concurrency.
+PARALLEL_BUILDS = int(os.environ.get("PARALLEL_BUILDS", "1"))
+BUILD_CONCURRENCY = int(os.environ.get("BUILD_CONCURRENCY", "1"))
+PUSH_CONCURRENCY = int(os.environ.get("PUSH_CONCURRENCY", "1"))
+# Expected extracted size of a Blender archive relative to the archive, used before the real size is known.
+EXTRACTED_SIZE_RATIO = 4.0
+# Build the multi-version image from one multi-stage Containerfile (one stage per version, all trees
+# prepared in parallel) instead of the serial chain of FROM blender_X_Y images.
+MULTI_STAGED = os.environ.get("MULTI_STAGED") == "1"
+PREPARE_WORKERS = int(os.environ.get("PREPARE_WORKERS", "4"))
+# Deduplicate identical files across the versions of a staged multi build: "hardlink" puts all versions
+# into one layer with duplicates hardlinked, "symlink" keeps one layer per version with duplicates
+# pointing at the oldest copy.
+MULTI_DEDUP = os.environ.get("MULTI_DEDUP", "").strip().lower()
+# Reuse the published multi-version chain: every chain step is pushed as multi-cache-X.Y and the next run
+# only rebuilds the versions after the longest unchanged prefix.
+MULTI_INCREMENTAL = os.environ.get("MULTI_INCREMENTAL") == "1"
+# Also publish every version of the multi-version image on its own as multi-part-X.Y (a single-layer image
+# holding /home/headless/blenders/X.Y) and the index multi-parts listing them, for fetch_blender.py.
+MULTI_SPLIT = os.environ.get("MULTI_SPLIT") == "1"
+MULTI_PARTS_TAG = "multi-parts"
+# Also publish a slim variant (blender-X.Y-slim) of every single version image, pruned by the slim manifest
+# (SLIM_PRUNE_MANIFEST, or the globs listed in the file SLIM_MANIFEST_FILE).
+SLIM_BUILD = os.environ.get("SLIM_BUILD") == "1"
+SLIM_MANIFEST_FILE = os.environ.get("SLIM_MANIFEST_FILE")
+# Bake compiled bytecode of the bundled Python modules and addons into the image (PREWARM), and optionally
+# start Blender once during the build (PREWARM_BLENDER), so containers do not compile them on every start.
+PREWARM = os.environ.get("PREWARM") == "1"
+PREWARM_BLENDER = os.environ.get("PREWARM_BLENDER") == "1"
+# Base image profiles to build single version images for, comma separated: "desktop" (the VNC/XFCE base,
+# default) and/or "minimal" (slim Ubuntu with only Blender's runtime libraries, published as blender-X.Y-minimal).
+# The multi-version image is built for the first profile only.
+BASE_PROFILES = [profile.strip() for profile in os.environ.get("BASE_PROFILES", "desktop").split(",") if profile.strip()]
+MULTI_BASE_PROFILE = BASE_PROFILES[0] if BASE_PROFILES else "desktop"
+# Build the base instructions of a profile (FROM plus the apt-get RUN) once per run as a shared blender-base
+# image pinned to the base image digest, and start every Blender image FROM it. The image is published as
+# base-<profile>-<version> so later runs and other machines pull it instead of running apt-get again.
+SHARED_BASE = os.environ.get("SHARED_BASE", "1") != "0"
+# Only build releases whose published blender-X.Y image is missing or has different version labels.
+INCREMENTAL_BUILD = os.environ.get("INCREMENTAL_BUILD") == "1"
+IMAGE_REPOSITORY = "blenderkit/headless-blender"
+# Take the releases from a manifest written by `python get_blender_release.py manifest` instead of the
+# release pages, so discovery needs no network.
+RELEASE_MANIFEST = os.environ.get("RELEASE_MANIFEST", "")
+# Pipe the download straight through xz into build_dir/blender instead of writing blender.tar.xz first.
+STREAM_EXTRACT = os.environ.get("STREAM_EXTRACT") == "1"
+# Keep downloaded archives in a content-addressed store outside build/ so later runs reuse them.
+ARCHIVE_STORE = os.environ.get("ARCHIVE_STORE") == "1"
+ARCHIVE_STORE_DIR = os.environ.get("ARCHIVE_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "archives"))
+ARCHIVE_STORE_MAX_GB = float(os.environ.get("ARCHIVE_STORE_MAX_GB", "20"))
+# Interrupted downloads resume from where they stopped (HTTP Range), up to DOWNLOAD_RETRIES times.
+DOWNLOAD_RETRIES = int(os.environ.get("DOWNLOAD_RETRIES", "5"))
+# Fetch archives of at least DOWNLOAD_SEGMENT_MIN_MB in this many parallel byte ranges (1 = single stream).
+DOWNLOAD_SEGMENTS = int(os.environ.get("DOWNLOAD_SEGMENTS", "1"))
+DOWNLOAD_SEGMENT_MIN_MB = float(os.environ.get("DOWNLOAD_SEGMENT_MIN_MB", "64"))
+# xz decompressor used by extract_tar: auto (pixz, then xz -T0, then Python), pixz, xz or python.
+XZ_BACKEND = os.environ.get("XZ_BACKEND", "auto").strip().lower()
+# Assemble single version images natively (oci.py) instead of running `build`: the Blender tree becomes one
+# layer on top of OCI_BASE_IMAGE and is pushed through the registry API. The base image must already contain
+# what the Containerfile's RUN step installs, PREWARM needs a runtime and is not applied.
+# OCI_BASE_IMAGE is the base of the desktop profile, every other profile needs its own OCI_BASE_IMAGE_<PROFILE>
+# (e.g. OCI_BASE_IMAGE_MINIMAL), see oci_base_image.
+NATIVE_ASSEMBLY = os.environ.get("NATIVE_ASSEMBLY") == "1"
+OCI_BASE_IMAGE = os.environ.get("OCI_BASE_IMAGE", "")
+OCI_COMPRESSION = os.environ.get("OCI_COMPRESSION", "gzip").strip().lower()
+# Also publish every single version and multi-version image with its layers recompressed for faster pulls:
+# "zstd" or "zstd:chunked" (podman's lazily pullable zstd), tagged <tag>-zstd / <tag>-zstd-chunked next to
+# the unchanged gzip tags. Native assembly supports zstd only.
+PUSH_COMPRESSION = os.environ.get("PUSH_COMPRESSION", "").strip().lower()
+COMPRESSION_TAG_SUFFIXES = {"zstd": "-zstd", "zstd:chunked": "-zstd-chunked"}
+OCI_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "oci")
+# Seconds a single runtime command (build, push, rmi...) may run before it is killed, 0 = no limit.
+RUNTIME_TIMEOUT = float(os.environ.get("RUNTIME_TIMEOUT", "0"))
+# Output lines kept per runtime command once it ended; all output is printed live while it runs.
+RUNTIME_OUTPUT_TAIL = 200
+# Transfer progress bars of one command are printed at most this often (seconds), the others only parsed.
+RUNTIME_PROGRESS_INTERVAL = 5.0
+# Per-stage timings are appended to this JSON lines file (empty = only the summary at the end of the run).
+METRICS_FILE = os.environ.get("METRICS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "metrics.jsonl"))
 
 
 def runtime_cmd(*args):
         return [CONTAINER_RUNTIME, *args]
 
 
+METRICS = MetricsRecorder(METRICS_FILE or None)
+
+
+# Layer status lines of podman/buildah ("Copying blob 4f4fb700ef54 done", "... skipped: already exists") and
+# docker ("4f4fb700ef54: Pushed", "...: Layer already exists"), transfer bars ("12.5MiB / 80.3MiB", "12.5MB/80.3MB")
+# and build steps ("STEP 3/6: ...", "Step 3/6 : ...", BuildKit "#7 [2/4] ...").
+LAYER_DONE_RE = re.compile(r"Copying blob (?:sha256:)?([0-9a-f]{12,64})\s+done|^([0-9a-f]{12,64}): (?:Pushed|Pull complete)")
+LAYER_SKIPPED_RE = re.compile(r"Copying blob (?:sha256:)?([0-9a-f]{12,64})\s+skipped|^([0-9a-f]{12,64}): (?:Layer already exists|Already exists)")
+TRANSFER_RE = re.compile(r"(?:Copying blob (?:sha256:)?|^)([0-9a-f]{12,64})\b.*?[\d.]+\s*[kKMG]?i?B\s*/\s*([\d.]+)\s*([kKMG]?i?B)")
+BUILD_STEP_RE = re.compile(r"^(?:STEP \d+/\d+|Step \d+/\d+|#\d+ \[)")
+SIZE_UNITS = {"B": 1, "kB": 1000, "KB": 1000, "KiB": 1024, "MB": 1000 ** 2, "MiB": 1024 ** 2, "GB": 1000 ** 3, "GiB": 1024 ** 3}
+
+
+class RuntimeProgress:
+    """Collects layer and build step progress from the output lines of one runtime command."""
+
+    def __init__(self, command: str):
+        self.command = command
+        self.layers_done = set()
+        self.layers_skipped = set()
+        self.layer_sizes = {}
+        self.build_steps = 0
+
+    def feed(self, line: str) -> bool:
+        """Parse one line, return True when it is a transfer progress bar."""
+        if BUILD_STEP_RE.match(line):
+            self.build_steps += 1
+        for pattern, seen, status in ((LAYER_DONE_RE, self.layers_done, "done"), (LAYER_SKIPPED_RE, self.layers_skipped, "skipped")):
+            match = pattern.search(line)
+            if match:
+                layer = match.group(1) or match.group(2)
+                if layer not in seen:
+                    seen.add(layer)
+                    METRICS.event("layer", command=self.command, layer=layer, status=status, bytes=self.layer_sizes.get(layer))
+                return False
+        match = TRANSFER_RE.search(line)
+        if match and match.group(3) in SIZE_UNITS:
+            self.layer_sizes[match.group(1)] = int(float(match.group(2)) * SIZE_UNITS[match.group(3)])
+            return True
+        return False
+
+    def fields(self) -> dict:
+        fields = {}
+        if self.layers_done or self.layers_skipped:
+            fields["layers_done"] = len(self.layers_done)
+            fields["layers_skipped"] = len(self.layers_skipped)
+        sizes = [self.layer_sizes[layer] for layer in self.layers_done if layer in self.layer_sizes]
+        if sizes:
+            fields["bytes"] = sum(sizes)
+        if self.build_steps:
+            fields["build_steps"] = self.build_steps
+        return fields
+
+
+class CommandResult:
+    """Exit status and the last RUNTIME_OUTPUT_TAIL output lines (stdout and stderr interleaved) of a command."""
+
+    def __init__(self, returncode: int, lines: list, timed_out: bool = False):
+        self.returncode = returncode
+        self.lines = lines
+        self.timed_out = timed_out
+
+    @property
+    def output(self) -> str:
+        return "\n".join(self.lines)
+
+
+_running_commands = set()
+_running_lock = threading.Lock()
+# Set by cancel_commands(): runtime commands started afterwards are killed right away.
+_cancelled = threading.Event()
+
+
+def run_command(cmd: list, cwd: str = None, timeout: float = None, echo: bool = True) -> CommandResult:
+    """Run a container runtime command, printing its output line by line with timestamps while it runs.
+
+    Only the last RUNTIME_OUTPUT_TAIL lines are kept, so long pushes do not pile their log up in memory.
+    The command is killed after timeout seconds (default RUNTIME_TIMEOUT, 0 = no limit) or by
+    cancel_commands(). Layer and build step progress is written to the metrics stream and merged into
+    the record of the stage the command runs in.
+    """
+    if timeout is None:
+        timeout = RUNTIME_TIMEOUT
+    label = cmd[1] if len(cmd) > 1 else cmd[0]
+    if _cancelled.is_set():
+        print(f"-> cancelled, not running {' '.join(cmd)}")
+        return CommandResult(-1, [])
+    if echo:
+        print(f"- running command {' '.join(cmd)}")
+    start = time.perf_counter()
+    # own process group, so a timeout also kills whatever the runtime started and the output pipe closes
+    proc = subprocess.Popen(
+        cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace",
+        start_new_session=os.name != "nt",
+    )
+    with _running_lock:
+        _running_commands.add(proc)
+        if _cancelled.is_set():
+            kill_command(proc)
+    timer = None
+    timed_out = threading.Event()
+    if timeout > 0:
+        def expire():
+            timed_out.set()
+            kill_command(proc)
+        timer = threading.Timer(timeout, expire)
+        timer.daemon = True
+        timer.start()
+
+    tail = collections.deque(maxlen=RUNTIME_OUTPUT_TAIL)
+    progress = RuntimeProgress(label)
+    last_bar = 0.0
+    try:
+        for line in proc.stdout:
+            line = line.rstrip()
+            if not line:
+                continue
+            tail.append(line)
+            if progress.feed(line):
+                if time.perf_counter() - last_bar < RUNTIME_PROGRESS_INTERVAL:
+                    continue
+                last_bar = time.perf_counter()
+            if echo:
+                print(f"[{time.strftime('%H:%M:%S')}] {line}")
+        returncode = proc.wait()
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if proc.poll() is None:
+            kill_command(proc)
+            proc.wait()
+        with _running_lock:
+            _running_commands.discard(proc)
+
+    record = METRICS.current()
+    if record is not None:
+        # a stage may run several commands (e.g. base and stage tag push), their progress adds up
+        for key, value in progress.fields().items():
+            record[key] = record.get(key, 0) + value
+    if timed_out.is_set():
+        print(f"-> TIMEOUT: {' '.join(cmd)} killed after {timeout:.0f} s")
+    if echo:
+        print(f"exit status: {returncode} ({time.perf_counter() - start:.1f} s)")
+    return CommandResult(returncode, list(tail), timed_out.is_set())
+
+
+def cancel_commands():
+    """Kill all runtime commands still running and refuse to start new ones, e.g. when the build is interrupted.
+    Downloads and extractions in flight stop at their next chunk (check_cancelled).
+    """
+    with _running_lock:
+        _cancelled.set()
+        running = list(_running_commands)
+    for proc in running:
+        print(f"-> cancelling {' '.join(proc.args)}")
+        kill_command(proc)
+
+
+class BuildCancelled(Exception):
+    """Raised by check_cancelled in worker threads once the build is interrupted. Not a RuntimeError, so
+    prepare_blender does not take it for a corrupted archive and retry."""
+
+
+def check_cancelled():
+    if _cancelled.is_set():
+        raise BuildCancelled("build interrupted")
+
+
+def handle_interrupt(signum, frame):
+    """SIGINT/SIGTERM handler of the main thread. Runtime commands run in their own process group and do not
+    get the terminal's Ctrl+C, so they are killed here, and downloads and extractions in worker threads are
+    told to stop, before the exception unwinds into thread pools that wait for their workers to finish.
+    """
+    print(f"\n-> {signal.Signals(signum).name} received, cancelling runtime commands and downloads")
+    cancel_commands()
+    if signum == signal.SIGINT:
+        raise KeyboardInterrupt
+    raise SystemExit(128 + signum)
+
+
+def kill_command(proc: subprocess.Popen):
+    try:
+        if os.name == "nt":
+            proc.kill()
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+_archive_store = None
+
+
+def get_archive_store():
+    """Return the shared ArchiveStore, or None when ARCHIVE_STORE is not enabled."""
+    global _archive_store
+    if not ARCHIVE_STORE:
+        return None
+    if _archive_store is None:
+        _archive_store = ArchiveStore(
+            ARCHIVE_STORE_DIR,
+            max_bytes=int(ARCHIVE_STORE_MAX_GB * 1024 ** 3),
+            min_free_bytes=int(MIN_FREE_GB * 1024 ** 3),
+            session=gbr.get_session(),
+            timeout=gbr.REQUEST_TIMEOUT,
+        )
+    return _archive_store
+
+
+def discover_releases(stable_only: bool = False):
+    """Releases to build, oldest first: from RELEASE_MANIFEST when set, otherwise from the release pages
+    (stable releases, plus prereleases of minors without one unless stable_only). None on failure.
+    """
+    if RELEASE_MANIFEST:
+        try:
+            releases = gbr.load_manifest(RELEASE_MANIFEST)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            print(f"-> ERROR: could not read release manifest {RELEASE_MANIFEST}: {exc}")
+            return None
+        print(f"-> {len(releases)} releases from manifest {RELEASE_MANIFEST}")
+        if stable_only:
+            releases = [release for release in releases if release.stage == "stable"]
+    elif stable_only:
+        releases = gbr.get_blender_releases(os="linux", arch="x64", min_ver=(2, 93))
+    else:
+        releases = gbr.get_stable_and_prereleases(os="linux", arch="x64", min_ver=(2, 93))
+    if releases is None:
+        return None
+    return gbr.order_releases(releases)
+
+
 def build_containers(registry: str):
-    releases = gbr.get_stable_and_prereleases(os="linux", arch="x64", min_ver=(2, 93))
-    releases = gbr.order_releases(releases)
+    releases = discover_releases()
+    if releases is None:
+        print("-> ERROR: could not discover releases, nothing to build")
+        return
+    if INCREMENTAL_BUILD:
+        releases = plan_builds(releases, REGISTRIES)
+    if releases:
+        prepare_base_images(BASE_PROFILES, registry)
+    if PARALLEL_BUILDS > 1:
+        build_containers_pipelined(releases, registry)
+        return
     for release in releases:
         print(f"\n\n\n====== Blender {release.version} ======")
 
@@ -29,7 +369,7 @@ def build_containers(registry: str):
         ensure_disk_headroom(MIN_FREE_GB)
 
         build_dir = os.path.join(os.path.dirname(__file__), "build", f"{release.version[0]}.{release.version[1]}")
-        ok = build_container(release.url, release.version, release.stage, build_dir, registry)
+        ok = build_container(release.url, release.version, release.stage, build_dir, registry, release.reference, release.sha256)
         clean_build_dir(build_dir)
 
         if ok:
@@ -38,6 +378,240 @@ def build_containers(registry: str):
             print(f"❌ {release.version} {release.stage} single build FAILED")
 
 
+class DiskAdmission:
+    """Admission control for releases built concurrently.
+
+    Every release reserves the disk space it is expected to need before it starts, narrows the reservation
+    down to what it still has to write once that is known (adjust), and keeps it until its build dir and
+    images are gone. A release is only admitted while free space
+    minus all outstanding reservations stays above min_free_bytes, so running several releases at once
+    never leaves less headroom than building them one by one. A lone release is always admitted, like
+    the serial loop which only warns about low disk space.
+    """
+    def __init__(self, min_free_bytes: int, path: str = "/"):
+        self.min_free_bytes = min_free_bytes
+        self.path = path
+        self.reserved = 0
+        self.active = 0
+        self.condition = threading.Condition()
+
+    def fits(self, need: int) -> bool:
+        free = shutil.disk_usage(self.path).free
+        return free - self.reserved - need >= self.min_free_bytes
+
+    def acquire(self, need: int, label: str):
+        with self.condition:
+            if self.active > 0 and not self.fits(need):
+                print(f"-> {label}: waiting for {_bytes_to_gib(need):.1f} GiB of disk headroom")
+                while self.active > 0 and not self.fits(need):
+                    self.condition.wait(timeout=30)
+            self.reserved += need
+            self.active += 1
+
+    def adjust(self, old: int, new: int):
+        """Replace a reservation by a better estimate, e.g. by the image layer still to be written once the
+        tree is extracted (the tree itself already counts against the free space)."""
+        with self.condition:
+            self.reserved += new - old
+            self.condition.notify_all()
+
+    def release(self, need: int):
+        with self.condition:
+            self.reserved -= need
+            self.active -= 1
+            self.condition.notify_all()
+
+
+def directory_size(path: str) -> int:
+    """Total size in bytes of the regular files below path (symlinks are not followed)."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+# Written into every build context so only what the Containerfile ADDs/COPYs is sent to the runtime, not the
+# downloaded archive or layouts next to it. podman reads .containerignore (else .dockerignore), docker .dockerignore.
+BUILD_CONTEXT_IGNORE_FILES = (".containerignore", ".dockerignore")
+
+
+def limit_build_context(context_dir: str, include: list) -> int:
+    """Restrict the build context context_dir to the include paths (relative to it, "/" separated) and log its size.
+    Returns the bytes sent to the runtime, which are also recorded as context_bytes of the current metrics stage.
+    """
+    rules = "*\n" + "".join(f"!{path}\n" for path in include)
+    for name in BUILD_CONTEXT_IGNORE_FILES:
+        with open(os.path.join(context_dir, name), "w") as file:
+            file.write(rules)
+    sent = left_out = 0
+    for root, _, files in os.walk(context_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, context_dir).replace(os.sep, "/")
+            try:
+                size = os.lstat(path).st_size
+            except OSError:
+                continue
+            if any(relative == entry or relative.startswith(entry + "/") for entry in include):
+                sent += size
+            else:
+                left_out += size
+    print(f"- build context {context_dir}: {sent / 1024 ** 2:.1f} MiB sent, {left_out / 1024 ** 2:.1f} MiB left out")
+    record = METRICS.current()
+    if record is not None:
+        record["context_bytes"] = sent
+    return sent
+
+
+def estimate_release_disk(url: str, size: int = None) -> int:
+    """Disk a single build is expected to need: the archive, its extracted tree and the image layer built from it.
+    The archive size is asked from the server unless known (size).
+    """
+    archive = size or 0
+    if not archive:
+        try:
+            r = gbr.get_session().head(url, allow_redirects=True, timeout=gbr.REQUEST_TIMEOUT)
+            archive = int(r.headers.get("Content-Length", 0))
+        except (requests.RequestException, ValueError):
+            archive = 0
+    archive = archive or 512 * 1024 ** 2
+    return int(archive + 2 * EXTRACTED_SIZE_RATIO * archive)
+
+
+def build_containers_pipelined(releases: list, registry: str):
+    """Build single version images with up to PARALLEL_BUILDS releases in flight.
+
+    Each release still goes download/extract -> build -> push -> cleanup in order, but while one release
+    builds the next one downloads and the previous one pushes. Builds and pushes are limited by
+    BUILD_CONCURRENCY and PUSH_CONCURRENCY, disk space by DiskAdmission.
+    """
+    admission = DiskAdmission(int(MIN_FREE_GB * 1024 ** 3))
+    build_slots = threading.Semaphore(max(BUILD_CONCURRENCY, 1))
+    push_slots = threading.Semaphore(max(PUSH_CONCURRENCY, 1))
+    print(f"-> Pipelined build of {len(releases)} releases, {PARALLEL_BUILDS} in flight")
+
+    def run(release) -> bool:
+        if _cancelled.is_set():
+            return False
+        version, stage = release.version, release.stage
+        label = f"{version[0]}.{version[1]}"
+        build_dir = os.path.join(os.path.dirname(__file__), "build", label)
+        need = estimate_release_disk(release.url, release.size)
+        admission.acquire(need, label)
+        ok = False
+        try:
+            print(f"\n====== Blender {version} ======")
+            log_disk_usage(f"before {version}")
+            ok = prepare_blender(release.url, build_dir, sha256=release.sha256)
+            if ok:
+                # archive and tree are on disk now and already taken from the free space, only the
+                # image layer, about as large as the extracted tree, is still to be written
+                remaining = directory_size(os.path.join(build_dir, "blender"))
+                admission.adjust(need, remaining)
+                need = remaining
+                ok = build_profiles(version, stage, release.reference, build_dir, registry, build_slots, push_slots)
+        except Exception as exc:
+            # one broken release must not take the others down with it
+            print(f"-> ERROR: {label} failed: {exc!r}")
+            ok = False
+        finally:
+            try:
+                clean_build_dir(build_dir)
+            finally:
+                admission.release(need)
+
+        if ok:
+            print(f"✅ {version} {stage} single build OK")
+        else:
+            print(f"❌ {version} {stage} single build FAILED")
+        return ok
+
+    executor = ThreadPoolExecutor(max_workers=PARALLEL_BUILDS)
+    try:
+        results = list(executor.map(run, releases))
+    finally:
+        # on an interrupt, releases not started yet are dropped instead of waited for
+        executor.shutdown(cancel_futures=True)
+    failed = [release for release, ok in zip(releases, results) if not ok]
+    print(f"-> {results.count(True)} of {len(results)} single builds OK")
+    for release in failed:
+        print(f"❌ {release.version} {release.stage} single build FAILED")
+
+
+def single_image_labels(release: gbr.Release, profile: str = "desktop") -> dict:
+    """Labels SINGLE_CONTAINERFILE (or native assembly) puts on the image of a release built on profile.
+    blender_base is None when the base of profile cannot be resolved.
+    """
+    x, y, z = release.version
+    return {
+        "blender_version": f"{x}.{y}.{z}",
+        "blender_stage": release.stage,
+        "blender_reference": release.reference,
+        "blender_base": single_base_key(profile),
+    }
+
+
+def single_release_tags(release: gbr.Release, profile: str) -> list:
+    """Tags (without registry) a build of release on profile publishes: blender-X.Y, its stage tag and the enabled
+    variants (the PUSH_COMPRESSION tag, -slim for the first profile with SLIM_BUILD)."""
+    base_tag, stage_tag = (tag.rsplit(":", 1)[1] for tag in single_image_tags(release.version, release.stage, "", profile))
+    tags = [base_tag, stage_tag]
+    if PUSH_COMPRESSION:
+        tags.append(base_tag + COMPRESSION_TAG_SUFFIXES[PUSH_COMPRESSION])
+    if SLIM_BUILD and profile == BASE_PROFILES[0]:
+        tags.append(f"{base_tag}-slim")
+    return tags
+
+
+def plan_builds(releases: list, registries: list) -> list:
+    """Return only the releases with a published tag (see single_release_tags, of any base profile, in any
+    registry) that is missing or outdated, so a variant whose push failed is retried.
+
+    The labels of every published image are read through the registry v2 API and compared with the
+    labels the release would get: a new patch version changes blender_version, a new daily build changes
+    blender_reference, a re-pinned base image changes blender_base. If a registry lookup fails or the base
+    cannot be resolved, the release is built to be safe.
+    """
+    clients = {registry: RegistryClient(registry, IMAGE_REPOSITORY, auth=load_credentials(registry)) for registry in registries}
+
+    def needs_build(release) -> bool:
+        return any(
+            tag_needs_build(release, profile, registry, tag)
+            for registry in registries
+            for profile in BASE_PROFILES
+            for tag in single_release_tags(release, profile)
+        )
+
+    def tag_needs_build(release, profile: str, registry: str, tag: str) -> bool:
+        name = f"{registry}/{IMAGE_REPOSITORY}:{tag}"
+        try:
+            published = clients[registry].get_labels(tag)
+        except (requests.RequestException, ValueError, KeyError) as exc:
+            print(f"-> could not inspect {name} ({exc}), building it")
+            return True
+        if published is None:
+            print(f"-> {name}: not published yet, building")
+            return True
+        wanted = single_image_labels(release, profile)
+        changed = {key: (published.get(key), value) for key, value in wanted.items() if published.get(key, "") != value}
+        if changed:
+            print(f"-> {name}: changed {', '.join(f'{key} {old!r} -> {new!r}' for key, (old, new) in changed.items())}, building")
+            return True
+        print(f"-> {name}: up to date ({wanted['blender_version']} {wanted['blender_stage']}), skipping")
+        return False
+
+    print(f"====== Planning builds against {', '.join(registries)} ======")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        flags = list(executor.map(needs_build, releases))
+    planned = [release for release, flag in zip(releases, flags) if flag]
+    print(f"-> {len(planned)} of {len(releases)} releases need a build")
+    return planned
+
+
 def build_multi_version(registry: str) -> bool:
     """Build ONE multi-version image containing the latest stable patch of every minor
     Blender release (>= 2.93). Alpha/beta/rc prereleases are intentionally skipped.
@@ -45,17 +619,42 @@ def build_multi_version(registry: str) -> bool:
     Versions are layered oldest -> newest via chained ADD instructions and end up at
     /home/headless/blenders/X.Y. The final image is tagged headless-blender:multi-version.
     """
-    releases = gbr.get_blender_releases(os="linux", arch="x64", min_ver=(2, 93))
+    releases = discover_releases(stable_only=True)
     if not releases:
         print("-> ERROR: could not fetch stable releases, aborting multi-version build")
         return False
-    releases = gbr.order_releases(releases)
     print(f"-> Multi-version build: {len(releases)} stable releases (oldest to newest), skipping all prereleases")
     for release in releases:
         print(f"   - {release.version[0]}.{release.version[1]}.{release.version[2]}")
 
+    if MULTI_STAGED:
+        if MULTI_INCREMENTAL:
+            # a staged build has no chain images to take over, it can only skip a build that is not needed
+            key = base_key(MULTI_BASE_PROFILE)
+            if key is not None and multi_version_current(releases, key):
+                print("✅ published multi-version image is up to date, nothing to build")
+                return True
+            print("-> WARNING: MULTI_INCREMENTAL reuses chain images only, MULTI_STAGED rebuilds every version")
+        prepare_base_images([MULTI_BASE_PROFILE], registry)
+        return build_multi_version_staged(releases, registry)
+    if MULTI_DEDUP:
+        print("-> MULTI_DEDUP needs MULTI_STAGED=1 (the chain never has two versions on disk at once), ignoring it")
+
     prev_version = None
-    for release in releases:
+    reused = 0
+    if MULTI_INCREMENTAL:
+        reused = plan_multi_reuse(releases, registry)
+        if reused < 0:
+            print("✅ published multi-version image is up to date, nothing to build")
+            return True
+        if reused > 0:
+            prev_version = releases[reused - 1].version
+            if not multi_pull_cache(prev_version, registry):
+                print("-> could not pull the cached prefix, rebuilding every version")
+                reused = 0
+                prev_version = None
+
+    for release in releases[reused:]:
         print(f"\n\n\n====== Multi Blender {release.version} ======")
         log_disk_usage(f"before {release.version}")
         ensure_disk_headroom(MIN_FREE_GB)
@@ -63,9 +662,12 @@ def build_multi_version(registry: str) -> bool:
         build_dir = os.path.join(os.path.dirname(__file__), "build", f"{release.version[0]}.{release.version[1]}")
 
         if prev_version is None:
-            ok = multi_start(release.url, release.version, build_dir)
+            prepare_base_images([MULTI_BASE_PROFILE], registry)
+            ok = multi_start(release.url, release.version, build_dir, release.sha256)
         else:
-            ok = multi_add(release.url, release.version, prev_version, build_dir)
+            ok = multi_add(release.url, release.version, prev_version, build_dir, release.sha256)
+        if ok and MULTI_SPLIT:
+            publish_multi_part(release.version, os.path.join(build_dir, "blender"))
 
         clean_build_dir(build_dir)
         log_disk_usage(f"after cleanup {release.version}")
@@ -75,6 +677,8 @@ def build_multi_version(registry: str) -> bool:
             return False
 
         print(f"✅ {release.version} multi build OK")
+        if MULTI_INCREMENTAL:
+            multi_push_cache(release.version, registry)
         if prev_version is not None and not KEEP_IMAGES:
             remove_image(multi_image_tag(prev_version))
         prev_version = release.version
@@ -86,6 +690,198 @@ def build_multi_version(registry: str) -> bool:
     ok = multi_push(prev_version, registry)
     if not KEEP_IMAGES:
         remove_image(multi_image_tag(prev_version))
+    if ok and MULTI_SPLIT:
+        push_multi_parts_index(releases)
+    if ok:
+        print("✅ multi-version image complete")
+    else:
+        print("❌ multi-version push FAILED")
+    return ok
+
+
+def multi_tag_suffix() -> str:
+    """Suffix of the published multi-version tags for the base profile the multi-version image is built on."""
+    return BASE_PROFILE_TEMPLATES[MULTI_BASE_PROFILE]["tag_suffix"]
+
+
+def multi_version_labels(releases: list) -> dict:
+    """The blender_X_Y_version labels a multi-version image holding exactly these releases carries."""
+    return {f"blender_{x}_{y}_version": f"{x}.{y}.{z}" for x, y, z in (release.version for release in releases)}
+
+
+def multi_cache_tag(version: tuple, registry: str) -> str:
+    """Published tag of the chain image that ends with version, used as cache by MULTI_INCREMENTAL."""
+    return f"{registry}/{IMAGE_REPOSITORY}:multi-cache-{version[0]}.{version[1]}{multi_tag_suffix()}"
+
+
+def multi_part_tag(version: tuple, registry: str) -> str:
+    """Published tag of the single-layer image holding only /home/headless/blenders/X.Y (MULTI_SPLIT)."""
+    return f"{registry}/{IMAGE_REPOSITORY}:multi-part-{version[0]}.{version[1]}"
+
+
+def publish_multi_part(version: tuple, tree: str):
+    """Best-effort: assemble the Blender tree as multi-part-X.Y, an image of nothing but its layer at
+    /home/headless/blenders/X.Y, and push it to every registry.
+    """
+    name = f"{version[0]}.{version[1]}"
+    tags = [multi_part_tag(version, registry) for registry in REGISTRIES]
+    layout_dir = os.path.join(os.path.dirname(__file__), "build", "parts", name)
+    with METRICS.stage("assemble", image=tags[0], version=name) as record:
+        try:
+            manifest = oci.build_layout(
+                layout_dir,
+                tree,
+                f"/home/headless/blenders/{name}",
+                oci.SCRATCH_BASE,
+                {f"blender_{version[0]}_{version[1]}_version": f"{version[0]}.{version[1]}.{version[2]}"},
+                [tags[0].rsplit(":", 1)[1]],
+                OCI_COMPRESSION,
+            )
+        except (OSError, RuntimeError) as exc:
+            print(f"-> WARNING: failed to assemble {tags[0]}: {exc} (non-fatal)")
+            record["ok"] = False
+            clean_build_dir(layout_dir)
+            return
+        record["bytes"] = json.loads(manifest)["layers"][0]["size"]
+    print(f"-> ASSEMBLED {tags[0]} ({OCI_COMPRESSION})")
+    if not push_native_image((layout_dir, manifest, oci.SCRATCH_BASE, tags)):
+        print(f"-> WARNING: failed to push {tags[0]} (non-fatal)")
+    clean_build_dir(layout_dir)
+
+
+def push_multi_parts_index(releases: list):
+    """Best-effort: push multi-parts, an OCI index of the multi-part-X.Y image of every release annotated with
+    its Blender version, so fetch_blender.py can list and resolve versions with one request.
+    Parts of versions taken over by MULTI_INCREMENTAL were published by an earlier run and are looked up.
+    """
+    if SKIP_IMAGE_PUSH:
+        return
+
+    def push(registry: str) -> bool:
+        client = RegistryClient(registry, IMAGE_REPOSITORY, auth=load_credentials(registry))
+        try:
+            manifests = []
+            for release in releases:
+                x, y, z = release.version
+                descriptor = client.get_manifest_descriptor(f"multi-part-{x}.{y}")
+                if descriptor is None:
+                    print(f"-> WARNING: multi-part-{x}.{y} is not published on {registry}, leaving it out of {MULTI_PARTS_TAG}")
+                    continue
+                descriptor["annotations"] = {
+                    "org.opencontainers.image.ref.name": f"multi-part-{x}.{y}",
+                    "org.opencontainers.image.version": f"{x}.{y}.{z}",
+                }
+                manifests.append(descriptor)
+            client.put_manifest(MULTI_PARTS_TAG, json.dumps(oci.image_index(manifests), sort_keys=True).encode(), oci.OCI_INDEX)
+        except (requests.RequestException, KeyError, ValueError) as exc:
+            print(f"-> WARNING: failed to push {MULTI_PARTS_TAG} to {registry}: {exc} (non-fatal)")
+            return False
+        return True
+
+    print(f"-> PUSHING {MULTI_PARTS_TAG} INDEX")
+    with ThreadPoolExecutor(max_workers=len(REGISTRIES)) as executor:
+        list(executor.map(push, REGISTRIES))
+
+
+def published_multi_holds(client: RegistryClient, tag: str, releases: list, key: str) -> bool:
+    """Whether the published image tag holds exactly releases (its blender_X_Y_version labels) built on the
+    base identified by key (its blender_base label, see base_key).
+    """
+    try:
+        labels = client.get_labels(tag)
+    except (requests.RequestException, ValueError, KeyError) as exc:
+        print(f"-> could not inspect {tag} ({exc})")
+        return False
+    if labels is None:
+        return False
+    published = {name: value for name, value in labels.items() if re.fullmatch(r"blender_\d+_\d+_version", name)}
+    return published == multi_version_labels(releases) and labels.get("blender_base") == key
+
+
+def multi_version_current(releases: list, key: str) -> bool:
+    """Whether the multi-version image published in every registry of REGISTRIES holds exactly releases on base key."""
+    for name in REGISTRIES:
+        client = RegistryClient(name, IMAGE_REPOSITORY, auth=load_credentials(name))
+        if not published_multi_holds(client, f"multi-version{multi_tag_suffix()}", releases, key):
+            return False
+    return True
+
+
+def plan_multi_reuse(releases: list, registry: str) -> int:
+    """Return how many of the oldest releases can be taken over from a published chain image.
+
+    The blender_X_Y_version labels of a published image list exactly the versions it holds, its blender_base
+    label the base it was built on; images on another base than the current one are never reused. Returns -1
+    when the multi-version image in every registry already holds all releases, otherwise the length of the
+    longest prefix of releases for which registry has a multi-cache-X.Y image with exactly those versions
+    (0 when nothing can be reused or the current base is unknown).
+    """
+    print(f"====== Planning multi-version reuse against {registry}/{IMAGE_REPOSITORY} ======")
+    key = base_key(MULTI_BASE_PROFILE)
+    if key is None:
+        print("-> base image digest unknown, published images cannot be matched against it, rebuilding every version")
+        return 0
+    if multi_version_current(releases, key):
+        return -1
+    client = RegistryClient(registry, IMAGE_REPOSITORY, auth=load_credentials(registry))
+    for count in range(len(releases), 0, -1):
+        version = releases[count - 1].version
+        if published_multi_holds(client, f"multi-cache-{version[0]}.{version[1]}{multi_tag_suffix()}", releases[:count], key):
+            print(f"-> reusing {count} unchanged versions up to {version[0]}.{version[1]}, rebuilding {len(releases) - count}")
+            return count
+    print("-> no reusable prefix published, rebuilding every version")
+    return 0
+
+
+def build_multi_version_staged(releases: list, registry: str) -> bool:
+    """Build the multi-version image in one go from a generated multi-stage Containerfile.
+
+    Every version is downloaded and extracted into build/multi/X.Y in parallel (PREPARE_WORKERS at once)
+    and gets its own stage, which the final image copies from. The runtime can build and cache each
+    version stage independently, so no version waits for the image of the previous one.
+    """
+    multi_dir = os.path.join(os.path.dirname(__file__), "build", "multi")
+    log_disk_usage("before multi prepare")
+    ensure_disk_headroom(MIN_FREE_GB)
+
+    def prepare(release) -> bool:
+        if _cancelled.is_set():
+            return False
+        build_dir = os.path.join(multi_dir, f"{release.version[0]}.{release.version[1]}")
+        return prepare_blender(release.url, build_dir, sha256=release.sha256)
+
+    executor = ThreadPoolExecutor(max_workers=max(PREPARE_WORKERS, 1))
+    try:
+        prepared = list(executor.map(prepare, releases))
+    finally:
+        executor.shutdown(cancel_futures=True)
+    log_disk_usage("after multi prepare")
+    failed = [release.version for release, ok in zip(releases, prepared) if not ok]
+    if failed:
+        print(f"❌ preparing {failed} FAILED, aborting")
+        clean_build_dir(multi_dir)
+        return False
+
+    versions = [release.version for release in releases]
+    if MULTI_SPLIT:
+        # before deduplication, which leaves the newer trees incomplete on their own
+        for version in versions:
+            publish_multi_part(version, os.path.join(multi_dir, f"{version[0]}.{version[1]}", "blender"))
+    shared_layer = MULTI_DEDUP == "hardlink"
+    if MULTI_DEDUP:
+        dedupe_multi_trees(versions, multi_dir)
+    ok = multi_build_staged(versions, multi_dir, shared_layer)
+    clean_build_dir(multi_dir)
+    log_disk_usage("after multi cleanup")
+    if not ok:
+        print("❌ staged multi build FAILED")
+        return False
+
+    ok = multi_push(versions[-1], registry)
+    if not KEEP_IMAGES:
+        remove_image(multi_image_tag(versions[-1]))
+    if ok and MULTI_SPLIT:
+        push_multi_parts_index(releases)
     if ok:
         print("✅ multi-version image complete")
     else:
@@ -93,6 +889,32 @@ def build_multi_version(registry: str) -> bool:
     return ok
 
 
+def dedupe_multi_trees(versions: list, multi_dir: str):
+    """Replace files repeated across the prepared versions by links to their oldest copy and report the savings.
+
+    For MULTI_DEDUP=hardlink the trees are first moved to multi_dir/blenders/X.Y, which is then copied into
+    the image as a single layer (hardlinks cannot span layers).
+    """
+    trees = []
+    for version in versions:
+        name = f"{version[0]}.{version[1]}"
+        local_root = os.path.join(multi_dir, name, "blender")
+        if MULTI_DEDUP == "hardlink":
+            shared_root = os.path.join(multi_dir, "blenders", name)
+            os.makedirs(os.path.dirname(shared_root), exist_ok=True)
+            os.rename(local_root, shared_root)
+            local_root = shared_root
+        trees.append((local_root, f"/home/headless/blenders/{name}"))
+
+    total = sum(directory_size(root) for root, _ in trees)
+    print(f"- deduplicating {len(trees)} Blender trees ({total / 1024 ** 2:.1f} MiB) with {MULTI_DEDUP}s")
+    files, saved = dedupe_trees(trees, MULTI_DEDUP)
+    print(
+        f"-> DEDUP DONE: {files} files replaced, {saved / 1024 ** 2:.1f} MiB saved "
+        f"({100 * saved / total if total else 0:.1f}% of {total / 1024 ** 2:.1f} MiB)"
+    )
+
+
 def clean_build_dir(dir: str):
     if KEEP_BUILD_DIRS:
         print(f"-> KEEPING build directory {dir} (KEEP_BUILD_DIRS=1)")
@@ -104,41 +926,242 @@ def clean_build_dir(dir: str):
         print(f"-> SKIPPED cleanup, directory {dir} not found")
 
 
-def download_file(url, dst, force=False):
+def download_file(url, dst, force=False, sha256=None) -> str:
+    """Download url to dst through dst.tmp, resuming an existing dst.tmp instead of starting over.
+    With DOWNLOAD_SEGMENTS > 1, large archives on servers supporting Range are fetched in parallel segments.
+    Returns the sha256 of dst, hashed while downloading ("" for an existing dst without an expected sha256).
+    Raises RuntimeError when the download still fails after DOWNLOAD_RETRIES resumes, or when it does not
+    match the expected sha256 (the file is deleted then).
+    """
     if os.path.exists(dst):
         if force:
             os.remove(dst)
         else:
             print(f"- skipping download, {dst} exists")
-            return
+            if sha256 is None:
+                return ""
+            digest = file_sha256(dst)
+            if digest != sha256:
+                os.remove(dst)
+                raise RuntimeError(f"Existing {dst} does not match sha256 {sha256}")
+            return digest
 
     print(f"- downloading {url} to {dst}", end="")
     tmp_dst = dst + ".tmp"
     os.makedirs(os.path.dirname(dst), exist_ok=True)
-    with requests.get(url, stream=True) as r:
-        r.raise_for_status()
-        with open(tmp_dst, 'wb') as f:
-            for chunk in r.iter_content(chunk_size=1024 * 1024):
-                if chunk:
-                    f.write(chunk)
-    print("✅ download complete")
+    if os.path.exists(tmp_dst) and (force or load_partial(tmp_dst, url) is None):
+        print(f"\n-> discarding {tmp_dst}, it is not a resumable download of {url}", end="")
+        discard_partial(tmp_dst)
+
+    size = probe_range_support(url) if DOWNLOAD_SEGMENTS > 1 else None
+    if size is not None and size >= DOWNLOAD_SEGMENT_MIN_MB * 1024 * 1024:
+        print(f" in {DOWNLOAD_SEGMENTS} segments", end="")
+        download_segments(url, tmp_dst, size, DOWNLOAD_SEGMENTS)
+        # segments arrive out of order, hash the assembled file (cheap next to decompressing it)
+        digest = file_sha256(tmp_dst)
+    else:
+        digest = download_resumable(url, tmp_dst)
+    if sha256 is not None and digest != sha256:
+        print(f"\n-> ERROR: sha256 mismatch for {url}: got {digest}, published {sha256}")
+        discard_partial(tmp_dst)
+        raise RuntimeError("Checksum mismatch")
+    print("✅ download complete" + (" (sha256 verified)" if sha256 is not None else ""))
     os.replace(tmp_dst, dst)
+    discard_partial(tmp_dst)
+    return digest
+
+
+# Small enough that little is lost when a connection drops mid-chunk, as a resume restarts after the last written chunk.
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Errors after which a download is resumed rather than given up.
+RESUMABLE_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+def partial_record_path(path: str) -> str:
+    return path + ".json"
+
+
+def load_partial(path: str, url: str):
+    """The record save_partial wrote next to the partial download at path, or None when path cannot be
+    resumed as a download of url: no record, another URL, or a preallocated file of a segmented download
+    (its size says nothing about how much of it arrived).
+    """
+    try:
+        with open(partial_record_path(path), encoding="utf-8") as file:
+            record = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if record.get("url") != url or record.get("segmented"):
+        return None
+    return record
+
+
+def save_partial(path: str, url: str, size: int = None, etag: str = None, segmented: bool = False):
+    with open(partial_record_path(path), "w", encoding="utf-8") as file:
+        json.dump({"url": url, "size": size, "etag": etag, "segmented": segmented}, file)
 
 
-def extract_tar(tar_path, target_dir):
+def discard_partial(path: str):
+    """Remove a partial download and its record."""
+    for leftover in (path, partial_record_path(path)):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+
+def download_resumable(url: str, path: str) -> str:
+    """Download url into path, appending to what path already holds via a Range request.
+    Falls back to a full download when the server ignores Range or the file changed since path was
+    started (If-Range with its ETag). Returns the sha256 of path, computed from the chunks as they are
+    written (plus one read of what path held before, when resuming it).
+    """
+    session = gbr.get_session()
+    digest = hashlib.sha256()
+    hashed = 0
+    record = load_partial(path, url) if os.path.exists(path) else None
+    if record is None:
+        discard_partial(path)
+        record = {}
+    for attempt in range(DOWNLOAD_RETRIES + 1):
+        offset = os.path.getsize(path) if os.path.exists(path) else 0
+        if offset != hashed:
+            digest, hashed = hash_prefix(path, offset), offset
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        if offset and record.get("etag") and not record["etag"].startswith("W/"):
+            headers["If-Range"] = record["etag"]
+        expected = None
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=gbr.REQUEST_TIMEOUT) as r:
+                if offset and r.status_code == 416:
+                    if record.get("size") == offset:
+                        return digest.hexdigest()  # nothing left to fetch
+                    print(f"\n-> {path} does not match {url}, restarting the download", end="")
+                    discard_partial(path)
+                    record = {}
+                    continue
+                r.raise_for_status()
+                if offset and r.status_code != 206:
+                    print(f"\n-> server ignored Range request, restarting download of {url}", end="")
+                    offset = 0
+                    digest, hashed = hashlib.sha256(), 0
+                if r.headers.get("Content-Length") is not None:
+                    expected = offset + int(r.headers["Content-Length"])
+                if offset and None not in (expected, record.get("size")) and expected != record["size"]:
+                    print(f"\n-> {url} changed size since {path} was started, restarting the download", end="")
+                    discard_partial(path)
+                    record = {}
+                    continue
+                if not offset:
+                    record = {"size": expected, "etag": r.headers.get("ETag")}
+                    save_partial(path, url, **record)
+                with open(path, "ab" if offset else "wb") as f:
+                    for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        check_cancelled()
+                        if chunk:
+                            f.write(chunk)
+                            digest.update(chunk)
+                            hashed += len(chunk)
+        except RESUMABLE_ERRORS as exc:
+            print(f"\n-> download interrupted at {os.path.getsize(path) if os.path.exists(path) else 0} bytes ({exc})", end="")
+            continue
+
+        if expected is None or os.path.getsize(path) == expected:
+            return digest.hexdigest()
+        print(f"\n-> download ended at {os.path.getsize(path)} of {expected} bytes", end="")
+
+    raise RuntimeError(f"Download of {url} failed after {DOWNLOAD_RETRIES} resumes")
+
+
+def hash_prefix(path: str, size: int):
+    """sha256 object fed with the first size bytes of path."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while size > 0:
+            chunk = f.read(min(size, 1024 * 1024))
+            if not chunk:
+                break
+            digest.update(chunk)
+            size -= len(chunk)
+    return digest
+
+
+def probe_range_support(url: str):
+    """Return the size of url when the server accepts byte Range requests, otherwise None."""
+    try:
+        r = gbr.get_session().head(url, allow_redirects=True, timeout=gbr.REQUEST_TIMEOUT)
+    except requests.RequestException:
+        return None
+    if r.status_code != 200 or r.headers.get("Accept-Ranges", "").lower() != "bytes":
+        return None
+    length = r.headers.get("Content-Length")
+    return int(length) if length is not None else None
+
+
+def download_segments(url: str, path: str, size: int, segments: int):
+    """Download url into a preallocated file of size bytes as segments parallel byte ranges."""
+    save_partial(path, url, size, segmented=True)
+    with open(path, "wb") as f:
+        f.truncate(size)
+    bounds = [(i * size // segments, (i + 1) * size // segments - 1) for i in range(segments)]
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        list(executor.map(lambda bound: download_range(url, path, *bound), bounds))
+
+
+def download_range(url: str, path: str, start: int, end: int):
+    """Fetch bytes start..end (inclusive) of url into the same offsets of path, resuming after disconnects."""
+    session = gbr.get_session()
+    position = start
+    for attempt in range(DOWNLOAD_RETRIES + 1):
+        try:
+            headers = {"Range": f"bytes={position}-{end}"}
+            with session.get(url, headers=headers, stream=True, timeout=gbr.REQUEST_TIMEOUT) as r:
+                r.raise_for_status()
+                if r.status_code != 206:
+                    raise RuntimeError(f"Server ignored Range request for {url}")
+                with open(path, "r+b") as f:
+                    f.seek(position)
+                    for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        check_cancelled()
+                        chunk = chunk[:end + 1 - position]
+                        f.write(chunk)
+                        position += len(chunk)
+        except RESUMABLE_ERRORS as exc:
+            print(f"\n-> segment {start}-{end} interrupted at {position} ({exc})", end="")
+            continue
+        if position > end:
+            return
+
+    raise RuntimeError(f"Download of {url} bytes {start}-{end} failed after {DOWNLOAD_RETRIES} resumes")
+
+
+def extract_tar(tar_path, target_dir, verified=False):
+    """Extract tar_path into target_dir/blender. verified archives (sha256 matched the published one)
+    skip the validation pass of the Python fallback.
+    """
     dst = os.path.join(target_dir, "blender")
     if os.path.exists(dst):
         print(f"- skipping extraction, {dst} exists")
         return
 
-    print(f"- validating archive {tar_path}")
-    with tarfile.open(tar_path) as tar:
+    decompressor = find_xz_decompressor()
+    if decompressor is not None:
         try:
-            tar.getmembers()
-        except EOFError:
-            print("-> ERROR: archive truncated, deleting and retrying download")
-            os.remove(tar_path)
-            raise RuntimeError("Corrupted archive")
+            extract_tar_parallel(tar_path, dst, decompressor)
+            print("✅ extraction complete")
+            return
+        except OSError as exc:
+            print(f"-> {decompressor[0]} unavailable ({exc}), falling back to Python extraction")
+            if os.path.exists(dst):
+                shutil.rmtree(dst)
+
+    if not verified:
+        print(f"- validating archive {tar_path}")
+        with tarfile.open(tar_path) as tar:
+            try:
+                tar.getmembers()
+            except EOFError:
+                print("-> ERROR: archive truncated, deleting and retrying download")
+                os.remove(tar_path)
+                raise RuntimeError("Corrupted archive")
 
     print(f"- extracting {tar_path} -> {target_dir}")
     with tarfile.open(tar_path) as tar:
@@ -156,6 +1179,163 @@ def extract_tar(tar_path, target_dir):
     print("✅ extraction complete")
 
 
+class HashingReader:
+    """Read-only file-like wrapper which hashes and counts every byte read through it,
+    optionally copying it into sink (a binary file) as well. Reads raise BuildCancelled once the build is interrupted.
+    """
+    def __init__(self, raw, algorithm: str = "sha256", sink=None):
+        self.raw = raw
+        self.hash = hashlib.new(algorithm)
+        self.bytes_read = 0
+        self.sink = sink
+
+    def read(self, size=-1):
+        check_cancelled()
+        data = self.raw.read(size)
+        self.hash.update(data)
+        self.bytes_read += len(data)
+        if self.sink is not None:
+            self.sink.write(data)
+        return data
+
+    def drain(self, chunk_size: int = 1024 * 1024):
+        """Read (and hash) whatever the consumer left unread, e.g. padding after the tar end marker."""
+        while self.read(chunk_size):
+            pass
+
+    def hexdigest(self) -> str:
+        return self.hash.hexdigest()
+
+
+def strip_top_dir(name: str) -> str:
+    """Drop the leading blender-X.Y.Z-os-arch/ component of an archive member path."""
+    parts = name.split("/", 1)
+    return parts[1] if len(parts) == 2 else ""
+
+
+def extract_stripped(tar: tarfile.TarFile, dst: str):
+    """Extract a (possibly stream-mode) archive into dst, dropping its top-level directory.
+    Raises BuildCancelled between members once the build is interrupted.
+    """
+    for member in tar:
+        check_cancelled()
+        member.name = strip_top_dir(member.name)
+        if not member.name:
+            continue
+        if member.islnk():
+            member.linkname = strip_top_dir(member.linkname)
+        tar.extract(member, dst)
+
+
+def find_xz_decompressor():
+    """Return the command of an external multi-threaded xz decompressor reading stdin and writing stdout,
+    or None when XZ_BACKEND=python, on Windows, or when no such tool is installed.
+    """
+    if XZ_BACKEND == "python" or os.name == "nt":
+        return None
+    commands = {
+        "pixz": ["pixz", "-d"],
+        "xz": ["xz", "-d", "-c", "-T0"],
+    }
+    names = [XZ_BACKEND] if XZ_BACKEND in commands else ["pixz", "xz"]
+    for name in names:
+        if shutil.which(name):
+            return commands[name]
+    if XZ_BACKEND in commands:
+        print(f"-> XZ_BACKEND={XZ_BACKEND} requested but not found on PATH, using Python extraction")
+    return None
+
+
+def extract_tar_parallel(tar_path: str, dst: str, decompressor: list):
+    """Extract tar_path into dst, decompressing on all cores with an external xz/pixz process.
+
+    The decompressed tar is read in stream mode, so the archive is decompressed exactly once and no
+    separate validation pass is needed: a truncated or corrupted archive makes the decompressor fail,
+    the partial tree and the archive are deleted and RuntimeError is raised for the download retry.
+    OSError (decompressor could not be started) is left to the caller to fall back to Python.
+    """
+    print(f"- extracting {tar_path} -> {dst} with {' '.join(decompressor)}")
+    error = None
+    with open(tar_path, "rb") as src:
+        proc = subprocess.Popen(decompressor, stdin=src, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            with tarfile.open(fileobj=proc.stdout, mode="r|") as tar:
+                extract_stripped(tar, dst)
+            while proc.stdout.read(1024 * 1024):
+                pass
+        except (tarfile.TarError, EOFError) as exc:
+            error = str(exc)
+        finally:
+            proc.stdout.close()
+            stderr = proc.stderr.read().decode(errors="replace").strip()
+            proc.stderr.close()
+            returncode = proc.wait()
+
+    if returncode != 0 or error is not None:
+        print(f"-> ERROR: archive corrupted ({error or stderr or f'exit status {returncode}'}), deleting and retrying download")
+        if os.path.exists(dst):
+            shutil.rmtree(dst)
+        os.remove(tar_path)
+        raise RuntimeError("Corrupted archive")
+
+
+def stream_extract(url: str, target_dir: str, copy_to: str = None, sha256: str = None) -> str:
+    """Download url and extract it on the fly into target_dir/blender, without writing the archive to disk.
+
+    The HTTP body is fed through xz into tarfile stream mode (r|xz), the top-level directory of the
+    archive is stripped so files land in target_dir/blender directly, and the sha256 of the archive
+    is computed along the way and returned. A truncated or broken stream removes the partial tree and
+    raises RuntimeError, so callers can retry exactly like after a corrupted extract_tar.
+    When copy_to is given, the raw archive bytes are also written there (used to fill the archive store).
+    An archive not matching the expected sha256 is treated like a broken stream once it is read completely.
+    """
+    dst = os.path.join(target_dir, "blender")
+    if os.path.exists(dst):
+        print(f"- skipping extraction, {dst} exists")
+        return ""
+
+    print(f"- streaming {url} -> {dst}")
+    sink = None
+    try:
+        if copy_to is not None:
+            os.makedirs(os.path.dirname(copy_to), exist_ok=True)
+            sink = open(copy_to, "wb")
+        with gbr.get_session().get(url, stream=True, timeout=gbr.REQUEST_TIMEOUT) as r:
+            r.raise_for_status()
+            r.raw.decode_content = True
+            reader = HashingReader(r.raw, sink=sink)
+            with tarfile.open(fileobj=reader, mode="r|xz") as tar:
+                extract_stripped(tar, dst)
+            reader.drain()
+    except (requests.RequestException, urllib3.exceptions.HTTPError, tarfile.TarError, lzma.LZMAError, EOFError, BuildCancelled) as exc:
+        print(f"-> ERROR: streamed extraction failed: {exc}")
+        if os.path.exists(dst):
+            shutil.rmtree(dst)
+        if sink is not None:
+            sink.close()
+            os.remove(copy_to)
+        if isinstance(exc, BuildCancelled):
+            raise
+        raise RuntimeError("Corrupted archive") from exc
+    finally:
+        if sink is not None:
+            sink.close()
+
+    digest = reader.hexdigest()
+    record = METRICS.current()
+    if record is not None:
+        # bytes transferred, like the download stage, not the size of the extracted tree
+        record["bytes"] = reader.bytes_read
+    if sha256 is not None and digest != sha256:
+        print(f"-> ERROR: sha256 mismatch for {url}: got {digest}, published {sha256}")
+        shutil.rmtree(dst)
+        if copy_to is not None:
+            os.remove(copy_to)
+        raise RuntimeError("Checksum mismatch")
+    print(f"✅ streamed extraction complete, {reader.bytes_read} bytes, sha256 {digest}" + (" (verified)" if sha256 is not None else ""))
+    return digest
+
+
 def safe_extract_with_symlink_copy(tar: tarfile.TarFile, target_dir: str):
     for member in tar.getmembers():
         try:
@@ -200,47 +1380,271 @@ def copy_link_target(tar: tarfile.TarFile, member: tarfile.TarInfo, target_dir:
             shutil.copyfileobj(src, dst)
 
 
-SINGLE_CONTAINERFILE = """FROM docker.io/accetto/ubuntu-vnc-xfce-opengl-g3
+DESKTOP_BASE = """FROM docker.io/accetto/ubuntu-vnc-xfce-opengl-g3
 USER root
 RUN apt-get update && apt-get install -y git unzip ca-certificates
-ADD blender blender
-LABEL blender_version={x}.{y}.{z} blender_stage={stage}
-ENTRYPOINT [ "/usr/bin/tini", "--", "/dockerstartup/startup.sh" ]
 """
 
 
-def generate_single_containerfile(version: tuple, stage: str):
+DESKTOP_ENTRYPOINT = """ENTRYPOINT [ "/usr/bin/tini", "--", "/dockerstartup/startup.sh" ]
+"""
+
+
+# Only what Blender needs in background mode: X client libraries it links against and Mesa for software
+# OpenGL/EGL. WORKDIR matches the home of the desktop base, so Blender ends up at the same paths.
+MINIMAL_BASE = """FROM docker.io/library/ubuntu:22.04
+RUN apt-get update && apt-get install -y --no-install-recommends git unzip ca-certificates \\
+    libx11-6 libxi6 libxxf86vm1 libxfixes3 libxrender1 libxkbcommon0 libsm6 libice6 \\
+    libgl1 libglu1-mesa libegl1 libgl1-mesa-dri \\
+    && rm -rf /var/lib/apt/lists/*
+WORKDIR /home/headless
+"""
+
+
+# exec form: Blender runs as PID 1 and receives signals directly
+MINIMAL_SINGLE_ENTRYPOINT = """ENTRYPOINT [ "/home/headless/blender/blender" ]
+"""
+
+
+BASE_PROFILE_TEMPLATES = {
+    "desktop": {
+        "base": DESKTOP_BASE,
+        "single_entrypoint": DESKTOP_ENTRYPOINT,
+        "multi_entrypoint": DESKTOP_ENTRYPOINT,
+        "tag_suffix": "",
+    },
+    "minimal": {
+        "base": MINIMAL_BASE,
+        "single_entrypoint": MINIMAL_SINGLE_ENTRYPOINT,
+        # several Blenders, none of them is the obvious entrypoint; keep the shell of the base image
+        "multi_entrypoint": "",
+        "tag_suffix": "-minimal",
+    },
+}
+
+
+# {profile: local tag} of the shared blender-base images prepared in this run, never removed by remove_image.
+BASE_IMAGES = {}
+BASE_IMAGE_NAME = "headless-blender-base"
+
+
+def pin_base_template(template: str) -> tuple:
+    """Pin the FROM image of a base template to its current digest. Returns (template, digest), the
+    template unchanged and digest None when the registry cannot be asked.
+    """
+    first, _, rest = template.partition("\n")
+    reference = first.split()[1]
+    registry, repository, tag = parse_reference(reference)
+    try:
+        descriptor = RegistryClient(registry, repository, auth=load_credentials(registry)).get_manifest_descriptor(tag)
+    except (requests.RequestException, KeyError, ValueError) as exc:
+        print(f"-> WARNING: could not resolve {reference}: {exc}")
+        return template, None
+    if descriptor is None:
+        print(f"-> WARNING: base image {reference} not found")
+        return template, None
+    return f"FROM {reference.split('@', 1)[0]}@{descriptor['digest']}\n{rest}", descriptor["digest"]
+
+
+def base_image_tags(profile: str, containerfile: str, registry: str) -> tuple:
+    """(local tag, cache tag) of the blender-base image built from containerfile. The version is a hash of
+    the pinned Containerfile, so a new base digest or a changed apt-get line gives a new image.
+    """
+    version = hashlib.sha256(containerfile.encode()).hexdigest()[:12]
+    return f"{BASE_IMAGE_NAME}:{profile}-{version}", f"{registry}/{IMAGE_REPOSITORY}:base-{profile}-{version}"
+
+
+@functools.lru_cache(maxsize=None)
+def pinned_base(profile: str) -> tuple:
+    """The base instructions of profile pinned by pin_base_template, resolved once per run."""
+    return pin_base_template(BASE_PROFILE_TEMPLATES[profile]["base"])
+
+
+def base_key(profile: str):
+    """Short hash of the pinned base instructions of profile, identifying what its images are built on.
+    None when the base digest could not be resolved.
+    """
+    containerfile, digest = pinned_base(profile)
+    if digest is None:
+        return None
+    return hashlib.sha256(containerfile.encode()).hexdigest()[:12]
+
+
+def native_base_key(digest: str) -> str:
+    """Short hash of the digest of the base image natively assembled images are built on (their blender_base label)."""
+    return hashlib.sha256(digest.encode()).hexdigest()[:12]
+
+
+@functools.lru_cache(maxsize=None)
+def single_base_key(profile: str):
+    """blender_base label of the single version images of profile: base_key, or with NATIVE_ASSEMBLY the
+    native_base_key of oci_base_image(profile), resolved once per run. None when the base cannot be resolved.
+    """
+    if not NATIVE_ASSEMBLY:
+        return base_key(profile)
+    try:
+        base = oci.load_base_image(oci_base_image(profile), os.path.join(OCI_CACHE_DIR, "base"))
+    except (requests.RequestException, RuntimeError, ValueError, KeyError) as exc:
+        print(f"-> WARNING: could not resolve base image {oci_base_image(profile)}: {exc}")
+        return None
+    return native_base_key(base["digest"])
+
+
+def prepare_base_image(profile: str, registry: str) -> bool:
+    """Make the shared blender-base image of profile available locally: already there, pulled from its
+    cache tag, or built (and its cache tag pushed, best-effort). Blender images of the profile are built
+    FROM it afterwards. On failure they keep the full base instructions of the profile.
+    When the base digest cannot be resolved, the instructions do not say which base the image is built on:
+    it is built under a tag of this run only, without reusing or publishing any cache tag.
+    """
+    containerfile, digest = pinned_base(profile)
+    local_tag, cache_tag = base_image_tags(profile, containerfile, registry)
+    if digest is None:
+        local_tag, cache_tag = f"{BASE_IMAGE_NAME}:{profile}-unpinned-{METRICS.run_id}", None
+        print(f"-> WARNING: {profile} base is NOT PINNED, building {local_tag} for this run only")
+    print(f"=== Preparing {profile} base image {local_tag} (base {digest or 'NOT PINNED'}) ===")
+    with METRICS.stage("base_image", profile=profile, image=local_tag) as record:
+        if cache_tag is not None and run_command(runtime_cmd('image', 'inspect', '--format', '{{.Id}}', local_tag)).returncode == 0:
+            record["source"] = "local"
+        elif cache_tag is not None and run_command(runtime_cmd('pull', cache_tag)).returncode == 0 \
+                and run_command(runtime_cmd('image', 'tag', cache_tag, local_tag)).returncode == 0:
+            record["source"] = "cache"
+            run_command(runtime_cmd('rmi', cache_tag))
+        else:
+            build_dir = os.path.join(os.path.dirname(__file__), "build", f"base-{profile}")
+            os.makedirs(build_dir, exist_ok=True)
+            cfpath = os.path.join(build_dir, "Containerfile")
+            with open(cfpath, "w") as file:
+                file.write(containerfile)
+            pb = run_command(runtime_cmd('build', '-f', cfpath, '-t', local_tag, '.'), cwd=build_dir)
+            shutil.rmtree(build_dir, ignore_errors=True)
+            if pb.returncode != 0:
+                record["ok"] = False
+                print(f"❌ {profile} base image build FAILED, building every image from the full base instructions")
+                return False
+            record["source"] = "build"
+            if not SKIP_IMAGE_PUSH and cache_tag is not None:
+                tagged = run_command(runtime_cmd('image', 'tag', local_tag, cache_tag)).returncode == 0
+                if not tagged or run_command(runtime_cmd('push', cache_tag)).returncode != 0:
+                    print(f"-> WARNING: failed to publish base cache tag {cache_tag} (non-fatal)")
+                run_command(runtime_cmd('rmi', cache_tag))
+        record["ok"] = True
+    BASE_IMAGES[profile] = local_tag
+    print(f"✅ {profile} base image {local_tag} ready ({record['source']})")
+    return True
+
+
+def prepare_base_images(profiles: list, registry: str):
+    """Prepare the shared blender-base image of every profile, unless SHARED_BASE is off or images are
+    assembled natively (they start from OCI_BASE_IMAGE)."""
+    if not SHARED_BASE or NATIVE_ASSEMBLY:
+        return
+    for profile in profiles:
+        if profile not in BASE_IMAGES:
+            prepare_base_image(profile, registry)
+
+
+def remove_unpinned_base_images():
+    """Remove the base images built on an unpinned base at the end of the run, no later run reuses them."""
+    for profile, tag in list(BASE_IMAGES.items()):
+        if pinned_base(profile)[1] is None:
+            del BASE_IMAGES[profile]
+            remove_image(tag)
+
+
+def base_instructions(profile: str) -> str:
+    """Start of the Containerfiles of profile: FROM its shared blender-base image once prepared,
+    otherwise the full base instructions."""
+    if profile in BASE_IMAGES:
+        return f"FROM {BASE_IMAGES[profile]}\n"
+    return BASE_PROFILE_TEMPLATES[profile]["base"]
+
+
+# Records which base (base_key) an image is built on, plan_builds and MULTI_INCREMENTAL only reuse images on the current one.
+BASE_LABEL = 'LABEL blender_base="{key}"\n'
+
+
+def base_label(key) -> str:
+    return BASE_LABEL.format(key=key) if key is not None else ""
+
+
+SINGLE_CONTAINERFILE = """{base}{base_label}ADD blender blender
+{warmup}LABEL blender_version={x}.{y}.{z} blender_stage="{stage}" blender_reference="{reference}"
+{entrypoint}"""
+
+
+def generate_single_containerfile(version: tuple, stage: str, reference: str = "", profile: str = "desktop"):
     """Generate single version Containerfile. Single version Container contains just one version of Blender."""
+    templates = BASE_PROFILE_TEMPLATES[profile]
     dockerfile = SINGLE_CONTAINERFILE.format(
+        base=base_instructions(profile),
+        base_label=base_label(base_key(profile)),
+        entrypoint=templates["single_entrypoint"],
         x=version[0],
         y=version[1],
         z=version[2],
         stage=stage,
+        reference=reference,
+        warmup=warmup_instructions("blender"),
     )
     return dockerfile
 
 
-MULTI_BASE_CONTAINERFILE = """FROM docker.io/accetto/ubuntu-vnc-xfce-opengl-g3
-USER root
-RUN apt-get update && apt-get install -y git unzip ca-certificates
-ADD blender /home/headless/blenders/{x}.{y}
-ENTRYPOINT [ "/usr/bin/tini", "--", "/dockerstartup/startup.sh" ]
-"""
+# CPython's test suites ship files with deliberately broken syntax, they are left out. Any other compile
+# error, or a tree without a bundled interpreter, fails the build instead of silently skipping the warmup.
+WARMUP_COMPILE = (
+    'RUN py=$(ls -d {root}/*/python/bin/python3.* | head -n 1) && [ -x "$py" ] '
+    '&& "$py" -m compileall -qq -j 0 -x "/test/|/lib2to3/tests/" {root}\n'
+)
+
+
+WARMUP_BLENDER = 'RUN {root}/blender -b --factory-startup --python-expr pass\n'
+
+
+def warmup_instructions(root: str) -> str:
+    """RUN instructions warming up the Blender tree at root (a path inside the image) during the build:
+    precompile every bundled .py with Blender's own interpreter (PREWARM) and start Blender once (PREWARM_BLENDER).
+    """
+    lines = ""
+    if PREWARM:
+        lines += WARMUP_COMPILE.format(root=root)
+    if PREWARM_BLENDER:
+        lines += WARMUP_BLENDER.format(root=root)
+    return lines
+
+
+MULTI_BASE_CONTAINERFILE = """{base}{base_label}ADD blender /home/headless/blenders/{x}.{y}
+{warmup}LABEL blender_{x}_{y}_version={x}.{y}.{z}
+{entrypoint}"""
 
 
 MULTI_ADD_CONTAINERFILE = """FROM blender_{prev_x}_{prev_y}
 USER root
 ADD blender /home/headless/blenders/{x}.{y}
+{warmup}LABEL blender_{x}_{y}_version={x}.{y}.{z}
 """
 
 
+def multi_base_label() -> str:
+    return base_label(base_key(MULTI_BASE_PROFILE))
+
+
 def generate_multi_base_containerfile(version: tuple):
     """Generate the base Containerfile for the multi-version image.
 
     Unlike the single image, every Blender lives under a versioned directory
     /home/headless/blenders/X.Y so all versions coexist at predictable paths.
     """
-    return MULTI_BASE_CONTAINERFILE.format(x=version[0], y=version[1])
+    templates = BASE_PROFILE_TEMPLATES[MULTI_BASE_PROFILE]
+    return MULTI_BASE_CONTAINERFILE.format(
+        base=base_instructions(MULTI_BASE_PROFILE),
+        base_label=multi_base_label(),
+        entrypoint=templates["multi_entrypoint"],
+        x=version[0],
+        y=version[1],
+        z=version[2],
+        warmup=warmup_instructions(f"/home/headless/blenders/{version[0]}.{version[1]}"),
+    )
 
 
 def generate_multi_add_containerfile(version: tuple, prev_version: tuple):
@@ -248,11 +1652,58 @@ def generate_multi_add_containerfile(version: tuple, prev_version: tuple):
     return MULTI_ADD_CONTAINERFILE.format(
         x=version[0],
         y=version[1],
+        z=version[2],
+        warmup=warmup_instructions(f"/home/headless/blenders/{version[0]}.{version[1]}"),
         prev_x=prev_version[0],
         prev_y=prev_version[1],
     )
 
 
+MULTI_STAGE_CONTAINERFILE = """FROM scratch AS blender_{x}_{y}
+COPY {x}.{y}/blender /blender
+"""
+
+
+MULTI_STAGED_FINAL_CONTAINERFILE = """{base}{copies}{entrypoint}"""
+
+
+MULTI_STAGED_COPY = "COPY --from=blender_{x}_{y} /blender /home/headless/blenders/{x}.{y}\n"
+
+
+MULTI_SHARED_LAYER_COPY = "COPY blenders /home/headless/blenders\n"
+
+
+MULTI_VERSION_LABEL = "LABEL blender_{x}_{y}_version={x}.{y}.{z}\n"
+
+
+def generate_multi_staged_containerfile(versions: list, shared_layer: bool = False):
+    """Generate a multi-stage Containerfile with one stage per version, each built from X.Y/blender
+    in the build context, and a final stage copying every version to /home/headless/blenders/X.Y.
+    With shared_layer, all versions are copied from blenders/ in one layer instead (no per-version stages).
+    """
+    templates = BASE_PROFILE_TEMPLATES[MULTI_BASE_PROFILE]
+    labels = "".join(MULTI_VERSION_LABEL.format(x=v[0], y=v[1], z=v[2]) for v in versions)
+    warmups = "".join(warmup_instructions(f"/home/headless/blenders/{v[0]}.{v[1]}") for v in versions)
+    if shared_layer:
+        return MULTI_STAGED_FINAL_CONTAINERFILE.format(
+            base=base_instructions(MULTI_BASE_PROFILE),
+            copies=multi_base_label() + MULTI_SHARED_LAYER_COPY + warmups + labels,
+            entrypoint=templates["multi_entrypoint"],
+        )
+    stages = "\n".join(MULTI_STAGE_CONTAINERFILE.format(x=v[0], y=v[1]) for v in versions)
+    copies = "".join(
+        MULTI_STAGED_COPY.format(x=v[0], y=v[1])
+        + warmup_instructions(f"/home/headless/blenders/{v[0]}.{v[1]}")
+        + MULTI_VERSION_LABEL.format(x=v[0], y=v[1], z=v[2])
+        for v in versions
+    )
+    return stages + "\n" + MULTI_STAGED_FINAL_CONTAINERFILE.format(
+        base=base_instructions(MULTI_BASE_PROFILE),
+        copies=multi_base_label() + copies,
+        entrypoint=templates["multi_entrypoint"],
+    )
+
+
 def stage_tag_suffix(stage: str) -> str:
     """Normalize a build stage into a tag-safe suffix.
 
@@ -266,14 +1717,44 @@ def stage_tag_suffix(stage: str) -> str:
     return safe or "unknown"
 
 
-def prepare_blender(url: str, build_dir: str, attempts: int = 2) -> bool:
-    """Download and extract Blender into build_dir/blender, retrying once on a corrupted archive."""
+def prepare_blender(url: str, build_dir: str, attempts: int = 2, sha256: str = None) -> bool:
+    """Download and extract Blender into build_dir/blender, retrying once on a corrupted archive.
+
+    With ARCHIVE_STORE=1 archives come from (and go to) the shared archive store. With STREAM_EXTRACT=1
+    the archive is extracted while downloading and only written to the store, never to build_dir
+    (not on Windows, where the symlink fallback needs random access to the archive).
+    With the published sha256 of the archive, downloads and store hits are checked against it and a
+    matching archive is extracted without a separate validation pass.
+    """
     os.makedirs(build_dir, exist_ok=True)
     tar_path = os.path.join(build_dir, "blender.tar.xz")
+    stream = STREAM_EXTRACT and os.name != "nt"
+    store = get_archive_store()
     for attempt in range(attempts):
-        download_file(url, tar_path, force=attempt > 0)
+        if attempt > 0 and store is not None:
+            # the stored copy may be the corrupted one
+            store.evict(url)
         try:
-            extract_tar(tar_path, build_dir)
+            blob = store.lookup(url, sha256) if store is not None else None
+            if blob is not None:
+                link_or_copy(blob, tar_path)
+                timed_extract(url, tar_path, build_dir, verified=sha256 is not None)
+            elif stream:
+                copy_to = store.staging_path(url) if store is not None else None
+                with METRICS.stage("stream_extract", url=url, sha256_verified=sha256 is not None) as record:
+                    digest = stream_extract(url, build_dir, copy_to, sha256)
+                if copy_to is not None and digest:
+                    store.add(url, copy_to, digest, move=True)
+            else:
+                with METRICS.stage("download", url=url, sha256_verified=sha256 is not None) as record:
+                    digest = download_file(url, tar_path, force=attempt > 0, sha256=sha256)
+                    record["bytes"] = os.path.getsize(tar_path)
+                if store is not None:
+                    store.add(url, tar_path, digest or None)
+                timed_extract(url, tar_path, build_dir, verified=sha256 is not None)
+            if os.path.exists(tar_path) and not KEEP_BUILD_DIRS:
+                # extracted (and stored, with ARCHIVE_STORE): the archive only takes disk space from here on
+                os.remove(tar_path)
             return True
         except RuntimeError as exc:
             if attempt == attempts - 1:
@@ -283,40 +1764,344 @@ def prepare_blender(url: str, build_dir: str, attempts: int = 2) -> bool:
     return False
 
 
-def build_container(url: str, version: tuple, stage: str, build_dir: str, registry: str) -> bool:
+def timed_extract(url: str, tar_path: str, build_dir: str, verified: bool = False):
+    """extract_tar recorded as an "extract" stage, bytes being the size of the extracted tree."""
+    with METRICS.stage("extract", url=url, archive_bytes=os.path.getsize(tar_path), verified=verified) as record:
+        extract_tar(tar_path, build_dir, verified)
+        record["bytes"] = directory_size(os.path.join(build_dir, "blender"))
+
+
+def build_container(url: str, version: tuple, stage: str, build_dir: str, registry: str, reference: str = "", sha256: str = None) -> bool:
     """Build Single version Blender container and push it into the registry."""
     if type(version) != tuple:
         print(f"Invalid version {version}")
         return False
 
     print(f"=== Building {version} ===")
-    os.makedirs(build_dir, exist_ok=True)
+    if not prepare_blender(url, build_dir, sha256=sha256):
+        return False
 
-    tar_path = os.path.join(build_dir, "blender.tar.xz")
-    attempts = 2
-    for attempt in range(attempts):
-        download_file(url, tar_path, force=attempt > 0)
-        try:
-            extract_tar(tar_path, build_dir)
-            break
-        except RuntimeError as exc:
-            if attempt == attempts - 1:
-                print(f"-> FAILED extraction after retry: {exc}")
-                return False
-            print("-> Retrying download due to extraction failure")
-            continue
+    return build_profiles(version, stage, reference, build_dir, registry)
 
-    containerfile = generate_single_containerfile(version, stage)
-    cfpath = os.path.join(build_dir, "Containerfile")
+
+def build_profiles(version: tuple, stage: str, reference: str, build_dir: str, registry: str, build_slot=None, push_slot=None) -> bool:
+    """Build and push the image of every profile in BASE_PROFILES from build_dir/blender, then the slim variant (SLIM_BUILD).
+
+    A profile that fails to build or push, or a registry that fails, does not hold back the other profiles and
+    registries; failed pushes are remembered per registry in PUSH_FAILURES. Local images are always removed at
+    the end, also when something raises. Returns True when every image was built and reached every registry.
+    build_slot and push_slot optionally limit how many builds and pushes run at once across releases.
+    """
+    built = []
+    ok = True
+    try:
+        for profile in BASE_PROFILES:
+            base_tag, stage_tag = single_image_tags(version, stage, registry, profile)
+            label = f"{version[0]}.{version[1]}"
+            if NATIVE_ASSEMBLY:
+                with build_slot or contextlib.nullcontext(), METRICS.stage("assemble", version=label, profile=profile) as record:
+                    print(f"-> {label}: assembling {profile} image")
+                    assembled = assemble_single_image(version, stage, reference, build_dir, [base_tag, stage_tag], profile)
+                    record["ok"] = assembled is not None
+                if assembled is None:
+                    ok = False
+                    continue
+                built.append((profile, base_tag, stage_tag))
+                with push_slot or contextlib.nullcontext():
+                    pushed = push_native_image(assembled)
+                ok = ok and pushed
+                if pushed and PUSH_COMPRESSION and PUSH_COMPRESSION != OCI_COMPRESSION:
+                    push_native_compressed_variant(version, stage, reference, build_dir, base_tag, profile, build_slot, push_slot)
+                continue
+            with build_slot or contextlib.nullcontext(), METRICS.stage("build", version=label, profile=profile) as record:
+                print(f"-> {label}: building {profile} image")
+                record["ok"] = build_single_image(version, stage, reference, build_dir, base_tag, stage_tag, profile)
+                record["image_size"] = image_size(base_tag) if record["ok"] else None
+            if not record["ok"]:
+                print(f"❌ {label} {profile} image build FAILED")
+                ok = False
+                continue
+            built.append((profile, base_tag, stage_tag))
+            with push_slot or contextlib.nullcontext():
+                pushed = push_single_image(base_tag, stage_tag)
+            ok = ok and pushed
+        if len(built) > 1 and not NATIVE_ASSEMBLY:
+            report_profiles(built)
+        if SLIM_BUILD and built:
+            with build_slot or contextlib.nullcontext():
+                build_slim_variant(version, stage, reference, build_dir, built[0][1], built[0][0])
+    finally:
+        for _, base_tag, stage_tag in built:
+            remove_single_images(base_tag, stage_tag)
+    return ok
+
+
+def oci_base_image(profile: str) -> str:
+    """Base image natively assembled images of profile start from: OCI_BASE_IMAGE_<PROFILE>, for the desktop
+    profile falling back to OCI_BASE_IMAGE. Empty when not configured."""
+    return os.environ.get(f"OCI_BASE_IMAGE_{profile.upper()}") or (OCI_BASE_IMAGE if profile == "desktop" else "")
+
+
+def assemble_single_image(version: tuple, stage: str, reference: str, build_dir: str, tags: list, profile: str = "desktop",
+                          compression: str = None, layout_name: str = "oci"):
+    """Write build_dir/<layout_name>, an OCI layout of the base image of profile (oci_base_image) plus build_dir/blender
+    at WORKDIR/blender, the same image SINGLE_CONTAINERFILE describes, with its layer compressed by compression
+    (default OCI_COMPRESSION). Returns (layout_dir, manifest_bytes, base, tags) or None on failure.
+    """
+    compression = compression or OCI_COMPRESSION
+    base_image = oci_base_image(profile)
+    try:
+        base = oci.load_base_image(base_image, os.path.join(OCI_CACHE_DIR, "base"))
+    except (requests.RequestException, RuntimeError, ValueError, KeyError) as exc:
+        print(f"-> FAILED to resolve base image {base_image}: {exc}")
+        return None
+    workdir = base["config"].get("config", {}).get("WorkingDir") or "/"
+    labels = {
+        "blender_version": f"{version[0]}.{version[1]}.{version[2]}",
+        "blender_stage": stage,
+        "blender_reference": reference,
+        "blender_base": native_base_key(base["digest"]),
+    }
+    entrypoint = None
+    if profile == "minimal":
+        entrypoint = [f"{workdir.rstrip('/')}/blender/blender"]
+    layout_dir = os.path.join(build_dir, layout_name)
+    try:
+        manifest = oci.build_layout(
+            layout_dir,
+            os.path.join(build_dir, "blender"),
+            f"{workdir.rstrip('/')}/blender",
+            base,
+            labels,
+            [tag.rsplit(":", 1)[1] for tag in tags],
+            compression,
+            entrypoint,
+        )
+    except (OSError, RuntimeError) as exc:
+        print(f"-> FAILED to assemble {tags[0]}: {exc}")
+        return None
+    print(f"-> ASSEMBLED {tags[0]} on {base_image}@{base['digest']} ({compression})")
+    return layout_dir, manifest, base, tags
+
+
+def push_native_image(assembled: tuple) -> bool:
+    """Push an assembled layout under all its tags to every registry at once, like push_single_image."""
+    if SKIP_IMAGE_PUSH:
+        print(f"-> SKIPPING PUSH (SKIP_IMAGE_PUSH=1), layout in {assembled[0]} (kept with KEEP_BUILD_DIRS=1)")
+        return True
+    layout_dir, manifest, base, full_tags = assembled
+    tags = [tag.rsplit(":", 1)[1] for tag in full_tags]
+    reference = full_tags[0].split("/", 1)[1]
+
+    def push(registry: str) -> bool:
+        client = RegistryClient(registry, IMAGE_REPOSITORY, auth=load_credentials(registry))
+        with METRICS.stage("push", image=f"{registry}/{reference}", registry=registry, native=True) as record:
+            try:
+                record["bytes"] = oci.push_layout(client, layout_dir, manifest, tags, base)
+            except (requests.RequestException, OSError, KeyError) as exc:
+                print(f"-> push of {reference} to {registry} failed: {exc}")
+                record["ok"] = False
+        return record["ok"]
+
+    print("-> PUSHING SINGLE IMAGE")
+    with ThreadPoolExecutor(max_workers=len(REGISTRIES)) as executor:
+        results = list(executor.map(push, REGISTRIES))
+    failed = [registry for registry, ok in zip(REGISTRIES, results) if not ok]
+    for registry in failed:
+        print(f"-> FAILED to push {reference} to {registry}")
+        PUSH_FAILURES.setdefault(registry, []).append(reference)
+    if not failed:
+        print("-> PUSH DONE")
+    return not failed
+
+
+def push_native_compressed_variant(version: tuple, stage: str, reference: str, build_dir: str, base_tag: str, profile: str,
+                                   build_slot=None, push_slot=None):
+    """Best-effort: assemble and push base_tag once more with PUSH_COMPRESSION layers, as base_tag-<format>."""
+    if PUSH_COMPRESSION not in oci.LAYER_MEDIA_TYPES:
+        print(f"-> WARNING: native assembly cannot write {PUSH_COMPRESSION} layers, skipping that variant")
+        return
+    variant_tag = base_tag + COMPRESSION_TAG_SUFFIXES[PUSH_COMPRESSION]
+    with build_slot or contextlib.nullcontext(), METRICS.stage("assemble", image=variant_tag, compression=PUSH_COMPRESSION) as record:
+        assembled = assemble_single_image(
+            version, stage, reference, build_dir, [variant_tag], profile, PUSH_COMPRESSION, f"oci-{PUSH_COMPRESSION}"
+        )
+        record["ok"] = assembled is not None
+    if assembled is None:
+        return
+    with push_slot or contextlib.nullcontext():
+        if not push_native_image(assembled):
+            print(f"-> WARNING: failed to push {variant_tag} (non-fatal)")
+
+
+def measure_startup(tag: str, blender: str = "/home/headless/blender/blender"):
+    """Seconds from `run` to exit of `blender -b --factory-startup --python-expr pass` in a fresh container, None on failure."""
+    cmd = runtime_cmd('run', '--rm', '--entrypoint', blender, tag, '-b', '--factory-startup', '--python-expr', 'pass')
+    start = time.perf_counter()
+    p = run_command(cmd, echo=False)
+    if p.returncode != 0:
+        print(f"-> could not measure startup of {tag}: {p.output}")
+        return None
+    return time.perf_counter() - start
+
+
+def report_profiles(built: list):
+    """Print image size and Blender startup time of the same release built on each base profile."""
+    print("====== base profile report ======")
+    for profile, base_tag, _ in built:
+        size = image_size(base_tag)
+        startup = measure_startup(base_tag)
+        size_text = f"{size / 1024 ** 2:.1f} MiB" if size is not None else "unknown"
+        startup_text = f"{startup:.2f} s" if startup is not None else "unknown"
+        print(f"  {profile:<8} {base_tag}: size {size_text} | blender -b startup {startup_text}")
+
+
+# Paths never needed by headless batch rendering and asset processing, as globs relative to the extracted
+# blender directory matched by prune_pattern_matches. Matching directories are removed as a whole.
+SLIM_PRUNE_MANIFEST = (
+    # desktop integration
+    "blender.desktop",
+    "blender.svg",
+    "blender-symbolic.svg",
+    "blender-thumbnailer",
+    # UI translations; datafiles/locale/languages itself is kept
+    "*/datafiles/locale/*/LC_MESSAGES",
+    # debug symbols
+    "*.debug",
+    # parts of the bundled Python which nothing headless imports
+    "*/python/lib/python3.*/test",
+    "*/python/lib/python3.*/idlelib",
+    "*/python/lib/python3.*/tkinter",
+    "*/python/lib/python3.*/turtledemo",
+)
+
+
+SLIM_LABEL = "LABEL blender_profile=slim\n"
+
+
+def load_slim_manifest() -> list:
+    """Return the prune globs: the lines of SLIM_MANIFEST_FILE (blank lines and # comments skipped) if set, else SLIM_PRUNE_MANIFEST."""
+    if not SLIM_MANIFEST_FILE:
+        return list(SLIM_PRUNE_MANIFEST)
+    with open(SLIM_MANIFEST_FILE) as file:
+        lines = (line.strip() for line in file)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def prune_pattern_matches(relpath: str, pattern: str) -> bool:
+    """Match a /-separated path relative to the tree root against a prune glob. Like .gitignore, a glob
+    without / matches the name at any depth; otherwise it matches the whole path component by component,
+    so * never reaches across a /.
+    """
+    parts = relpath.split("/")
+    if "/" not in pattern:
+        return fnmatch.fnmatchcase(parts[-1], pattern)
+    pattern_parts = pattern.strip("/").split("/")
+    return len(parts) == len(pattern_parts) and all(map(fnmatch.fnmatchcase, parts, pattern_parts))
+
+
+def prune_tree(root: str, patterns: list) -> int:
+    """Delete every file or directory below root whose relative path matches one of patterns, return bytes freed.
+    Symlinks are removed themselves, never what they point to.
+    """
+    freed = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in list(dirnames):
+            path = os.path.join(dirpath, name)
+            relpath = os.path.relpath(path, root).replace(os.sep, "/")
+            if not any(prune_pattern_matches(relpath, pattern) for pattern in patterns):
+                continue
+            if os.path.islink(path):
+                freed += os.lstat(path).st_size
+                os.unlink(path)
+            else:
+                freed += directory_size(path)
+                shutil.rmtree(path)
+            dirnames.remove(name)
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            relpath = os.path.relpath(path, root).replace(os.sep, "/")
+            if any(prune_pattern_matches(relpath, pattern) for pattern in patterns):
+                freed += os.lstat(path).st_size
+                os.remove(path)
+    return freed
+
+
+def image_size(tag: str):
+    """Size of a local image in bytes as reported by the runtime, None if it cannot be inspected."""
+    p = run_command(runtime_cmd('image', 'inspect', '--format', '{{.Size}}', tag), echo=False)
+    try:
+        return int(p.output.strip())
+    except ValueError:
+        return None
+
+
+def build_slim_variant(version: tuple, stage: str, reference: str, build_dir: str, base_tag: str, profile: str = "desktop") -> bool:
+    """Prune build_dir/blender with the slim manifest, build and push it as base_tag-slim and print a size report.
+
+    Runs after the full image is built and pushed, since it modifies the extracted tree in place.
+    Like the stage tag, the slim variant is best-effort and never fails the release.
+    """
+    slim_tag = f"{base_tag}-slim"
+    blender_dir = os.path.join(build_dir, "blender")
+    print(f"=== Building slim variant {slim_tag} ===")
+    full_tree = directory_size(blender_dir)
+    pruned = prune_tree(blender_dir, load_slim_manifest())
+
+    cfpath = os.path.join(build_dir, "Containerfile.slim")
     with open(cfpath, "w") as file:
-        file.write(containerfile)
+        file.write(generate_single_containerfile(version, stage, reference, profile) + SLIM_LABEL)
+    limit_build_context(build_dir, ["blender"])
+    pb = run_command(runtime_cmd('build', '-f', cfpath, '-t', slim_tag, '.'), cwd=build_dir)
+    if pb.returncode != 0:
+        print(f"-> WARNING: failed to build slim variant {slim_tag} (non-fatal)")
+        return False
 
-    print(os.listdir(build_dir))
-    base_tag = f'{registry}/blenderkit/headless-blender:blender-{version[0]}.{version[1]}'
+    full_image = image_size(base_tag)
+    slim_image = image_size(slim_tag)
+    print(f"====== slim size report {version[0]}.{version[1]} ======")
+    print(f"  blender tree: full {full_tree / 1024 ** 2:.1f} MiB | slim {(full_tree - pruned) / 1024 ** 2:.1f} MiB | pruned {pruned / 1024 ** 2:.1f} MiB")
+    if full_image is not None and slim_image is not None:
+        print(f"  image:        full {full_image / 1024 ** 2:.1f} MiB | slim {slim_image / 1024 ** 2:.1f} MiB | saved {(full_image - slim_image) / 1024 ** 2:.1f} MiB")
+
+    ok = True
+    if SKIP_IMAGE_PUSH:
+        print("-> SKIPPING SLIM PUSH (SKIP_IMAGE_PUSH=1)")
+    else:
+        print(f"-> PUSHING SLIM IMAGE {slim_tag}")
+        ok = not push_to_registries(slim_tag)
+        if not ok:
+            print(f"-> WARNING: failed to push slim variant {slim_tag} (non-fatal)")
+        else:
+            print("-> SLIM PUSH DONE")
+
+    if KEEP_IMAGES:
+        print(f"-> KEEPING image {slim_tag} (KEEP_IMAGES=1)")
+    else:
+        remove_image(slim_tag)
+    return ok
+
+
+def single_image_tags(version: tuple, stage: str, registry: str, profile: str = "desktop") -> tuple:
+    """Return (base_tag, stage_tag) of a single version image built on the given base profile."""
+    suffix = BASE_PROFILE_TEMPLATES[profile]["tag_suffix"]
+    base_tag = f'{registry}/{IMAGE_REPOSITORY}:blender-{version[0]}.{version[1]}'
     # Extra, stage-qualified tag (e.g. blender-5.2-stable / -alpha / -rc) pointing
     # at the same image. Purely additive: the base tag above is unchanged, so
     # existing consumers that pull blender-X.Y keep working exactly as before.
     stage_tag = f'{base_tag}-{stage_tag_suffix(stage)}'
+    return base_tag + suffix, stage_tag + suffix
+
+
+def build_single_image(version: tuple, stage: str, reference: str, build_dir: str, base_tag: str, stage_tag: str, profile: str = "desktop") -> bool:
+    """Write the Containerfile into build_dir and build the image from build_dir/blender."""
+    containerfile = generate_single_containerfile(version, stage, reference, profile)
+    cfpath = os.path.join(build_dir, "Containerfile")
+    with open(cfpath, "w") as file:
+        file.write(containerfile)
+
+    print(os.listdir(build_dir))
+    limit_build_context(build_dir, ["blender"])
     cmd = runtime_cmd(
         'build',
         '-f', cfpath,
@@ -324,66 +2109,109 @@ def build_container(url: str, version: tuple, stage: str, build_dir: str, regist
         '-t', stage_tag,
         '.'
     )
-    print(f"- running command {' '.join(cmd)}")
-    pb = subprocess.run(cmd, cwd=build_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE,)
-
-    print( 'exit status:', pb.returncode )
-    print( 'stdout:', pb.stdout.decode() )
-    print( 'stderr:', pb.stderr.decode() )
+    pb = run_command(cmd, cwd=build_dir)
     if pb.returncode!= 0:
         return False
     print("-> SINGLE BUILD DONE")
+    return True
+
 
+def push_single_image(base_tag: str, stage_tag: str) -> bool:
+    """Push the base tag (failure is fatal) and then the stage tag (best-effort) to every registry.
+    Returns False when the base tag did not reach all registries.
+    """
     if SKIP_IMAGE_PUSH:
         print("-> SKIPPING PUSH (SKIP_IMAGE_PUSH=1)")
+        return True
+
+    print("-> PUSHING SINGLE IMAGE")
+    # a registry that fails does not hold back the others, they still get the stage tag below
+    failed = push_to_registries(base_tag)
+    pushed = [registry for registry in REGISTRIES if registry not in failed]
+    if not pushed:
+        return False
+    print("-> PUSH DONE")
+
+    # Best-effort: a failure to push the extra stage tag must never fail a
+    # build that already pushed the base tag successfully.
+    print(f"-> PUSHING STAGE-TAGGED IMAGE {stage_tag}")
+    if push_to_registries(stage_tag, registries=pushed):
+        print(f"-> WARNING: failed to push stage tag {stage_tag} (non-fatal)")
     else:
-        print("-> PUSHING SINGLE IMAGE")
-        push_cmd = runtime_cmd('push', base_tag)
-        pp = subprocess.run(
-            push_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-        print( 'exit status:', pp.returncode )
-        print( 'stdout:', pp.stdout.decode() )
-        print( 'stderr:', pp.stderr.decode() )
-        if pp.returncode!= 0:
+        print("-> STAGE PUSH DONE")
+    push_compressed_variant(base_tag)
+    return not failed
+
+
+# registry -> image references whose push to it failed during this run
+PUSH_FAILURES = {}
+
+
+def push_to_registries(tag: str, stage: str = "push", registries: list = None, compression: str = None) -> list:
+    """Push tag, named after the first registry in REGISTRIES, to all registries (or the given ones) at once.
+
+    For the other registries the image is tagged under their name first and untagged after the push.
+    With compression (a PUSH_COMPRESSION format) the layers are recompressed while pushing and the tag
+    gets the format's suffix. Each push is its own metrics stage. Returns the registries the push failed
+    for, which are also remembered in PUSH_FAILURES for the report at the end of the run.
+    """
+    reference = tag.split("/", 1)[1] + (COMPRESSION_TAG_SUFFIXES[compression] if compression else "")
+    size = image_size(tag)
+    flags = ['--compression-format', compression, '--force-compression'] if compression else []
+
+    def push(registry: str) -> bool:
+        target = f"{registry}/{reference}"
+        if target != tag and run_command(runtime_cmd('image', 'tag', tag, target)).returncode != 0:
             return False
-        print("-> PUSH DONE")
+        with METRICS.stage(stage, image=target, registry=registry, image_size=size, compression=compression or "gzip") as record:
+            record["ok"] = run_command(runtime_cmd('push', *flags, target)).returncode == 0
+        if target != tag:
+            remove_image(target)
+        return record["ok"]
+
+    registries = registries or REGISTRIES
+    with ThreadPoolExecutor(max_workers=len(registries)) as executor:
+        results = list(executor.map(push, registries))
+    failed = [registry for registry, ok in zip(registries, results) if not ok]
+    for registry in failed:
+        print(f"-> FAILED to push {reference} to {registry}")
+        PUSH_FAILURES.setdefault(registry, []).append(reference)
+    return failed
+
+
+def push_compressed_variant(tag: str, stage: str = "push"):
+    """Best-effort push of tag with PUSH_COMPRESSION layers as tag-<format>, next to the gzip tag."""
+    if not PUSH_COMPRESSION or SKIP_IMAGE_PUSH:
+        return
+    if not os.path.basename(CONTAINER_RUNTIME).startswith("podman"):
+        # docker push sends the layers as they are stored, recompressing needs a BuildKit export
+        print(f"-> WARNING: {CONTAINER_RUNTIME} push cannot recompress layers, skipping the {PUSH_COMPRESSION} variant of {tag}")
+        return
+    print(f"-> PUSHING {PUSH_COMPRESSION} VARIANT OF {tag}")
+    if push_to_registries(tag, stage, compression=PUSH_COMPRESSION):
+        print(f"-> WARNING: failed to push the {PUSH_COMPRESSION} variant of {tag} (non-fatal)")
+    else:
+        print(f"-> {PUSH_COMPRESSION.upper()} PUSH DONE")
 
-        # Best-effort: a failure to push the extra stage tag must never fail a
-        # build that already pushed the base tag successfully.
-        print(f"-> PUSHING STAGE-TAGGED IMAGE {stage_tag}")
-        ps = subprocess.run(
-            runtime_cmd('push', stage_tag),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-        print( 'exit status:', ps.returncode )
-        print( 'stdout:', ps.stdout.decode() )
-        print( 'stderr:', ps.stderr.decode() )
-        if ps.returncode!= 0:
-            print(f"-> WARNING: failed to push stage tag {stage_tag} (non-fatal)")
-        else:
-            print("-> STAGE PUSH DONE")
 
+def remove_single_images(base_tag: str, stage_tag: str):
+    if NATIVE_ASSEMBLY:
+        return  # assembled images only exist in the registries and build_dir/oci
     if KEEP_IMAGES:
         print(f"-> KEEPING images {base_tag} and {stage_tag} (KEEP_IMAGES=1)")
     else:
         remove_image(base_tag)
         remove_image(stage_tag)
 
-    return True
-
 
 def multi_image_tag(version: tuple) -> str:
     return f"blender_{version[0]}_{version[1]}"
 
 
-def multi_start(url: str, version: tuple, build_dir: str) -> bool:
+def multi_start(url: str, version: tuple, build_dir: str, sha256: str = None) -> bool:
     """Build the base layer of the multi-version image from the oldest stable release."""
     print(f"=== Building base multi {version[0]}.{version[1]} ===")
-    if not prepare_blender(url, build_dir):
+    if not prepare_blender(url, build_dir, sha256=sha256):
         return False
 
     containerfile = generate_multi_base_containerfile(version)
@@ -393,21 +2221,21 @@ def multi_start(url: str, version: tuple, build_dir: str) -> bool:
 
     print(os.listdir(build_dir))
     cmd = runtime_cmd('build', '-f', cfpath, '-t', f'{multi_image_tag(version)}:latest', '.')
-    print(f"- running command {' '.join(cmd)}")
-    pb = subprocess.run(cmd, cwd=build_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    print('exit status:', pb.returncode)
-    print('stdout:', pb.stdout.decode())
-    print('stderr:', pb.stderr.decode())
+    with METRICS.stage("multi_build", version=f"{version[0]}.{version[1]}") as record:
+        limit_build_context(build_dir, ["blender"])
+        pb = run_command(cmd, cwd=build_dir)
+        record["ok"] = pb.returncode == 0
+        record["image_size"] = image_size(multi_image_tag(version)) if record["ok"] else None
     if pb.returncode != 0:
         return False
     print("-> MULTI BASE BUILD DONE")
     return True
 
 
-def multi_add(url: str, version: tuple, prev_version: tuple, build_dir: str) -> bool:
+def multi_add(url: str, version: tuple, prev_version: tuple, build_dir: str, sha256: str = None) -> bool:
     """ADD one more stable Blender on top of the existing multi-version image."""
     print(f"=== Adding Blender {version[0]}.{version[1]} on top of {prev_version[0]}.{prev_version[1]} ===")
-    if not prepare_blender(url, build_dir):
+    if not prepare_blender(url, build_dir, sha256=sha256):
         return False
 
     containerfile = generate_multi_add_containerfile(version, prev_version)
@@ -417,27 +2245,73 @@ def multi_add(url: str, version: tuple, prev_version: tuple, build_dir: str) ->
 
     print(os.listdir(build_dir))
     cmd = runtime_cmd('build', '-f', cfpath, '-t', f'{multi_image_tag(version)}:latest', '.')
-    print(f"- running command {' '.join(cmd)}")
-    pb = subprocess.run(cmd, cwd=build_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    print('exit status:', pb.returncode)
-    print('stdout:', pb.stdout.decode())
-    print('stderr:', pb.stderr.decode())
+    with METRICS.stage("multi_build", version=f"{version[0]}.{version[1]}") as record:
+        limit_build_context(build_dir, ["blender"])
+        pb = run_command(cmd, cwd=build_dir)
+        record["ok"] = pb.returncode == 0
+        record["image_size"] = image_size(multi_image_tag(version)) if record["ok"] else None
     if pb.returncode != 0:
         return False
     print("-> MULTI ADD DONE")
     return True
 
 
+def multi_build_staged(versions: list, multi_dir: str, shared_layer: bool = False) -> bool:
+    """Build the whole multi-version image from multi_dir/X.Y/blender trees (or multi_dir/blenders/X.Y with
+    shared_layer), tagged as the newest version's multi tag.
+    """
+    print(f"=== Building staged multi with {len(versions)} versions ===")
+    containerfile = generate_multi_staged_containerfile(versions, shared_layer)
+    cfpath = os.path.join(multi_dir, "Containerfile")
+    with open(cfpath, "w") as file:
+        file.write(containerfile)
+
+    cmd = runtime_cmd('build', '-f', cfpath, '-t', f'{multi_image_tag(versions[-1])}:latest')
+    if os.path.basename(CONTAINER_RUNTIME).startswith("podman"):
+        # buildah builds independent stages concurrently only when asked to; BuildKit does it by default
+        cmd += ['--jobs', str(len(versions))]
+    cmd.append('.')
+    with METRICS.stage("multi_build", version=f"{versions[-1][0]}.{versions[-1][1]}", staged=len(versions)) as record:
+        limit_build_context(multi_dir, ["blenders"] if shared_layer else [f"{x}.{y}/blender" for x, y, _ in versions])
+        pb = run_command(cmd, cwd=multi_dir)
+        record["ok"] = pb.returncode == 0
+        record["image_size"] = image_size(multi_image_tag(versions[-1])) if record["ok"] else None
+    if pb.returncode != 0:
+        return False
+    print("-> MULTI STAGED BUILD DONE")
+    return True
+
+
+def multi_pull_cache(version: tuple, registry: str) -> bool:
+    """Pull the published chain image ending with version and tag it as the local chain image blender_X_Y."""
+    cache_tag = multi_cache_tag(version, registry)
+    for cmd in (runtime_cmd('pull', cache_tag), runtime_cmd('image', 'tag', cache_tag, multi_image_tag(version))):
+        p = run_command(cmd)
+        if p.returncode != 0:
+            return False
+    remove_image(cache_tag)
+    return True
+
+
+def multi_push_cache(version: tuple, registry: str):
+    """Best-effort push of the chain image ending with version as its multi-cache tag."""
+    if SKIP_IMAGE_PUSH:
+        return
+    cache_tag = multi_cache_tag(version, registry)
+    for cmd in (runtime_cmd('image', 'tag', multi_image_tag(version), cache_tag), runtime_cmd('push', cache_tag)):
+        p = run_command(cmd)
+        if p.returncode != 0:
+            print(f"-> WARNING: failed to publish cache tag {cache_tag} (non-fatal)")
+            break
+    remove_image(cache_tag)
+
+
 def multi_push(version: tuple, registry: str) -> bool:
     """Tag the final accumulated multi-version image and push it as headless-blender:multi-version."""
-    multi_tag = f"{registry}/blenderkit/headless-blender:multi-version"
+    multi_tag = f"{registry}/{IMAGE_REPOSITORY}:multi-version{multi_tag_suffix()}"
     print(f"=== Tagging multi {version[0]}.{version[1]} as {multi_tag} ===")
     tag_cmd = runtime_cmd("image", "tag", multi_image_tag(version), multi_tag)
-    print(f"- running command {' '.join(tag_cmd)}")
-    pt = subprocess.run(tag_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    print('exit status:', pt.returncode)
-    print('stdout:', pt.stdout.decode())
-    print('stderr:', pt.stderr.decode())
+    pt = run_command(tag_cmd)
     if pt.returncode != 0:
         return False
 
@@ -446,25 +2320,20 @@ def multi_push(version: tuple, registry: str) -> bool:
         return True
 
     print("-> PUSHING MULTI-VERSION IMAGE")
-    push_cmd = runtime_cmd('push', multi_tag)
-    print(f"- running command {' '.join(push_cmd)}")
-    pp = subprocess.run(push_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    print('exit status:', pp.returncode)
-    print('stdout:', pp.stdout.decode())
-    print('stderr:', pp.stderr.decode())
-    if pp.returncode != 0:
+    if push_to_registries(multi_tag, "multi_push"):
         return False
+    push_compressed_variant(multi_tag, "multi_push")
     print("-> MULTI-VERSION PUSH DONE")
     return True
 
 
 def remove_image(name):
-    cmd = runtime_cmd('rmi', name)
-    print(f"- running command {' '.join(cmd)}")
-    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    print( 'exit status:', p.returncode )
-    print( 'stdout:', p.stdout.decode() )
-    print( 'stderr:', p.stderr.decode() )
+    if name in BASE_IMAGES.values():
+        print(f"-> KEEPING shared base image {name}")
+        return
+    with METRICS.stage("rmi", image=name) as record:
+        p = run_command(runtime_cmd('rmi', name))
+        record["ok"] = p.returncode == 0
     if p.returncode!= 0:
         print(f"-> FAILED to remove {name}")
     else:
@@ -477,12 +2346,8 @@ def prune_podman_storage(reason: str):
         return
 
     print(f"-> Pruning podman storage ({reason})")
-    # Use prune without -a so tagged multi images stay available for the next layer
-    cmd = runtime_cmd('system', 'prune', '--volumes', '--force')
-    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    print('exit status:', p.returncode)
-    print('stdout:', p.stdout.decode())
-    print('stderr:', p.stderr.decode())
+    # Use prune without -a so tagged multi images and the shared blender-base images stay available
+    p = run_command(runtime_cmd('system', 'prune', '--volumes', '--force'))
     if p.returncode != 0:
         print("-> Podman prune failed")
 
@@ -516,16 +2381,65 @@ def ensure_disk_headroom(min_free_gb: float, strict: bool = False):
 
 
 if __name__ == '__main__':
-    registry = os.environ.get("DOCKER_REGISTRY", "docker.io")
+    registry = REGISTRIES[0]
     print("====== build.py configuration ======")
     print(f"  CONTAINER_RUNTIME = {CONTAINER_RUNTIME}")
-    print(f"  DOCKER_REGISTRY   = {registry}")
+    print(f"  DOCKER_REGISTRY   = {', '.join(REGISTRIES)}  (built as {registry})")
     print(f"  BUILD_MULTI       = {os.environ.get('BUILD_MULTI') == '1'}")
+    print(f"  MULTI_STAGED      = {MULTI_STAGED}")
+    print(f"  MULTI_INCREMENTAL = {MULTI_INCREMENTAL}")
+    print(f"  MULTI_DEDUP       = {MULTI_DEDUP or 'off'}")
+    print(f"  MULTI_SPLIT       = {MULTI_SPLIT}")
     print(f"  SKIP_IMAGE_PUSH   = {SKIP_IMAGE_PUSH}")
+    print(f"  INCREMENTAL_BUILD = {INCREMENTAL_BUILD}")
+    print(f"  RELEASE_MANIFEST  = {RELEASE_MANIFEST or 'off (release pages)'}")
+    print(f"  PARALLEL_BUILDS   = {PARALLEL_BUILDS}")
+    print(f"  SLIM_BUILD        = {SLIM_BUILD}")
+    print(f"  PREWARM           = {PREWARM}  (PREWARM_BLENDER = {PREWARM_BLENDER})")
+    print(f"  BASE_PROFILES     = {', '.join(BASE_PROFILES)}")
+    print(f"  SHARED_BASE       = {SHARED_BASE and not NATIVE_ASSEMBLY}")
     print(f"  KEEP_IMAGES       = {KEEP_IMAGES}  (images are {'KEPT' if KEEP_IMAGES else 'REMOVED'} after building)")
     print(f"  KEEP_BUILD_DIRS   = {KEEP_BUILD_DIRS}  (build/X.Y dirs are {'KEPT' if KEEP_BUILD_DIRS else 'REMOVED'} after building)")
+    print(f"  METRICS_FILE      = {METRICS_FILE or 'off'}  (run {METRICS.run_id})")
+    print(f"  PUSH_COMPRESSION  = {PUSH_COMPRESSION or 'gzip only'}")
+    bases = ", ".join(f"{profile} on {oci_base_image(profile) or 'NOT SET'}" for profile in BASE_PROFILES)
+    print(f"  NATIVE_ASSEMBLY   = {NATIVE_ASSEMBLY}" + (f"  ({bases}, {OCI_COMPRESSION} layers)" if NATIVE_ASSEMBLY else ""))
+    print(f"  RUNTIME_TIMEOUT   = {f'{RUNTIME_TIMEOUT:.0f} s' if RUNTIME_TIMEOUT > 0 else 'off'}")
     print("====================================")
-    if os.environ.get("BUILD_MULTI") == "1":
-        build_multi_version(registry)
-    else:
-        build_containers(registry)
+    if NATIVE_ASSEMBLY:
+        if OCI_COMPRESSION not in oci.LAYER_MEDIA_TYPES:
+            print(f"-> ERROR: NATIVE_ASSEMBLY needs OCI_COMPRESSION {' or '.join(oci.LAYER_MEDIA_TYPES)}")
+            raise SystemExit(1)
+        # assembling every profile on one base would publish e.g. a desktop image as blender-X.Y-minimal
+        missing = [f"OCI_BASE_IMAGE_{profile.upper()}" if profile != "desktop" else "OCI_BASE_IMAGE"
+                   for profile in BASE_PROFILES if not oci_base_image(profile)]
+        if missing:
+            print(f"-> ERROR: NATIVE_ASSEMBLY needs a base image for every profile, set {', '.join(missing)}")
+            raise SystemExit(1)
+    if PUSH_COMPRESSION and PUSH_COMPRESSION not in COMPRESSION_TAG_SUFFIXES:
+        print(f"-> ERROR: unknown PUSH_COMPRESSION {PUSH_COMPRESSION}, choose from {', '.join(COMPRESSION_TAG_SUFFIXES)}")
+        raise SystemExit(1)
+    unknown = [profile for profile in BASE_PROFILES if profile not in BASE_PROFILE_TEMPLATES]
+    if unknown or not BASE_PROFILES:
+        print(f"-> ERROR: unknown BASE_PROFILES {unknown}, choose from {', '.join(BASE_PROFILE_TEMPLATES)}")
+        raise SystemExit(1)
+    signal.signal(signal.SIGINT, handle_interrupt)
+    signal.signal(signal.SIGTERM, handle_interrupt)
+    try:
+        if os.environ.get("BUILD_MULTI") == "1":
+            build_multi_version(registry)
+        else:
+            build_containers(registry)
+        if not KEEP_IMAGES:
+            remove_unpinned_base_images()
+    except KeyboardInterrupt:
+        cancel_commands()
+        raise
+    finally:
+        print("\n====== stage metrics ======")
+        print(METRICS.summary())
+        if len(REGISTRIES) > 1:
+            print("\n====== pushes per registry ======")
+            for name in REGISTRIES:
+                failures = PUSH_FAILURES.get(name, [])
+                print(f"  {'❌' if failures else '✅'} {name}: {len(failures)} failed push(es) {', '.join(failures)}")
@@ -0,0 +1,83 @@
+"""Deduplicate byte-identical files across extracted Blender trees."""
+
+import os
+import stat
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_files(trees: list) -> dict:
+    """Group the regular files of all trees by (size, mode); only files within a group can be identical.
+    trees is a list of (local_root, image_root) pairs, oldest first. Returns {(size, mode): [(tree_index, relpath)]}.
+    """
+    groups = {}
+    for index, (root, _) in enumerate(trees):
+        for dirpath, _, files in os.walk(root):
+            for name in files:
+                path = os.path.join(dirpath, name)
+                st = os.lstat(path)
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                groups.setdefault((st.st_size, st.st_mode), []).append((index, os.path.relpath(path, root)))
+    return groups
+
+
+def replace_with_link(canonical: str, duplicate: str, mode: str, image_canonical: str, image_duplicate: str):
+    tmp_path = duplicate + ".dedup.tmp"
+    if mode == "hardlink":
+        os.link(canonical, tmp_path)
+    else:
+        # relative to where both files end up in the image, so the link also resolves in any other mount point
+        os.symlink(os.path.relpath(image_canonical, os.path.dirname(image_duplicate)), tmp_path)
+    os.replace(tmp_path, duplicate)
+
+
+def dedupe_trees(trees: list, mode: str = "hardlink", min_size: int = 1024, workers: int = 8) -> tuple:
+    """Replace files that are byte-identical (and have the same mode) to a file of an earlier tree with links to it.
+
+    mode "hardlink" needs all trees to end up in the same image layer, "symlink" works across layers as long
+    as older trees are in lower layers: links are relative between the image paths (image_root of each tree).
+    Returns (files_replaced, bytes_saved).
+    """
+    if mode not in ("hardlink", "symlink"):
+        raise ValueError(f"Unknown dedup mode: {mode}")
+
+    candidates = [
+        entries for (size, _), entries in scan_files(trees).items()
+        if size >= min_size and len({index for index, _ in entries}) > 1
+    ]
+    paths = [os.path.join(trees[index][0], relpath) for entries in candidates for index, relpath in entries]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        digests = dict(zip(paths, executor.map(file_digest, paths)))
+
+    replaced = 0
+    saved = 0
+    for entries in candidates:
+        canonical = {}
+        for index, relpath in sorted(entries):
+            path = os.path.join(trees[index][0], relpath)
+            digest = digests[path]
+            if digest not in canonical:
+                canonical[digest] = (index, relpath)
+                continue
+            first_index, first_relpath = canonical[digest]
+            if first_index == index:
+                continue  # duplicates inside one Blender tree are left alone
+            replace_with_link(
+                os.path.join(trees[first_index][0], first_relpath),
+                path,
+                mode,
+                os.path.join(trees[first_index][1], first_relpath),
+                os.path.join(trees[index][1], relpath),
+            )
+            replaced += 1
+            saved += os.path.getsize(os.path.join(trees[first_index][0], first_relpath))
+    return replaced, saved
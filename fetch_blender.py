@@ -0,0 +1,180 @@
+"""Fetch one Blender of the multi-version image into /home/headless/blenders/X.Y without pulling the others.
+
+Usage: python fetch_blender.py X.Y [X.Y ...]
+       python fetch_blender.py list
+
+`BUILD_MULTI=1 MULTI_SPLIT=1 python build.py` publishes every version of the multi-version image on its own
+as multi-part-X.Y, an image consisting of one layer that holds /home/headless/blenders/X.Y, and the index
+multi-parts listing them. This resolves X.Y (or X.Y.Z) through that index, downloads only the version's layer
+into a local cache (verified against its digest) and unpacks it to BLENDERS_DIR/X.Y. A version that is already
+unpacked from the same layer is left alone, a cached layer is not downloaded again.
+
+Configured like build.py through environment variables:
+- FETCH_REGISTRY: registry to fetch from (default docker.io), credentials of `podman/docker login` are used
+- BLENDERS_DIR: where versions are unpacked (default /home/headless/blenders)
+- FETCH_CACHE_DIR: layer cache (default ~/.cache/headless-blender), FETCH_CACHE_DIR= disables it
+"""
+
+import os
+import sys
+import shutil
+import hashlib
+import tarfile
+import subprocess
+
+import requests
+
+from registry import RegistryClient, load_credentials
+
+
+IMAGE_REPOSITORY = "blenderkit/headless-blender"
+MULTI_PARTS_TAG = "multi-parts"
+PARTS_ROOT = "home/headless/blenders"
+FETCH_REGISTRY = os.environ.get("FETCH_REGISTRY", "docker.io")
+BLENDERS_DIR = os.environ.get("BLENDERS_DIR", "/home/headless/blenders")
+FETCH_CACHE_DIR = os.environ.get("FETCH_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "headless-blender"))
+# Written into BLENDERS_DIR/X.Y, holds the digest of the layer the version was unpacked from.
+MARKER_FILE = ".multi-part-digest"
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def load_parts(client: RegistryClient) -> dict:
+    """Return {"X.Y.Z": manifest descriptor} of every version listed in the multi-parts index."""
+    r = client.request("GET", f"manifests/{MULTI_PARTS_TAG}", headers={"Accept": "application/vnd.oci.image.index.v1+json"})
+    if r.status_code == 404:
+        raise RuntimeError(f"{MULTI_PARTS_TAG} is not published, was the multi-version image built with MULTI_SPLIT=1?")
+    r.raise_for_status()
+    return {
+        entry["annotations"]["org.opencontainers.image.version"]: entry
+        for entry in r.json().get("manifests", [])
+        if "org.opencontainers.image.version" in entry.get("annotations", {})
+    }
+
+
+def resolve_part(parts: dict, version: str) -> tuple:
+    """Match X.Y or X.Y.Z against the published versions. Returns (X.Y, X.Y.Z, descriptor)."""
+    for full_version, descriptor in parts.items():
+        if version in (full_version, full_version.rsplit(".", 1)[0]):
+            return full_version.rsplit(".", 1)[0], full_version, descriptor
+    raise RuntimeError(f"Blender {version} is not in {MULTI_PARTS_TAG}, available: {', '.join(parts)}")
+
+
+def cached_layer(client: RegistryClient, layer: dict) -> str:
+    """Return the path of the layer blob in FETCH_CACHE_DIR, downloading it first if it is not cached yet."""
+    algorithm, hex_digest = layer["digest"].split(":", 1)
+    path = os.path.join(FETCH_CACHE_DIR or os.path.join(BLENDERS_DIR, ".fetch"), "blobs", algorithm, hex_digest)
+    if os.path.exists(path):
+        print(f"-> using cached layer {layer['digest']}")
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    print(f"-> downloading layer {layer['digest']} ({layer['size'] / 1024 ** 2:.1f} MiB)")
+    sha256 = hashlib.sha256()
+    with client.open_blob(layer["digest"]) as response, open(path + ".part", "wb") as file:
+        for chunk in iter(lambda: response.raw.read(DOWNLOAD_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            file.write(chunk)
+    if f"{algorithm}:{sha256.hexdigest()}" != layer["digest"]:
+        os.remove(path + ".part")
+        raise RuntimeError(f"downloaded layer does not match its digest {layer['digest']}")
+    os.replace(path + ".part", path)
+    return path
+
+
+def strip_part_root(name: str, prefix: str):
+    """Path of a layer member relative to BLENDERS_DIR/X.Y, None for members outside of prefix."""
+    name = name[2:] if name.startswith("./") else name
+    if name != prefix and not name.startswith(prefix + "/"):
+        return None
+    relative = name[len(prefix) + 1:]
+    if relative.startswith("/") or ".." in relative.split("/"):
+        raise RuntimeError(f"unsafe path in layer: {name}")
+    return relative
+
+
+def unpack_layer(path: str, media_type: str, name: str, dst: str):
+    """Unpack the tree at /home/headless/blenders/<name> of the layer blob into dst."""
+    prefix = f"{PARTS_ROOT}/{name}"
+    proc = None
+    if media_type.endswith("+zstd"):
+        zstd = shutil.which("zstd")
+        if zstd is None:
+            raise RuntimeError("zstd layers need the zstd command line tool")
+        proc = subprocess.Popen([zstd, "-dc", path], stdout=subprocess.PIPE)
+        tar = tarfile.open(fileobj=proc.stdout, mode="r|")
+    else:
+        tar = tarfile.open(path, mode="r|gz")
+    try:
+        with tar:
+            for member in tar:
+                relative = strip_part_root(member.name, prefix)
+                if relative is None:
+                    continue
+                member.name = relative or "."
+                if member.islnk():
+                    member.linkname = strip_part_root(member.linkname, prefix)
+                    if member.linkname is None:
+                        raise RuntimeError(f"hardlink out of the version tree in layer: {relative}")
+                tar.extract(member, dst)
+    finally:
+        if proc is not None:
+            proc.stdout.close()
+            if proc.wait() != 0:
+                raise RuntimeError(f"zstd exited with {proc.returncode}")
+
+
+def fetch_blender(client: RegistryClient, parts: dict, version: str) -> str:
+    """Make BLENDERS_DIR/X.Y hold the published version, return that path."""
+    name, full_version, descriptor = resolve_part(parts, version)
+    dst = os.path.join(BLENDERS_DIR, name)
+    found = client.get_manifest(descriptor["digest"])
+    if found is None:
+        raise RuntimeError(f"manifest {descriptor['digest']} of Blender {full_version} is missing")
+    layer = found[0]["layers"][-1]
+
+    try:
+        with open(os.path.join(dst, MARKER_FILE), encoding="utf-8") as file:
+            if file.read().strip() == layer["digest"]:
+                print(f"✅ Blender {full_version} is up to date in {dst}")
+                return dst
+    except OSError:
+        pass
+
+    blob = cached_layer(client, layer)
+    tmp_dst = os.path.join(BLENDERS_DIR, f".{name}.tmp")
+    if os.path.isdir(tmp_dst):
+        shutil.rmtree(tmp_dst)
+    os.makedirs(tmp_dst)
+    print(f"-> unpacking Blender {full_version} into {dst}")
+    unpack_layer(blob, layer["mediaType"], name, tmp_dst)
+    with open(os.path.join(tmp_dst, MARKER_FILE), "w", encoding="utf-8") as file:
+        file.write(layer["digest"] + "\n")
+    if os.path.isdir(dst):
+        shutil.rmtree(dst)
+    os.replace(tmp_dst, dst)
+    if not FETCH_CACHE_DIR:
+        shutil.rmtree(os.path.join(BLENDERS_DIR, ".fetch"))
+    print(f"✅ Blender {full_version} fetched into {dst}")
+    return dst
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    client = RegistryClient(FETCH_REGISTRY, IMAGE_REPOSITORY, auth=load_credentials(FETCH_REGISTRY))
+    try:
+        parts = load_parts(client)
+        if sys.argv[1] == "list":
+            for full_version, descriptor in parts.items():
+                print(f"{full_version}  {descriptor['digest']}")
+            return 0
+        for version in sys.argv[1:]:
+            fetch_blender(client, parts, version)
+    except (requests.RequestException, RuntimeError, OSError, KeyError, ValueError, tarfile.TarError) as exc:
+        print(f"❌ fetch FAILED: {exc}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
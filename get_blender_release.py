@@ -1,30 +1,342 @@
 """Simple script to get daily builds of Blender."""
 
+import os
+import sys
 import requests
 from bs4 import BeautifulSoup
 import re
+import json
+import html
+import time
+import hashlib
+import functools
+import threading
 import urllib.parse
-
+import dataclasses
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+RELEASES_URL = "https://download.blender.org/release/"
+DAILYS_URL = "https://builder.blender.org/download/daily/"
+DISCOVERY_WORKERS = int(os.environ.get("DISCOVERY_WORKERS", "8"))
+REQUEST_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT", "30"))
+REQUEST_RETRIES = int(os.environ.get("REQUEST_RETRIES", "3"))
+
+# On-disk cache of index pages. Entries keep the page body, its ETag/Last-Modified validators and
+# anything parsed from it, so unchanged pages are revalidated with a conditional GET (or not at all
+# while younger than their TTL) and are not parsed again.
+PAGE_CACHE_ENABLED = os.environ.get("PAGE_CACHE", "1") != "0"
+PAGE_CACHE_DIR = os.environ.get("PAGE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "pages"))
+PAGE_CACHE_TTL = float(os.environ.get("PAGE_CACHE_TTL", "0"))
+ARCHIVED_PAGE_TTL = float(os.environ.get("ARCHIVED_PAGE_TTL", str(24 * 3600)))
+PAGE_CACHE_MAX_BYTES = int(float(os.environ.get("PAGE_CACHE_MAX_MB", "64")) * 1024 * 1024)
+PAGE_CACHE_MAX_AGE = float(os.environ.get("PAGE_CACHE_MAX_AGE_DAYS", "30")) * 24 * 3600
+# How index pages are parsed: "stream" reads each page once without building a tree (DailyBuildsParser and
+# a regex link extractor), "bs4" builds a BeautifulSoup tree and searches it.
+HTML_PARSER = os.environ.get("HTML_PARSER", "stream").strip().lower()
+# Look up the published sha256 of every discovered archive (blender-X.Y.Z.sha256 next to stable releases,
+# <archive>.sha256 next to daily builds), so downloads can be verified while they are written.
+FETCH_CHECKSUMS = os.environ.get("FETCH_CHECKSUMS", "1") != "0"
+SHA256_RE = re.compile(r"[0-9a-fA-F]{64}")
+
+MINOR_DIR_RE = re.compile(r"Blender(\d)\.(\d+)\/")
+HREF_RE = re.compile(r"""<a\s[^>]*?\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+# The fields of one build in the daily builds page: (tag, class) -> field name
+DAILY_FIELDS = {
+    ("a", "b-version"): "version",
+    ("a", "b-variant"): "variant",
+    ("a", "b-reference"): "reference",
+    ("div", "b-date"): "date",
+    ("div", "b-arch"): "arch",
+}
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# Format of the release manifest written by `python get_blender_release.py manifest`, bumped on incompatible changes.
+MANIFEST_VERSION = 1
+
+_session = None
+
+@dataclasses.dataclass(frozen=True, order=True, slots=True)
 class Release:
-    def __init__(self, version, stage, reference, date, arch, os, url):
-        self.version = version
-        self.stage = stage
-        self.reference = reference
-        self.date = date
-        self.arch = arch
-        self.os = os
-        self.url = url
+    """One downloadable Blender build. Releases are immutable and hashable, sort by version first
+    and round-trip through JSON with to_dict/from_dict. sha256 and size are filled in when known; they
+    describe the archive rather than identify the build, so they take no part in comparisons (None
+    would not order against a value).
+    """
+    version: tuple
+    stage: str
+    reference: str
+    date: str
+    arch: str
+    os: str
+    url: str
+    sha256: str = dataclasses.field(default=None, compare=False)
+    size: int = dataclasses.field(default=None, compare=False)
+
     def __str__(self):
         return f"{self.version} {self.stage} {self.reference} {self.date} {self.arch} {self.os} {self.url}"
 
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Release":
+        data = dict(data)
+        data["version"] = tuple(data["version"])
+        return cls(**data)
+
 
-def get_soup(url: str):
-    """Download the blender daily builds page, parse it with BeautifulSoup4 and return the soup. If something wents wrong, return None."""
-    response = requests.get(url)
+def get_session() -> requests.Session:
+    """Return the shared keep-alive session, creating it on first use.
+    The connection pool is sized for DISCOVERY_WORKERS so concurrent page fetches reuse connections,
+    and transient failures (connection errors, 5xx, 429) are retried with backoff.
+    """
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=REQUEST_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET", "HEAD"),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(DISCOVERY_WORKERS, 1), max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session = session
+    return _session
+
+
+def _cache_path(url: str) -> str:
+    return os.path.join(PAGE_CACHE_DIR, hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+
+def _load_cache_entry(url: str):
+    if not PAGE_CACHE_ENABLED:
+        return None
+    try:
+        with open(_cache_path(url), encoding="utf-8") as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if entry.get("url") != url:
+        return None
+    return entry
+
+
+def _store_cache_entry(entry: dict):
+    if not PAGE_CACHE_ENABLED:
+        return
+    path = _cache_path(entry["url"])
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(PAGE_CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        print(f"⚠️ Could not write page cache entry for {entry['url']}: {exc}")
+
+
+def fetch_page(url: str, ttl: float=None):
+    """Return the cache entry for url (a dict with "text" and "parsed" keys), fetching or revalidating it as needed.
+    Entries younger than ttl seconds are used without touching the network, older ones are revalidated
+    with If-None-Match/If-Modified-Since. If something went wrong, return None.
+    """
+    if ttl is None:
+        ttl = PAGE_CACHE_TTL
+    entry = _load_cache_entry(url)
+    now = time.time()
+    if entry is not None and ttl > 0 and now - entry["checked"] < ttl:
+        return entry
+
+    headers = {}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as exc:
+        print(f"⚠️ Could not GET {url}: {exc}")
+        return None
+
+    if response.status_code == 304 and entry is not None:
+        entry["checked"] = now
+        _store_cache_entry(entry)
+        return entry
     if response.status_code != 200:
         print(f"⚠️ Could not GET {url}, status code: {response.status_code}")
         return None
-    return BeautifulSoup(response.text, "html.parser")
+
+    entry = {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "checked": now,
+        "text": response.text,
+        "parsed": {},
+    }
+    _store_cache_entry(entry)
+    return entry
+
+
+def store_parsed(entry: dict, key: str, value):
+    """Remember a JSON-serializable parse result next to the cached page it was parsed from."""
+    entry["parsed"][key] = value
+    _store_cache_entry(entry)
+
+
+def evict_page_cache(max_bytes: int=PAGE_CACHE_MAX_BYTES, max_age: float=PAGE_CACHE_MAX_AGE):
+    """Drop cache entries older than max_age seconds, then the least recently used ones until the cache fits max_bytes."""
+    if not os.path.isdir(PAGE_CACHE_DIR):
+        return
+    now = time.time()
+    entries = []
+    for name in os.listdir(PAGE_CACHE_DIR):
+        path = os.path.join(PAGE_CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if now - stat.st_mtime > max_age:
+            os.remove(path)
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+def get_soup(url: str, ttl: float=None):
+    """Download the blender daily builds page, parse it with BeautifulSoup4 and return the soup. If something wents wrong, return None.
+    Pages are served from the on-disk page cache when unchanged, see fetch_page.
+    """
+    entry = fetch_page(url, ttl)
+    if entry is None:
+        return None
+    return BeautifulSoup(entry["text"], "html.parser")
+
+
+def page_links(text: str, backend: str=None) -> list[str]:
+    """Return the href of every anchor of an index page, in page order."""
+    if (backend or HTML_PARSER) == "bs4":
+        links = BeautifulSoup(text, "html.parser").find_all("a")
+        return [link.get("href") for link in links if link.get("href") is not None]
+    return [html.unescape(next(group for group in match.groups() if group is not None)) for match in HREF_RE.finditer(text)]
+
+
+class DailyBuildsParser(HTMLParser):
+    """Single pass over the daily builds page, collecting the DAILY_FIELDS texts and the first b-down link
+    of every li inside the builds-list-container of one platform. Builds end up in self.builds as dicts.
+    """
+
+    def __init__(self, platform: str):
+        super().__init__()
+        self.platform = platform
+        self.stack = []  # (tag, role) of every open element, role is "container", "li", "down" or a field name
+        self.container_done = False
+        self.build = None
+        self.builds = []
+
+    def in_role(self, role: str) -> bool:
+        return any(open_role == role for _, open_role in self.stack)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        role = None
+        if self.in_role("container"):
+            if tag == "li" and self.in_open_li():
+                # the end tag of li is optional, the next li of the same list closes the open one
+                self.close_elements(lambda open_tag, open_role: open_role == "li")
+            if tag == "li" and self.build is None:
+                role = "li"
+                self.build = {field: None for field in DAILY_FIELDS.values()}
+            elif self.build is not None:
+                # like BeautifulSoup's find, only the first element of a class counts
+                role = next((field for (field_tag, cls), field in DAILY_FIELDS.items() if field_tag == tag and cls in classes), None)
+                if role is not None and self.build[role] is not None:
+                    role = None
+                if tag == "div" and "b-down" in classes and "download" not in self.build:
+                    role = "down"
+                    self.build["download"] = None
+                elif tag == "a" and self.in_role("down") and self.build["download"] is None:
+                    self.build["download"] = attrs.get("href")
+                if role in DAILY_FIELDS.values():
+                    self.build[role] = ""
+        elif not self.container_done and tag == "div" and "builds-list-container" in classes and attrs.get("data-platform") == self.platform:
+            role = "container"
+        if tag not in VOID_ELEMENTS:
+            self.stack.append((tag, role))
+
+    def in_open_li(self) -> bool:
+        """Whether the innermost open li, ul or ol is the li of a build (not an li of a nested list)."""
+        innermost = next((role for open_tag, role in reversed(self.stack) if open_tag in ("li", "ul", "ol")), None)
+        return innermost == "li"
+
+    def close_elements(self, last):
+        """Close open elements up to and including the innermost one last(tag, role) is true for."""
+        while self.stack:
+            open_tag, role = self.stack.pop()
+            if role == "li":
+                self.builds.append(self.build)
+                self.build = None
+            elif role == "container":
+                self.container_done = True
+            if last(open_tag, role):
+                break
+
+    def handle_endtag(self, tag):
+        if not any(open_tag == tag for open_tag, _ in self.stack):
+            return
+        self.close_elements(lambda open_tag, role: open_tag == tag)
+
+    def handle_data(self, data):
+        if self.build is None:
+            return
+        for _, role in self.stack:
+            if role in DAILY_FIELDS.values():
+                self.build[role] += data
+
+
+def daily_builds(text: str, platform: str, backend: str=None) -> list[dict]:
+    """Return the builds listed for platform on the daily builds page as dicts of the DAILY_FIELDS texts
+    (None when missing) and "download", the first link of b-down (key missing when there is no b-down).
+    """
+    if (backend or HTML_PARSER) == "bs4":
+        soup = BeautifulSoup(text, "html.parser")
+        platform_tab = soup.find("div", {"class": "builds-list-container", "data-platform": {platform}})
+        if platform_tab is None:
+            return []
+        builds = []
+        for release in platform_tab.find_all("li"):
+            build = {}
+            for (tag, cls), field in DAILY_FIELDS.items():
+                element = release.find(tag, {"class": cls})
+                build[field] = element.text if element is not None else None
+            download = release.find("div", {"class": "b-down"})
+            if download is not None:
+                link = download.find("a")
+                build["download"] = link.get("href") if link is not None else None
+            builds.append(build)
+        return builds
+
+    parser = DailyBuildsParser(platform)
+    parser.feed(text)
+    parser.close()
+    return parser.builds
 
 
 def get_blender_dailys(os="linux", arch="x64"):
@@ -53,25 +365,25 @@ def get_blender_dailys(os="linux", arch="x64"):
         if arch == "arm64":
             search_arch = "apple silicon"
 
-    url = "https://builder.blender.org/download/daily/"
-    soup = get_soup(url)
-    if soup == None:
+    url = DAILYS_URL
+    entry = fetch_page(url)
+    if entry is None:
         return None
-    
-    platform_tab = soup.find("div", {"class": "builds-list-container", "data-platform": {search_os}})
-    releases = platform_tab.find_all("li")
+
     prereleases = []
-    for release in releases:
-        verstring = release.find("a", {"class": "b-version"}).text
-        version = parse_version(verstring)
+    for build in daily_builds(entry["text"], search_os):
+        if None in (build["version"], build["variant"], build["arch"]):
+            print(f"Incomplete build entry {build}, this could be a bug!")
+            continue
+        version = parse_version(build["version"])
 
-        stage = release.find("a", {"class": "b-variant"}).text.lower()
+        stage = build["variant"].lower()
         if stage == "stable":
             continue # not interested in stable versions
 
-        reference = release.find("a", {"class": "b-reference"}).text
-        date = release.find("div", {"class": "b-date"}).text
-        arch_strings = release.find("div", {"class": "b-arch"}).text.split(" ")
+        reference = build["reference"]
+        date = build["date"]
+        arch_strings = build["arch"].split(" ")
         architecture = arch_strings[1].lower()
         operating_system = arch_strings[0].lower()
         if architecture != search_arch:
@@ -81,79 +393,103 @@ def get_blender_dailys(os="linux", arch="x64"):
             print(f"Operating system does not match: {operating_system} {search_os}, this could be a bug!")
             continue
 
-        download = release.find("div", {"class": "b-down"})
-        if download == None:
+        if "download" not in build:
             print(f"No download link found for {version} {stage} {reference} {date} {architecture} {operating_system}, could be a bug.")
             continue
 
-        url = download.find("a").get("href")
-        if url.endswith(".sha256"):
+        url = build["download"]
+        if url is None or url.endswith(".sha256"):
             continue
 
         prereleases.append(Release(version, stage, reference, date, architecture, operating_system, url))
 
+    if FETCH_CHECKSUMS and prereleases:
+        with ThreadPoolExecutor(max_workers=max(1, min(DISCOVERY_WORKERS, len(prereleases)))) as executor:
+            prereleases = list(executor.map(with_sha256, prereleases))
     return prereleases
 
 
-def get_blender_releases(os: str="linux", arch: str="x64", min_ver=(2, 93)):
+def get_blender_releases(os: str="linux", arch: str="x64", min_ver=(2, 93), url: str=None):
     """Get all minor releases of Blender. If the release is higher than min_ver, then open its directory and search for highest patch release.
-    In the end, returns a list of releases, highest patch version.
+    Minor directories are fetched concurrently (up to DISCOVERY_WORKERS at once), results keep the listing order.
+    The newest minor directory is always revalidated, older (archived) minors are trusted for ARCHIVED_PAGE_TTL seconds.
+    In the end, returns a list of releases, highest patch version. url defaults to RELEASES_URL.
     """
-    url = "https://download.blender.org/release/"
-    soup = get_soup(url)
-    if soup == None:
+    if url is None:
+        url = RELEASES_URL
+    entry = fetch_page(url)
+    if entry is None:
         return None
-    
-    regex = re.compile(r"Blender(\d)\.(\d+)\/")
-    links = soup.find_all("a")
-    releases = []
-    for link in links:
-        href = link.get("href")
-        if href == None:
-            continue
-        match = regex.search(href)
-        if match == None:
+
+    minors = []
+    for href in page_links(entry["text"]):
+        match = MINOR_DIR_RE.search(href)
+        if match is None:
             continue
 
         ver = (int(match.group(1)), int(match.group(2)))
         if ver < min_ver:
             continue
 
-        release = parse_patch_releases(os, arch, urllib.parse.urljoin(url, href))
-        if release!= None:
-            releases.append(release)
+        minors.append((ver, urllib.parse.urljoin(url, href)))
+
+    if not minors:
+        return []
+
+    latest = max(ver for ver, _ in minors)
+    def parse_minor(minor):
+        ver, minor_url = minor
+        ttl = PAGE_CACHE_TTL if ver == latest else ARCHIVED_PAGE_TTL
+        release = parse_patch_releases(os, arch, minor_url, ttl)
+        if release is not None and FETCH_CHECKSUMS:
+            release = with_sha256(release, ttl)
+        return release
 
+    workers = max(1, min(DISCOVERY_WORKERS, len(minors)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        releases = [release for release in executor.map(parse_minor, minors) if release is not None]
+
+    if PAGE_CACHE_ENABLED:
+        evict_page_cache()
     return releases
 
-def parse_patch_releases(os: str, arch: str, url: str) -> Release:
-    ver_soup = get_soup(url)
-    if ver_soup == None:
-        return
-        
+@functools.lru_cache(maxsize=None)
+def patch_release_regex(os: str, arch: str) -> re.Pattern:
+    """Regex matching the archive names of one os and arch in a minor release directory."""
     if os == "windows":
         suffix = r"msi"
     if os == "linux":
         suffix = r"tar.xz"
     if os == "macos":
         suffix = r"dmg"
+    return re.compile(f"blender-(\\d)\\.(\\d+)\\.(\\d+)-{os}-{arch}\\.{suffix}")
 
-    regex = re.compile(f"blender-(\\d)\\.(\\d+)\\.(\\d+)-{os}-{arch}\\.{suffix}")
-    links = ver_soup.find_all("a")
-    release = None
-    for link in links:
-        href = link.get("href")
-        if href == None:
-            continue
 
+def parse_patch_releases(os: str, arch: str, url: str, ttl: float=None) -> Release:
+    """Find the highest patch release in a minor release directory.
+    The result is stored with the cached page, so an unchanged directory is not parsed again.
+    """
+    entry = fetch_page(url, ttl)
+    if entry is None:
+        return
+
+    key = f"{os}-{arch}"
+    if key in entry["parsed"]:
+        cached = entry["parsed"][key]
+        return Release.from_dict(cached) if cached is not None else None
+
+    regex = patch_release_regex(os, arch)
+    release = None
+    for href in page_links(entry["text"]):
         match = regex.search(href)
-        if match == None:
+        if match is None:
             continue
 
         version = (int(match.group(1)), int(match.group(2)), int(match.group(3)))
-        if match == None:
+        if match is None:
             continue
 
-        if release == None:
+        if release is None:
             release = Release(version, "stable", "", "", arch, os, urllib.parse.urljoin(url, href))
             continue
 
@@ -162,21 +498,51 @@ def parse_patch_releases(os: str, arch: str, url: str) -> Release:
 
         release = Release(version, "stable", "", "", arch, os, urllib.parse.urljoin(url, href))
 
-    return release 
+    store_parsed(entry, key, release.to_dict() if release is not None else None)
+    return release
+
 
+def parse_checksums(text: str) -> dict:
+    """Map file name -> hex sha256 of a sha256sum style file. A file holding only a hash maps "" to it."""
+    checksums = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if parts and SHA256_RE.fullmatch(parts[0]):
+            checksums[parts[1].lstrip("*") if len(parts) > 1 else ""] = parts[0].lower()
+    return checksums
 
-def merge_prefer_stable(releases: list[Release], dailys=list[Release]):
+
+def with_sha256(release: Release, ttl: float=None) -> Release:
+    """Return release with the sha256 published for its archive, or unchanged if none can be found.
+    Stable releases list all archives of a patch release in blender-X.Y.Z.sha256, daily builds have one
+    <archive>.sha256 each. The checksum files go through the page cache like index pages.
+    """
+    name = urllib.parse.unquote(urllib.parse.urlsplit(release.url).path.rsplit("/", 1)[-1])
+    if release.stage == "stable":
+        x, y, z = release.version
+        checksum_url = urllib.parse.urljoin(release.url, f"blender-{x}.{y}.{z}.sha256")
+    else:
+        checksum_url = release.url + ".sha256"
+    entry = fetch_page(checksum_url, ttl)
+    if entry is None:
+        return release
+    checksums = parse_checksums(entry["text"])
+    sha256 = checksums.get(name) or checksums.get("")
+    if sha256 is None:
+        print(f"⚠️ {checksum_url} lists no sha256 for {name}")
+        return release
+    return dataclasses.replace(release, sha256=sha256)
+
+
+def merge_prefer_stable(releases: list[Release], dailys: list[Release]):
     """Prefer stable releases over daily prereleases releases.
     If stable minor version is available, do not append daily release.
-    If no stable minor release is available, then append the daily release.
+    If no stable minor release is available, then append the daily release (the first one listed for that minor).
     """
-    for daily in dailys:
-        stable_available = False
-        for release in releases:
-            if release.version[:2] == daily.version[:2]:
-                stable_available = True
-                break
-        if not stable_available:
+    minors = {release.version[:2]: release for release in releases}
+    for daily in dailys or []:
+        if daily.version[:2] not in minors:
+            minors[daily.version[:2]] = daily
             releases.append(daily)
     return releases
 
@@ -198,7 +564,55 @@ def order_releases(releases: list[Release]) -> list[Release]:
     """Order releases by version, lowest/oldest first to highest/newest last."""
     return sorted(releases, key=lambda release: release.version)
 
+
+def with_size(release: Release) -> Release:
+    """Return release with the size of its archive, asked from the server with a HEAD request."""
+    try:
+        r = get_session().head(release.url, allow_redirects=True, timeout=REQUEST_TIMEOUT)
+        size = int(r.headers["Content-Length"]) if r.status_code == 200 else None
+    except (requests.RequestException, KeyError, ValueError) as exc:
+        print(f"⚠️ Could not get the size of {release.url}: {exc}")
+        size = None
+    return dataclasses.replace(release, size=size)
+
+
+def build_manifest(os: str="linux", arch: str="x64", min_ver=(2, 93)) -> list[Release]:
+    """Discover stable releases and prereleases like get_stable_and_prereleases, ordered, with archive sizes."""
+    releases = order_releases(get_stable_and_prereleases(os, arch, min_ver))
+    with ThreadPoolExecutor(max_workers=max(DISCOVERY_WORKERS, 1)) as executor:
+        return list(executor.map(with_size, releases))
+
+
+def write_manifest(path: str, releases: list[Release]):
+    """Write releases as a versioned JSON release manifest, readable offline with load_manifest."""
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "generated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "releases": [release.to_dict() for release in releases],
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(path: str) -> list[Release]:
+    """Read the releases of a release manifest. Raises ValueError for manifests of another format version."""
+    with open(path, encoding="utf-8") as file:
+        manifest = json.load(file)
+    if manifest.get("manifest_version") != MANIFEST_VERSION:
+        raise ValueError(f"{path} is a version {manifest.get('manifest_version')} release manifest, expected {MANIFEST_VERSION}")
+    return [Release.from_dict(data) for data in manifest["releases"]]
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "manifest":
+        # python get_blender_release.py manifest [path]: write the releases build.py builds for RELEASE_MANIFEST
+        path = sys.argv[2] if len(sys.argv) > 2 else "release-manifest.json"
+        releases = build_manifest()
+        write_manifest(path, releases)
+        print(f"✅ wrote {len(releases)} releases to {path}")
+        sys.exit(0)
+
     print("--- releases ---")
     releases = get_blender_releases("linux", "x64")
     for release in releases:
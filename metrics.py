@@ -0,0 +1,118 @@
+"""Per-stage timing and resource metrics of a build run, written as JSON lines."""
+
+import os
+import json
+import time
+import shutil
+import threading
+import contextlib
+
+
+class DiskSampler:
+    """Polls disk usage of path in a background thread and keeps the highest value seen."""
+
+    def __init__(self, path: str, interval: float):
+        self.path = path
+        self.interval = interval
+        self.peak = shutil.disk_usage(path).used
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, shutil.disk_usage(self.path).used)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        self.peak = max(self.peak, shutil.disk_usage(self.path).used)
+
+
+class MetricsRecorder:
+    """Records one JSON line per pipeline stage: name, wall time, outcome, peak disk use and whatever the stage
+    adds itself (bytes transferred, image size, version...). Throughput is derived from bytes and wall time.
+
+    Lines are appended to path (when set) as soon as a stage ends, tagged with a run id, so runs can be
+    compared with each other later. Safe to use from several threads.
+    """
+
+    def __init__(self, path: str = None, disk_path: str = "/", sample_interval: float = 1.0):
+        self.path = path
+        self.disk_path = disk_path
+        self.sample_interval = sample_interval
+        self.run_id = time.strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}"
+        self.records = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def current(self):
+        """The record of the innermost stage running in this thread, None outside of any stage."""
+        stack = getattr(self.local, "stack", None)
+        return stack[-1] if stack else None
+
+    @contextlib.contextmanager
+    def stage(self, name: str, **fields):
+        """Time the body as stage name. Yields the record dict, the body may add fields to it;
+        setting record["ok"] = False marks a failed stage, an exception does so too.
+        """
+        record = {"run_id": self.run_id, "stage": name, **fields, "ok": True}
+        record["started"] = time.time()
+        sampler = DiskSampler(self.disk_path, self.sample_interval)
+        stack = self.local.__dict__.setdefault("stack", [])
+        stack.append(record)
+        start = time.perf_counter()
+        try:
+            with sampler:
+                yield record
+        except BaseException:
+            record["ok"] = False
+            raise
+        finally:
+            stack.pop()
+            record["wall_s"] = round(time.perf_counter() - start, 3)
+            record["peak_disk_used"] = sampler.peak
+            if record.get("bytes") and record["wall_s"] > 0:
+                record["throughput_mib_s"] = round(record["bytes"] / 1024 ** 2 / record["wall_s"], 2)
+            self._write(record)
+
+    def event(self, name: str, **fields):
+        """Write a point-in-time line (e.g. a layer finished pushing) to the file; events are not in the summary."""
+        self._write({"run_id": self.run_id, "event": name, "time": time.time(), **fields}, summarize=False)
+
+    def _write(self, record: dict, summarize: bool = True):
+        with self.lock:
+            if summarize:
+                self.records.append(record)
+            if self.path is None:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(record, sort_keys=True) + "\n")
+
+    def summary(self) -> str:
+        """Table of all stages of this run: count, failures, total and max wall time, bytes and throughput."""
+        totals = {}
+        with self.lock:
+            for record in self.records:
+                total = totals.setdefault(record["stage"], {"count": 0, "failed": 0, "wall_s": 0.0, "max_s": 0.0, "bytes": 0})
+                total["count"] += 1
+                total["failed"] += not record["ok"]
+                total["wall_s"] += record["wall_s"]
+                total["max_s"] = max(total["max_s"], record["wall_s"])
+                total["bytes"] += record.get("bytes") or 0
+            peak = max((record["peak_disk_used"] for record in self.records), default=0)
+
+        lines = [f"  {'stage':<14} {'count':>5} {'failed':>6} {'total s':>9} {'max s':>8} {'MiB':>9} {'MiB/s':>8}"]
+        for name, total in sorted(totals.items(), key=lambda item: -item[1]["wall_s"]):
+            mib = total["bytes"] / 1024 ** 2
+            rate = f"{mib / total['wall_s']:8.1f}" if total["bytes"] and total["wall_s"] > 0 else f"{'-':>8}"
+            lines.append(
+                f"  {name:<14} {total['count']:>5} {total['failed']:>6} {total['wall_s']:>9.1f} "
+                f"{total['max_s']:>8.1f} {mib:>9.1f} {rate}"
+            )
+        lines.append(f"  peak disk used: {peak / 1024 ** 3:.1f} GiB")
+        return "\n".join(lines)
@@ -0,0 +1,256 @@
+"""Assemble single-layer-on-base OCI images without a container runtime and push them through the registry API.
+
+An image is the base image's layers plus one layer holding the Blender tree, written as a tar stream
+straight into the compressor with both digests (diff_id of the tar, digest of the compressed blob)
+computed on the fly. Only the new blobs are kept in the OCI layout; base layers are referenced by
+digest and mounted (same registry) or streamed over from the base registry when pushing.
+"""
+
+import os
+import copy
+import gzip
+import json
+import shutil
+import hashlib
+import tarfile
+import threading
+import subprocess
+from datetime import datetime, timezone
+
+from registry import RegistryClient, SizedStream, load_credentials, parse_reference
+
+
+OCI_MANIFEST = "application/vnd.oci.image.manifest.v1+json"
+OCI_CONFIG = "application/vnd.oci.image.config.v1+json"
+OCI_INDEX = "application/vnd.oci.image.index.v1+json"
+LAYER_MEDIA_TYPES = {
+    "gzip": "application/vnd.oci.image.layer.v1.tar+gzip",
+    "zstd": "application/vnd.oci.image.layer.v1.tar+zstd",
+}
+# Docker schema 2 layers are byte-identical to their OCI counterparts, only the media type differs.
+DOCKER_TO_OCI = {
+    "application/vnd.docker.image.rootfs.diff.tar.gzip": "application/vnd.oci.image.layer.v1.tar+gzip",
+    "application/vnd.docker.image.rootfs.foreign.diff.tar.gzip": "application/vnd.oci.image.layer.nondistributable.v1.tar+gzip",
+    "application/vnd.docker.container.image.v1+json": OCI_CONFIG,
+}
+COPY_CHUNK_SIZE = 1024 * 1024
+# Base of images that consist of nothing but their own layer (FROM scratch).
+SCRATCH_BASE = {
+    "registry": None,
+    "repository": None,
+    "digest": None,
+    "manifest": {"layers": []},
+    "config": {"architecture": "amd64", "os": "linux", "config": {}, "rootfs": {"type": "layers", "diff_ids": []}},
+}
+
+
+class HashingWriter:
+    """Writes through to file while keeping the sha256 and size of everything written."""
+
+    def __init__(self, file):
+        self.file = file
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        self.file.write(data)
+        return len(data)
+
+    def flush(self):
+        self.file.flush()
+
+    @property
+    def digest(self) -> str:
+        return f"sha256:{self.sha256.hexdigest()}"
+
+
+def reset_owner(member: tarfile.TarInfo) -> tarfile.TarInfo:
+    # ADD without --chown: everything belongs to root
+    member.uid = member.gid = 0
+    member.uname = member.gname = "root"
+    return member
+
+
+def write_tar(src: str, image_path: str, file):
+    """Stream the tree src into file as a tar holding it at image_path. Hardlinks stay hardlinks."""
+    with tarfile.open(fileobj=file, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+        tar.add(src, arcname=image_path.strip("/"), filter=reset_owner)
+
+
+def write_layer(src: str, image_path: str, out_path: str, compression: str = "gzip", level: int = None) -> dict:
+    """Write the tree src as a layer blob at out_path. Returns its descriptor plus "diff_id".
+
+    gzip uses Python's gzip module, zstd pipes through the zstd command line tool (multi-threaded).
+    """
+    if compression not in LAYER_MEDIA_TYPES:
+        raise ValueError(f"Unknown layer compression: {compression}")
+    with open(out_path, "wb") as out:
+        compressed = HashingWriter(out)
+        if compression == "gzip":
+            with gzip.GzipFile(fileobj=compressed, mode="wb", compresslevel=level or 6, mtime=0) as gz:
+                raw = HashingWriter(gz)
+                write_tar(src, image_path, raw)
+        else:
+            zstd = shutil.which("zstd")
+            if zstd is None:
+                raise RuntimeError("zstd layer compression needs the zstd command line tool")
+            proc = subprocess.Popen([zstd, "-q", "-T0", f"-{level or 3}", "-c"], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            pump = threading.Thread(target=lambda: shutil.copyfileobj(proc.stdout, compressed, COPY_CHUNK_SIZE))
+            pump.start()
+            raw = HashingWriter(proc.stdin)
+            try:
+                write_tar(src, image_path, raw)
+            finally:
+                proc.stdin.close()
+                pump.join()
+            if proc.wait() != 0:
+                raise RuntimeError(f"zstd exited with {proc.returncode}")
+    return {
+        "mediaType": LAYER_MEDIA_TYPES[compression],
+        "digest": compressed.digest,
+        "size": compressed.size,
+        "diff_id": raw.digest,
+    }
+
+
+def load_base_image(reference: str, cache_dir: str) -> dict:
+    """Resolve the base image reference to its current manifest and config.
+
+    Only the manifest digest is asked from the registry on every call, manifest and config of a digest seen
+    before come from cache_dir. Returns {"registry", "repository", "digest", "manifest", "config"}.
+    """
+    registry, repository, tag = parse_reference(reference)
+    client = RegistryClient(registry, repository, auth=load_credentials(registry))
+    found = client.get_manifest(tag)
+    if found is None:
+        raise RuntimeError(f"base image {reference} not found")
+    manifest, digest = found
+    if digest is None:
+        digest = f"sha256:{hashlib.sha256(json.dumps(manifest).encode()).hexdigest()}"
+    cache_path = os.path.join(cache_dir, digest.replace(":", "-") + ".json")
+    try:
+        with open(cache_path, encoding="utf-8") as file:
+            cached = json.load(file)
+    except (OSError, ValueError):
+        cached = {
+            "manifest": manifest,
+            "config": json.loads(client.get_blob(manifest["config"]["digest"])),
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(cached, file)
+        os.replace(cache_path + ".tmp", cache_path)
+    return {"registry": registry, "repository": repository, "digest": digest, **cached}
+
+
+def assemble_image(base: dict, layer: dict, labels: dict, created_by: str, entrypoint: list = None) -> tuple:
+    """Build config and manifest of base plus layer. Returns (config_bytes, manifest_bytes) as they are pushed."""
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    config = copy.deepcopy(base["config"])
+    config["created"] = now
+    config.setdefault("rootfs", {"type": "layers", "diff_ids": []})["diff_ids"].append(layer["diff_id"])
+    config.setdefault("history", []).append({"created": now, "created_by": created_by})
+    container_config = config.setdefault("config", {})
+    container_config["Labels"] = {**(container_config.get("Labels") or {}), **labels}
+    if entrypoint is not None:
+        container_config["Entrypoint"] = entrypoint
+        container_config["Cmd"] = None
+    config_bytes = json.dumps(config, sort_keys=True).encode()
+
+    layers = [
+        {**descriptor, "mediaType": DOCKER_TO_OCI.get(descriptor["mediaType"], descriptor["mediaType"])}
+        for descriptor in base["manifest"]["layers"]
+    ]
+    layers.append({key: layer[key] for key in ("mediaType", "digest", "size")})
+    manifest = {
+        "schemaVersion": 2,
+        "mediaType": OCI_MANIFEST,
+        "config": {
+            "mediaType": OCI_CONFIG,
+            "digest": f"sha256:{hashlib.sha256(config_bytes).hexdigest()}",
+            "size": len(config_bytes),
+        },
+        "layers": layers,
+    }
+    return config_bytes, json.dumps(manifest, sort_keys=True).encode()
+
+
+def blob_path(layout_dir: str, digest: str) -> str:
+    algorithm, hex_digest = digest.split(":", 1)
+    return os.path.join(layout_dir, "blobs", algorithm, hex_digest)
+
+
+def write_blob(layout_dir: str, data: bytes) -> str:
+    digest = f"sha256:{hashlib.sha256(data).hexdigest()}"
+    path = blob_path(layout_dir, digest)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(data)
+    return digest
+
+
+def image_index(manifests: list) -> dict:
+    """An OCI index of the given manifest descriptors."""
+    return {"schemaVersion": 2, "mediaType": OCI_INDEX, "manifests": manifests}
+
+
+def build_layout(layout_dir: str, src: str, image_path: str, base: dict, labels: dict, tags: list,
+                 compression: str = "gzip", entrypoint: list = None) -> bytes:
+    """Write an OCI layout at layout_dir for base plus the tree src at image_path, tagged with tags
+    (org.opencontainers.image.ref.name). Returns the manifest bytes.
+    """
+    os.makedirs(os.path.join(layout_dir, "blobs", "sha256"), exist_ok=True)
+    tmp_layer = os.path.join(layout_dir, "blobs", "layer.tmp")
+    layer = write_layer(src, image_path, tmp_layer, compression)
+    os.replace(tmp_layer, blob_path(layout_dir, layer["digest"]))
+
+    config_bytes, manifest_bytes = assemble_image(base, layer, labels, f"ADD {os.path.basename(src)} {image_path}", entrypoint)
+    write_blob(layout_dir, config_bytes)
+    manifest_digest = write_blob(layout_dir, manifest_bytes)
+    index = image_index([
+        {
+            "mediaType": OCI_MANIFEST,
+            "digest": manifest_digest,
+            "size": len(manifest_bytes),
+            "annotations": {"org.opencontainers.image.ref.name": tag},
+        }
+        for tag in tags
+    ])
+    with open(os.path.join(layout_dir, "oci-layout"), "w", encoding="utf-8") as file:
+        json.dump({"imageLayoutVersion": "1.0.0"}, file)
+    with open(os.path.join(layout_dir, "index.json"), "w", encoding="utf-8") as file:
+        json.dump(index, file, indent=1)
+    return manifest_bytes
+
+
+def push_layout(client: RegistryClient, layout_dir: str, manifest_bytes: bytes, tags: list, base: dict) -> int:
+    """Push the image of manifest_bytes under every tag. Blobs the registry already has are skipped, blobs
+    of the layout are uploaded, base layers are mounted from the base repository (same registry) or streamed
+    over from the base registry. Returns the number of bytes uploaded.
+    """
+    manifest = json.loads(manifest_bytes)
+    same_registry = base["registry"] is not None and client.base_url == RegistryClient(base["registry"], base["repository"]).base_url
+    source = None
+    uploaded = 0
+    for descriptor in [manifest["config"], *manifest["layers"]]:
+        digest = descriptor["digest"]
+        if client.blob_exists(digest):
+            continue
+        path = blob_path(layout_dir, digest)
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                client.upload_blob(digest, file, descriptor["size"])
+            uploaded += descriptor["size"]
+            continue
+        if same_registry and client.mount_blob(digest, base["repository"]):
+            continue
+        if source is None:
+            source = RegistryClient(base["registry"], base["repository"], auth=load_credentials(base["registry"]))
+        with source.open_blob(digest) as response:
+            client.upload_blob(digest, SizedStream(response.raw, descriptor["size"]), descriptor["size"])
+        uploaded += descriptor["size"]
+    for tag in tags:
+        client.put_manifest(tag, manifest_bytes, OCI_MANIFEST)
+    return uploaded
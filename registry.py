@@ -0,0 +1,221 @@
+"""Minimal client for the registry v2 (OCI distribution) HTTP API, used to inspect and push images."""
+
+import os
+import re
+import json
+import base64
+import requests
+from urllib.parse import urljoin
+
+
+MANIFEST_MEDIA_TYPES = (
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+)
+INDEX_MEDIA_TYPES = MANIFEST_MEDIA_TYPES[:2]
+
+
+def registry_base_url(registry: str) -> str:
+    """Map a registry name as used in image tags to the base URL of its HTTP API.
+    docker.io is served from registry-1.docker.io, localhost registries (test stand-ins) speak plain HTTP.
+    """
+    host = registry.strip().rstrip("/")
+    if host in ("docker.io", "index.docker.io"):
+        host = "registry-1.docker.io"
+    scheme = "http" if host.split(":")[0] in ("localhost", "127.0.0.1") else "https"
+    return f"{scheme}://{host}"
+
+
+def parse_reference(reference: str) -> tuple:
+    """Split an image reference like docker.io/accetto/ubuntu:22.04 or ubuntu@sha256:... into (registry, repository, tag or digest).
+    A reference without registry is on docker.io, a single-name repository there lives in library/.
+    """
+    name, digest = reference.split("@", 1) if "@" in reference else (reference, None)
+    tag = None
+    if ":" in name.rsplit("/", 1)[-1]:
+        name, tag = name.rsplit(":", 1)
+    parts = name.split("/", 1)
+    if len(parts) == 1 or not ("." in parts[0] or ":" in parts[0] or parts[0] == "localhost"):
+        registry, repository = "docker.io", name
+    else:
+        registry, repository = parts
+    if registry == "docker.io" and "/" not in repository:
+        repository = f"library/{repository}"
+    return registry, repository, digest or tag or "latest"
+
+
+def auth_files() -> list:
+    """Credential files written by `podman login` and `docker login`, in the order the runtimes read them."""
+    paths = []
+    if os.environ.get("REGISTRY_AUTH_FILE"):
+        paths.append(os.environ["REGISTRY_AUTH_FILE"])
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        paths.append(os.path.join(os.environ["XDG_RUNTIME_DIR"], "containers", "auth.json"))
+    paths.append(os.path.expanduser(os.path.join("~", ".config", "containers", "auth.json")))
+    paths.append(os.path.expanduser(os.path.join("~", ".docker", "config.json")))
+    return paths
+
+
+def load_credentials(registry: str):
+    """Return (user, password) stored for registry by a previous login, or None to talk to it anonymously."""
+    keys = {registry, f"https://{registry}", f"https://{registry}/v1/"}
+    if registry in ("docker.io", "index.docker.io", "registry-1.docker.io"):
+        keys |= {"docker.io", "index.docker.io", "https://index.docker.io/v1/", "registry-1.docker.io"}
+    for path in auth_files():
+        try:
+            with open(path, encoding="utf-8") as file:
+                auths = json.load(file).get("auths", {})
+        except (OSError, ValueError):
+            continue
+        for key, entry in auths.items():
+            if key in keys and entry.get("auth"):
+                user, _, password = base64.b64decode(entry["auth"]).decode().partition(":")
+                return user, password
+    return None
+
+
+class SizedStream:
+    """File-like wrapper announcing its length, so requests sends a Content-Length instead of a chunked body."""
+
+    def __init__(self, raw, size: int):
+        self.raw = raw
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def read(self, amount: int = -1) -> bytes:
+        return self.raw.read(amount)
+
+
+class RegistryClient:
+    """Talks to one repository (e.g. blenderkit/headless-blender) of one registry.
+    Bearer token challenges are answered anonymously (or with auth, a (user, password) tuple) and the token is reused.
+    """
+
+    def __init__(self, registry: str, repository: str, auth=None, session: requests.Session = None, timeout: float = 30):
+        self.base_url = registry_base_url(registry)
+        self.repository = repository
+        self.auth = auth
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.token = None
+
+    def _authenticate(self, challenge: str) -> bool:
+        if not challenge.lower().startswith("bearer "):
+            return False
+        params = dict(re.findall(r'(\w+)="([^"]*)"', challenge))
+        realm = params.pop("realm", None)
+        if realm is None:
+            return False
+        r = self.session.get(realm, params=params, auth=self.auth, timeout=self.timeout)
+        if r.status_code != 200:
+            return False
+        body = r.json()
+        self.token = body.get("token") or body.get("access_token")
+        return self.token is not None
+
+    def request(self, method: str, path: str, headers: dict = None, **kwargs) -> requests.Response:
+        """Send a request to /v2/<repository>/<path>, answering one auth challenge if needed."""
+        url = path if path.startswith("http") else f"{self.base_url}/v2/{self.repository}/{path}"
+        for _ in range(2):
+            request_headers = dict(headers or {})
+            if self.token is not None:
+                request_headers["Authorization"] = f"Bearer {self.token}"
+            r = self.session.request(method, url, headers=request_headers, timeout=self.timeout, **kwargs)
+            if r.status_code != 401 or not self._authenticate(r.headers.get("WWW-Authenticate", "")):
+                return r
+        return r
+
+    def get_manifest(self, reference: str, platform=("linux", "amd64")):
+        """Return (manifest, digest) for a tag or digest, resolving a multi-platform index to platform.
+        Returns None when the reference does not exist.
+        """
+        r = self.request("GET", f"manifests/{reference}", headers={"Accept": ", ".join(MANIFEST_MEDIA_TYPES)})
+        if r.status_code == 404:
+            return None
+        r.raise_for_status()
+        manifest = r.json()
+        digest = r.headers.get("Docker-Content-Digest")
+        media_type = manifest.get("mediaType") or r.headers.get("Content-Type", "").split(";")[0]
+        if media_type in INDEX_MEDIA_TYPES:
+            for entry in manifest.get("manifests", []):
+                entry_platform = entry.get("platform", {})
+                if (entry_platform.get("os"), entry_platform.get("architecture")) == platform:
+                    return self.get_manifest(entry["digest"], platform)
+            return None
+        return manifest, digest
+
+    def get_manifest_descriptor(self, reference: str):
+        """Return the descriptor (mediaType, digest, size) of a tag or digest without resolving indexes, None if missing."""
+        r = self.request("HEAD", f"manifests/{reference}", headers={"Accept": ", ".join(MANIFEST_MEDIA_TYPES)})
+        if r.status_code == 404:
+            return None
+        r.raise_for_status()
+        return {
+            "mediaType": r.headers.get("Content-Type", "").split(";")[0],
+            "digest": r.headers["Docker-Content-Digest"],
+            "size": int(r.headers["Content-Length"]),
+        }
+
+    def get_blob(self, digest: str) -> bytes:
+        r = self.request("GET", f"blobs/{digest}")
+        r.raise_for_status()
+        return r.content
+
+    def blob_exists(self, digest: str) -> bool:
+        return self.request("HEAD", f"blobs/{digest}").status_code == 200
+
+    def open_blob(self, digest: str) -> requests.Response:
+        """Start a streamed download of a blob, read it from .raw."""
+        r = self.request("GET", f"blobs/{digest}", stream=True)
+        r.raise_for_status()
+        r.raw.decode_content = False
+        return r
+
+    def mount_blob(self, digest: str, from_repository: str) -> bool:
+        """Link a blob of another repository of the same registry into this one without uploading it.
+        Returns False when the registry does not mount it (no pull access there, or mounting unsupported).
+        """
+        r = self.request("POST", "blobs/uploads/", params={"mount": digest, "from": from_repository})
+        # 202 means the registry opened a regular upload session instead, it is left to expire
+        return r.status_code == 201
+
+    def upload_blob(self, digest: str, body, size: int):
+        """Upload a blob in one PUT (monolithic upload). body is bytes or a file-like object of size bytes."""
+        r = self.request("POST", "blobs/uploads/")
+        if r.status_code != 202:
+            r.raise_for_status()
+            raise requests.HTTPError(f"unexpected status {r.status_code} starting an upload", response=r)
+        location = urljoin(self.base_url + "/", r.headers["Location"])
+        r = self.request(
+            "PUT",
+            location,
+            params={"digest": digest},
+            data=body,
+            headers={"Content-Type": "application/octet-stream", "Content-Length": str(size)},
+        )
+        r.raise_for_status()
+
+    def put_manifest(self, reference: str, manifest: bytes, media_type: str) -> str:
+        """Upload a manifest under a tag (or its digest), return the digest the registry reports."""
+        r = self.request("PUT", f"manifests/{reference}", data=manifest, headers={"Content-Type": media_type})
+        r.raise_for_status()
+        return r.headers.get("Docker-Content-Digest")
+
+    def get_image_config(self, reference: str):
+        """Return the image configuration (the JSON with config.Labels, rootfs.diff_ids...) or None if missing."""
+        found = self.get_manifest(reference)
+        if found is None:
+            return None
+        manifest, _ = found
+        return json.loads(self.get_blob(manifest["config"]["digest"]))
+
+    def get_labels(self, reference: str):
+        """Return the labels of a published image, {} for an image without labels, or None if it does not exist."""
+        config = self.get_image_config(reference)
+        if config is None:
+            return None
+        return config.get("config", {}).get("Labels") or {}
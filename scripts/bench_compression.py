@@ -0,0 +1,72 @@
+"""Benchmark layer compression formats on an extracted Blender tree: layer size, compression and decompression time.
+
+Usage: python scripts/bench_compression.py BLENDER_TREE [runs]
+
+BLENDER_TREE is an extracted release, e.g. build/4.2/blender left behind by `KEEP_BUILD_DIRS=1 python build.py`.
+Each format's layer is written with oci.write_layer (the tar stream of native assembly), then decompressed
+`runs` times with the single-threaded command line decompressor, which is roughly what a runtime does while
+pulling. zstd:chunked layers are zstd frames plus a table of contents, so they decompress like zstd; eStargz
+is per-file gzip and decompresses like gzip.
+"""
+
+import os
+import sys
+import time
+import shutil
+import statistics
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import oci
+
+
+FORMATS = (
+    # (label, compression, level, decompress command)
+    ("gzip -6", "gzip", 6, ["gzip", "-dc"]),
+    ("zstd -3", "zstd", 3, ["zstd", "-dc"]),
+    ("zstd -19", "zstd", 19, ["zstd", "-dc"]),
+)
+
+
+def time_decompress(cmd: list, path: str) -> float:
+    with open(path, "rb") as src:
+        start = time.perf_counter()
+        subprocess.run(cmd, stdin=src, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    tree = sys.argv[1]
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    formats = [entry for entry in FORMATS if shutil.which(entry[3][0])]
+
+    workdir = tempfile.mkdtemp(prefix="bench-compression-")
+    results = []
+    try:
+        for label, compression, level, decompress in formats:
+            layer_path = os.path.join(workdir, f"{compression}-{level}")
+            start = time.perf_counter()
+            layer = oci.write_layer(tree, "/home/headless/blender", layer_path, compression, level)
+            compress_time = time.perf_counter() - start
+            times = [time_decompress(decompress, layer_path) for _ in range(runs)]
+            results.append((label, layer["size"], compress_time, statistics.median(times)))
+            os.remove(layer_path)
+    finally:
+        shutil.rmtree(workdir)
+
+    print(f"\n====== {tree}, decompression median of {runs} ======")
+    gzip_result = results[0]
+    for label, size, compress_time, decompress_time in results:
+        print(
+            f"  {label:<9} {size / 1024 ** 2:8.1f} MiB | compress {compress_time:6.1f} s | "
+            f"decompress {decompress_time:6.2f} s ({gzip_result[3] / decompress_time:.1f}x vs {gzip_result[0]})"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Benchmark extract_tar backends on a synthetic multi-block .tar.xz archive.
+
+Usage: python scripts/bench_extract.py [size_mb] [block_mb]
+
+Builds a Blender-like tree (blender-0.0.0-linux-x64/...) of partly compressible files, packs it with
+`xz -T0 --block-size` so the archive has several independently decodable blocks, and then times
+build.extract_tar with the Python backend and with every external decompressor found on PATH.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tarfile
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import build
+
+
+def make_tree(root: str, size_mb: int):
+    top = os.path.join(root, "blender-0.0.0-linux-x64")
+    chunk = 4 * 1024 * 1024
+    for i in range(max(1, size_mb // 4)):
+        directory = os.path.join(top, "lib", f"dir{i % 8}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file{i}.bin"), "wb") as file:
+            # half random, half repeated text: roughly the compression ratio of a Blender tree
+            file.write(os.urandom(chunk // 2))
+            file.write((b"blender headless benchmark " * (chunk // 54 + 1))[:chunk // 2])
+    return top
+
+
+def make_archive(root: str, top: str, block_mb: int) -> str:
+    tar_path = os.path.join(root, "plain.tar")
+    with tarfile.open(tar_path, "w") as tar:
+        tar.add(top, arcname=os.path.basename(top))
+    subprocess.run(["xz", "-T0", f"--block-size={block_mb}MiB", "-f", tar_path], check=True)
+    return tar_path + ".xz"
+
+
+def time_backend(backend: str, archive: str, workdir: str) -> float:
+    target_dir = os.path.join(workdir, backend)
+    os.makedirs(target_dir)
+    tar_path = os.path.join(target_dir, "blender.tar.xz")
+    shutil.copyfile(archive, tar_path)
+    build.XZ_BACKEND = backend
+    start = time.perf_counter()
+    build.extract_tar(tar_path, target_dir)
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(target_dir)
+    return elapsed
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    block_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    if shutil.which("xz") is None:
+        print("xz is required to build the synthetic archive")
+        return 1
+
+    workdir = tempfile.mkdtemp(prefix="bench-extract-")
+    try:
+        top = make_tree(workdir, size_mb)
+        archive = make_archive(workdir, top, block_mb)
+        shutil.rmtree(top)
+        print(f"archive: {os.path.getsize(archive) / 1024 ** 2:.1f} MiB, {size_mb} MiB unpacked, {block_mb} MiB xz blocks, {os.cpu_count()} CPUs")
+
+        backends = ["python"] + [name for name in ("xz", "pixz") if shutil.which(name)]
+        results = {backend: time_backend(backend, archive, workdir) for backend in backends}
+        print("\n====== extract_tar backends ======")
+        for backend, elapsed in results.items():
+            print(f"  {backend:<7} {elapsed:7.2f} s  ({results['python'] / elapsed:.1f}x)")
+    finally:
+        shutil.rmtree(workdir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
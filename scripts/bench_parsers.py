@@ -0,0 +1,92 @@
+"""Benchmark the index page parsers of get_blender_release.py: parse time and peak memory, stream vs bs4.
+
+Usage: python scripts/bench_parsers.py [fixture_dir] [runs]
+
+fixture_dir (default .cache/fixtures) holds saved copies of the three kinds of pages release discovery parses:
+release.html (https://download.blender.org/release/), minor.html (one minor directory, e.g. Blender4.2/) and
+daily.html (https://builder.blender.org/download/daily/). Missing pages are downloaded and saved first, so
+later runs compare the backends on exactly the same input. Both backends must produce the same results.
+"""
+
+import os
+import sys
+import time
+import statistics
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import get_blender_release as gbr
+
+
+def save_fixtures(fixture_dir: str) -> dict:
+    """Return {name: page text}, downloading and saving the pages not in fixture_dir yet."""
+    os.makedirs(fixture_dir, exist_ok=True)
+    pages = {}
+    for name in ("release", "minor", "daily"):
+        path = os.path.join(fixture_dir, f"{name}.html")
+        if not os.path.exists(path):
+            if name == "release":
+                url = gbr.RELEASES_URL
+            elif name == "minor":
+                minors = [href for href in gbr.page_links(pages["release"]) if gbr.MINOR_DIR_RE.search(href)]
+                url = gbr.urllib.parse.urljoin(gbr.RELEASES_URL, minors[-1])
+            else:
+                url = gbr.DAILYS_URL
+            entry = gbr.fetch_page(url)
+            if entry == None:
+                raise RuntimeError(f"could not download {url}")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(entry["text"])
+            print(f"-> saved {url} as {path}")
+        with open(path, encoding="utf-8") as file:
+            pages[name] = file.read()
+    return pages
+
+
+def parse_all(pages: dict, backend: str) -> tuple:
+    """Everything release discovery parses from the pages, with one backend."""
+    minors = [href for href in gbr.page_links(pages["release"], backend) if gbr.MINOR_DIR_RE.search(href)]
+    regex = gbr.patch_release_regex("linux", "x64")
+    patches = [href for href in gbr.page_links(pages["minor"], backend) if regex.search(href)]
+    builds = gbr.daily_builds(pages["daily"], "linux", backend)
+    return minors, patches, builds
+
+
+def measure(pages: dict, backend: str, runs: int) -> tuple:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        parse_all(pages, backend)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    parse_all(pages, backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def main():
+    fixture_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "fixtures")
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    pages = save_fixtures(fixture_dir)
+
+    stream_result, bs4_result = parse_all(pages, "stream"), parse_all(pages, "bs4")
+    if stream_result != bs4_result:
+        print("❌ stream and bs4 backends disagree:")
+        for label, stream_part, bs4_part in zip(("minors", "patches", "builds"), stream_result, bs4_result):
+            if stream_part != bs4_part:
+                print(f"  {label}: stream {len(stream_part)} entries, bs4 {len(bs4_part)} entries")
+        return 1
+
+    minors, patches, builds = stream_result
+    size = sum(len(text) for text in pages.values())
+    print(f"\n====== {size / 1024:.0f} KiB of pages: {len(minors)} minors, {len(patches)} patch archives, {len(builds)} daily builds ======")
+    results = {backend: measure(pages, backend, runs) for backend in ("bs4", "stream")}
+    for backend, (median, peak) in results.items():
+        print(f"  {backend:<6} median {median * 1000:8.2f} ms | peak memory {peak / 1024 ** 2:7.2f} MiB")
+    print(f"  speedup: {results['bs4'][0] / results['stream'][0]:.1f}x, memory: {results['bs4'][1] / results['stream'][1]:.1f}x less")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
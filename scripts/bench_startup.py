@@ -0,0 +1,57 @@
+"""Benchmark cold Blender startup (`blender -b --python-expr pass`) in fresh containers of two images.
+
+Usage: python scripts/bench_startup.py BEFORE_IMAGE AFTER_IMAGE [runs] [blender_path]
+
+Typically BEFORE_IMAGE is built without and AFTER_IMAGE with PREWARM=1, e.g.
+    python scripts/bench_startup.py localhost/headless-blender:blender-4.2 localhost/headless-blender:blender-4.2-prewarm
+Each run starts a new container (`run --rm`), so nothing compiled by an earlier run can be reused.
+The runtime is taken from CONTAINER_RUNTIME (default podman), blender_path defaults to the single-version
+location /home/headless/blender/blender.
+"""
+
+import os
+import sys
+import time
+import statistics
+import subprocess
+
+
+CONTAINER_RUNTIME = os.environ.get("CONTAINER_RUNTIME", "podman")
+
+
+def time_startup(image: str, blender: str) -> float:
+    cmd = [
+        CONTAINER_RUNTIME, "run", "--rm", "--entrypoint", blender, image,
+        "-b", "--factory-startup", "--python-expr", "pass",
+    ]
+    start = time.perf_counter()
+    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    elapsed = time.perf_counter() - start
+    if p.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} failed: {p.stderr.decode()}")
+    return elapsed
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        return 1
+    before, after = sys.argv[1], sys.argv[2]
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    blender = sys.argv[4] if len(sys.argv) > 4 else "/home/headless/blender/blender"
+
+    results = {}
+    for image in (before, after):
+        time_startup(image, blender)  # warm the runtime's image and page cache, not Blender's
+        results[image] = [time_startup(image, blender) for _ in range(runs)]
+
+    print(f"\n====== blender -b --python-expr pass, {runs} fresh containers each ======")
+    for image, times in results.items():
+        print(f"  {image}: median {statistics.median(times):.2f} s | min {min(times):.2f} s | max {max(times):.2f} s")
+    speedup = statistics.median(results[before]) / statistics.median(results[after])
+    print(f"  speedup: {speedup:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import os
+import re
+import sys
+import json
+import base64
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def serve():
+    """Start a local HTTP server for a BaseHTTPRequestHandler subclass, return its base URL (with a trailing /)."""
+    servers = []
+
+    def start(handler) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def sha256(data: bytes) -> str:
+    return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+
+class Registry:
+    """Blobs and manifests of a registry v2 stand-in, per repository. With token set, every /v2/ request
+    needs `Authorization: Bearer <token>`, handed out by /token for the basic auth credentials user:secret.
+    """
+
+    def __init__(self, token: str = None):
+        self.blobs = {}
+        self.manifests = {}
+        self.token = token
+        self.log = []
+        self.lock = threading.Lock()
+
+    def add_blob(self, repository: str, data: bytes) -> str:
+        digest = sha256(data)
+        self.blobs.setdefault(repository, {})[digest] = data
+        return digest
+
+    def add_manifest(self, repository: str, reference: str, manifest: dict) -> tuple:
+        data = json.dumps(manifest).encode()
+        digest = sha256(data)
+        for name in (reference, digest):
+            self.manifests.setdefault(repository, {})[name] = (data, manifest["mediaType"])
+        return data, digest
+
+    def handler(self):
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def reply(self, status: int, body: bytes = b"", headers: dict = None, head: bool = False):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not head:
+                    self.wfile.write(body)
+
+            def handle_request(self, method: str):
+                url = urlsplit(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                with registry.lock:
+                    registry.log.append((method, url.path, query))
+                if url.path == "/token":
+                    expected = "Basic " + base64.b64encode(b"user:secret").decode()
+                    if self.headers.get("Authorization") != expected:
+                        return self.reply(401)
+                    return self.reply(200, json.dumps({"token": registry.token}).encode())
+                if registry.token is not None and self.headers.get("Authorization") != f"Bearer {registry.token}":
+                    host = self.headers["Host"]
+                    challenge = f'Bearer realm="http://{host}/token",service="{host}",scope="repository:any:pull,push"'
+                    return self.reply(401, headers={"WWW-Authenticate": challenge})
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                match = re.match(r"^/v2/(.+?)/(blobs/uploads/|manifests/|blobs/)(.*)$", url.path)
+                repository, kind, name = match.groups()
+                with registry.lock:
+                    if kind == "blobs/":
+                        data = registry.blobs.get(repository, {}).get(name)
+                        if data is None:
+                            return self.reply(404, head=method == "HEAD")
+                        return self.reply(200, data, head=method == "HEAD")
+                    if kind == "manifests/" and method in ("GET", "HEAD"):
+                        found = registry.manifests.get(repository, {}).get(name)
+                        if found is None:
+                            return self.reply(404, head=method == "HEAD")
+                        data, media_type = found
+                        return self.reply(200, data, {"Content-Type": media_type, "Docker-Content-Digest": sha256(data)}, head=method == "HEAD")
+                    if kind == "manifests/":
+                        manifest = json.loads(body)
+                        missing = [descriptor["digest"] for descriptor in [manifest["config"], *manifest["layers"]]
+                                   if descriptor["digest"] not in registry.blobs.get(repository, {})]
+                        if missing:
+                            return self.reply(400, json.dumps({"missing": missing}).encode())
+                        registry.manifests.setdefault(repository, {})[name] = (body, self.headers["Content-Type"])
+                        return self.reply(201, headers={"Docker-Content-Digest": sha256(body)})
+                    if method == "POST" and "mount" in query:
+                        data = registry.blobs.get(query["from"], {}).get(query["mount"])
+                        if data is not None:
+                            registry.blobs.setdefault(repository, {})[query["mount"]] = data
+                            return self.reply(201)
+                    if method == "POST":
+                        return self.reply(202, headers={"Location": f"/v2/{repository}/blobs/uploads/session-{len(registry.log)}"})
+                    # monolithic PUT: the registry refuses a body that does not match the digest
+                    if sha256(body) != query["digest"]:
+                        return self.reply(400, b"digest mismatch")
+                    registry.blobs.setdefault(repository, {})[query["digest"]] = body
+                    return self.reply(201, headers={"Docker-Content-Digest": query["digest"]})
+
+            def do_GET(self):
+                self.handle_request("GET")
+
+            def do_HEAD(self):
+                self.handle_request("HEAD")
+
+            def do_POST(self):
+                self.handle_request("POST")
+
+            def do_PUT(self):
+                self.handle_request("PUT")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def requests(self, method: str, kind: str) -> list:
+        return [(path, query) for logged, path, query in self.log if logged == method and kind in path]
+
+
+@pytest.fixture
+def registries(serve):
+    """Start registry v2 stand-ins: returns a function taking the optional token and returning a Registry
+    with .host set to its host:port, usable as registry name in image references."""
+
+    def start(token: str = None) -> Registry:
+        registry = Registry(token)
+        registry.host = serve(registry.handler()).split("//", 1)[1].rstrip("/")
+        return registry
+
+    return start
+
+
+@pytest.fixture
+def credentials(tmp_path, monkeypatch):
+    """Logins of user:secret for every registry, as `podman login` stores them."""
+    auth_file = tmp_path / "auth.json"
+    monkeypatch.setenv("REGISTRY_AUTH_FILE", str(auth_file))
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+
+    def login(*hosts):
+        entry = {"auth": base64.b64encode(b"user:secret").decode()}
+        auth_file.write_text(json.dumps({"auths": {host: entry for host in hosts}}))
+
+    auth_file.write_text("{}")
+    return login
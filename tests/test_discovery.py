@@ -0,0 +1,106 @@
+import time
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import get_blender_release as gbr
+
+
+LATENCY = 0.2
+
+
+def release_site(minors: int):
+    """Pages of a release index with minors Blender3.N/ directories, each with one patch release and its sha256 file."""
+    pages = {"/release/": "".join(f'<a href="Blender3.{y}/">Blender3.{y}/</a>\n' for y in range(minors))}
+    for y in range(minors):
+        archive = f"blender-3.{y}.1-linux-x64.tar.xz"
+        pages[f"/release/Blender3.{y}/"] = f'<a href="blender-3.{y}.0-linux-x64.tar.xz">x</a>\n<a href="{archive}">x</a>\n'
+        pages[f"/release/Blender3.{y}/blender-3.{y}.1.sha256"] = f"{hashlib.sha256(archive.encode()).hexdigest()}  {archive}\n"
+    return pages
+
+
+def site_handler(pages: dict, log: list):
+    """Serve pages after LATENCY seconds each, with ETags, answering If-None-Match with 304. Requests are logged."""
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(LATENCY)
+            body = pages.get(self.path)
+            etag = f'"{hashlib.sha256(body.encode()).hexdigest()[:16]}"' if body is not None else None
+            conditional = self.headers.get("If-None-Match")
+            with lock:
+                log.append((self.path, conditional))
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            elif conditional == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+            else:
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def discovery(monkeypatch, tmp_path):
+    monkeypatch.setattr(gbr, "PAGE_CACHE_DIR", str(tmp_path / "pages"))
+    monkeypatch.setattr(gbr, "PAGE_CACHE_ENABLED", True)
+    monkeypatch.setattr(gbr, "PAGE_CACHE_TTL", 0)
+    monkeypatch.setattr(gbr, "DISCOVERY_WORKERS", 16)
+    monkeypatch.setattr(gbr, "FETCH_CHECKSUMS", True)
+    monkeypatch.setattr(gbr, "_session", None)
+    yield
+    gbr._session = None
+
+
+def timed_discovery(base_url: str):
+    start = time.perf_counter()
+    releases = gbr.get_blender_releases("linux", "x64", (2, 93), base_url + "release/")
+    return releases, time.perf_counter() - start
+
+
+def test_discovery_time_stays_flat_with_more_minors(discovery, serve, tmp_path, monkeypatch):
+    timings = {}
+    for minors in (2, 16):
+        monkeypatch.setattr(gbr, "PAGE_CACHE_DIR", str(tmp_path / f"pages-{minors}"))
+        log = []
+        base_url = serve(site_handler(release_site(minors), log))
+        releases, timings[minors] = timed_discovery(base_url)
+        assert [release.version for release in releases] == [(3, y, 1) for y in range(minors)]
+        assert all(release.sha256 for release in releases)
+        # release index, then every minor page and its sha256 file
+        assert len(log) == 1 + 2 * minors
+
+    # three round trips deep no matter how many minors; serially 16 minors would take 33 round trips
+    assert timings[16] < 2 * timings[2]
+    assert timings[16] < 8 * LATENCY
+
+
+def test_repeat_discovery_only_revalidates(discovery, serve):
+    log = []
+    base_url = serve(site_handler(release_site(6), log))
+    first, _ = timed_discovery(base_url)
+    log.clear()
+
+    second, _ = timed_discovery(base_url)
+
+    assert second == first
+    # archived minors are trusted for ARCHIVED_PAGE_TTL, the index and the newest minor are revalidated
+    assert sorted(path for path, _ in log) == sorted(["/release/", "/release/Blender3.5/", "/release/Blender3.5/blender-3.5.1.sha256"])
+    assert all(conditional is not None for _, conditional in log)
@@ -0,0 +1,258 @@
+import io
+import os
+import time
+import socket
+import tarfile
+import contextlib
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import build
+import get_blender_release as gbr
+
+
+BODY = os.urandom(1024 * 1024 + 123)
+SHA256 = hashlib.sha256(BODY).hexdigest()
+ETAG = '"v1"'
+
+
+def archive_handler(log: list, cuts: int = 0, honor_range: bool = True, cut_after: int = 200 * 1024):
+    """Serve BODY at any path. The first cuts responses close the connection after cut_after bytes of
+    their body. honor_range=False answers every request with the whole body, like servers without Range support.
+    """
+    state = {"cuts": cuts}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(BODY)))
+            if honor_range:
+                self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+
+        def do_GET(self):
+            requested = self.headers.get("Range")
+            with lock:
+                log.append(requested)
+                cut = state["cuts"] > 0
+                state["cuts"] -= cut
+            start, end = 0, len(BODY) - 1
+            if honor_range and requested and self.headers.get("If-Range") in (None, ETAG):
+                first, _, last = requested.removeprefix("bytes=").partition("-")
+                start, end = int(first), int(last) if last else len(BODY) - 1
+                if start >= len(BODY):
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(BODY)}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(BODY)}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", str(end + 1 - start))
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            data = BODY[start:end + 1]
+            if cut:
+                self.wfile.write(data[:cut_after])
+                self.wfile.flush()
+                self.connection.shutdown(socket.SHUT_RDWR)
+                self.close_connection = True
+                return
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture(autouse=True)
+def downloads(monkeypatch):
+    monkeypatch.setattr(build, "DOWNLOAD_RETRIES", 5)
+    monkeypatch.setattr(build, "DOWNLOAD_SEGMENTS", 1)
+    monkeypatch.setattr(gbr, "_session", None)
+    yield
+    gbr._session = None
+
+
+def read(path) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def test_resumes_after_disconnects(serve, tmp_path):
+    log = []
+    url = serve(archive_handler(log, cuts=3)) + "blender.tar.xz"
+    dst = str(tmp_path / "blender.tar.xz")
+
+    assert build.download_file(url, dst, sha256=SHA256) == SHA256
+
+    assert read(dst) == BODY
+    # every resume continues after what arrived before (up to the last complete chunk)
+    offsets = [int(requested.removeprefix("bytes=").rstrip("-")) for requested in log[1:]]
+    assert log[0] is None and len(offsets) == 3
+    assert 0 < offsets[0] < offsets[1] < offsets[2]
+    assert os.listdir(tmp_path) == ["blender.tar.xz"]
+
+
+def test_server_ignoring_range_restarts(serve, tmp_path):
+    log = []
+    url = serve(archive_handler(log, cuts=2, honor_range=False)) + "blender.tar.xz"
+    dst = str(tmp_path / "blender.tar.xz")
+
+    assert build.download_file(url, dst, sha256=SHA256) == SHA256
+    assert read(dst) == BODY
+    assert len(log) == 3
+
+
+def test_gives_up_after_resume_limit(serve, tmp_path, monkeypatch):
+    monkeypatch.setattr(build, "DOWNLOAD_RETRIES", 2)
+    log = []
+    url = serve(archive_handler(log, cuts=100, cut_after=1024)) + "blender.tar.xz"
+
+    with pytest.raises(RuntimeError, match="after 2 resumes"):
+        build.download_file(url, str(tmp_path / "blender.tar.xz"), sha256=SHA256)
+    assert len(log) == 3
+
+
+def test_checksum_mismatch_discards_download(serve, tmp_path):
+    url = serve(archive_handler([])) + "blender.tar.xz"
+
+    with pytest.raises(RuntimeError, match="Checksum mismatch"):
+        build.download_file(url, str(tmp_path / "blender.tar.xz"), sha256="0" * 64)
+    assert os.listdir(tmp_path) == []
+
+
+def test_segments_resume_after_disconnects(serve, tmp_path, monkeypatch):
+    monkeypatch.setattr(build, "DOWNLOAD_SEGMENTS", 4)
+    monkeypatch.setattr(build, "DOWNLOAD_SEGMENT_MIN_MB", 0)
+    log = []
+    url = serve(archive_handler(log, cuts=3, cut_after=64 * 1024)) + "blender.tar.xz"
+    dst = str(tmp_path / "blender.tar.xz")
+
+    assert build.download_file(url, dst, sha256=SHA256) == SHA256
+    assert read(dst) == BODY
+    assert len(log) == 4 + 3
+
+
+@pytest.mark.parametrize("record", [None, {"url": "http://elsewhere/blender.tar.xz"}, "segmented"])
+def test_stale_partial_is_not_taken_as_complete(serve, tmp_path, record):
+    log = []
+    url = serve(archive_handler(log)) + "blender.tar.xz"
+    dst = str(tmp_path / "blender.tar.xz")
+    # as long as the archive, so a Range request for the rest of it would be answered with 416
+    with open(dst + ".tmp", "wb") as file:
+        file.truncate(len(BODY))
+    if record == "segmented":
+        build.save_partial(dst + ".tmp", url, len(BODY), segmented=True)
+    elif record is not None:
+        build.save_partial(dst + ".tmp", record["url"], len(BODY))
+
+    assert build.download_file(url, dst) == SHA256
+    assert read(dst) == BODY
+    assert log == [None]
+
+
+def test_partial_of_changed_file_restarts(serve, tmp_path):
+    log = []
+    url = serve(archive_handler(log)) + "blender.tar.xz"
+    dst = str(tmp_path / "blender.tar.xz")
+    with open(dst + ".tmp", "wb") as file:
+        file.write(b"old archive")
+    build.save_partial(dst + ".tmp", url, len(BODY), etag='"v0"')
+
+    assert build.download_file(url, dst, sha256=SHA256) == SHA256
+    assert read(dst) == BODY
+    assert log == ["bytes=11-"]
+
+
+
+def slow_handler(body: bytes, chunks: int, delay: float):
+    """Serve body (or the requested range of it) in chunks pieces, delay seconds apart."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            start, end = 0, len(body) - 1
+            requested = self.headers.get("Range")
+            if requested:
+                first, _, last = requested.removeprefix("bytes=").partition("-")
+                start, end = int(first), int(last) if last else len(body) - 1
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", str(end + 1 - start))
+            self.end_headers()
+            data = body[start:end + 1]
+            step = len(data) // chunks + 1
+            try:
+                for offset in range(0, len(data), step):
+                    self.wfile.write(data[offset:offset + step])
+                    self.wfile.flush()
+                    time.sleep(delay)
+            except OSError:
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def tar_xz(tmp_path) -> bytes:
+    """An archive like Blender's: one top-level directory, here holding BODY as one file."""
+    (tmp_path / "src" / "blender-4.2.1-linux-x64").mkdir(parents=True)
+    (tmp_path / "src" / "blender-4.2.1-linux-x64" / "blender").write_bytes(BODY)
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:xz", preset=0) as tar:
+        tar.add(tmp_path / "src" / "blender-4.2.1-linux-x64", arcname="blender-4.2.1-linux-x64")
+    return buffer.getvalue()
+
+
+@contextlib.contextmanager
+def interrupt_after_start():
+    """Cancel the build like Ctrl+C does after a short moment, reset the flag afterwards."""
+    timer = threading.Timer(0.3, build.cancel_commands)
+    timer.start()
+    try:
+        yield
+    finally:
+        timer.cancel()
+        build._cancelled.clear()
+
+
+@pytest.mark.parametrize("mode", ["download", "segment", "stream"])
+def test_interrupt_stops_transfers_in_flight(serve, tmp_path, monkeypatch, mode):
+    monkeypatch.setattr(build, "DOWNLOAD_CHUNK_SIZE", 16 * 1024)
+    body = tar_xz(tmp_path) if mode == "stream" else BODY
+    # the whole body takes 10 s
+    url = serve(slow_handler(body, chunks=100, delay=0.1)) + "blender.tar.xz"
+    dst = tmp_path / "blender.tar.xz"
+    if mode == "segment":
+        dst.write_bytes(b"")
+
+    start = time.perf_counter()
+    with interrupt_after_start(), pytest.raises(build.BuildCancelled):
+        if mode == "download":
+            build.download_file(url, str(dst))
+        elif mode == "segment":
+            build.download_range(url, str(dst), 0, len(body) - 1)
+        else:
+            build.stream_extract(url, str(tmp_path), copy_to=str(tmp_path / "store" / "blender.tar.xz"))
+
+    assert time.perf_counter() - start < 3
+    if mode == "download":
+        # kept for resuming
+        assert 0 < os.path.getsize(str(dst) + ".tmp") < len(body)
+    if mode == "stream":
+        assert not os.path.exists(tmp_path / "blender") and not os.path.exists(tmp_path / "store" / "blender.tar.xz")
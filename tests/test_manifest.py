@@ -0,0 +1,141 @@
+import json
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import build
+import get_blender_release as gbr
+
+
+DAILY_ARCHIVE = "blender-4.2.0-alpha+main.0123abcd-linux.x86_64-release.tar.xz"
+DAILY_PAGE = """<div class="builds-list-container" data-platform="linux"><ul>
+<li>
+  <a class="b-version">Blender 4.2.0</a> <a class="b-variant">Alpha</a> <a class="b-reference">0123abcd</a>
+  <div class="b-date">Today</div> <div class="b-arch">Linux x64</div>
+  <div class="b-down"><a href="{base_url}download/daily/{archive}">download</a></div>
+</li>
+<li>
+  <a class="b-version">Blender 4.1.1</a> <a class="b-variant">Stable</a> <a class="b-reference">fedcba98</a>
+  <div class="b-date">Today</div> <div class="b-arch">Linux x64</div>
+  <div class="b-down"><a href="{base_url}download/daily/blender-4.1.1-stable.tar.xz">download</a></div>
+</li>
+</ul></div>
+"""
+
+
+def site(base_url: str) -> dict:
+    """Release index with the minors 4.0 and 4.1 and a daily builds page with a 4.2 alpha, plus sha256 files."""
+    pages = {
+        "/release/": '<a href="Blender2.80/">Blender2.80/</a>\n<a href="Blender4.0/">Blender4.0/</a>\n<a href="Blender4.1/">Blender4.1/</a>\n',
+        "/download/daily/": DAILY_PAGE.format(base_url=base_url, archive=DAILY_ARCHIVE),
+        f"/download/daily/{DAILY_ARCHIVE}.sha256": hashlib.sha256(DAILY_ARCHIVE.encode()).hexdigest() + "\n",
+    }
+    for y, z in ((0, 2), (1, 1)):
+        archive = f"blender-4.{y}.{z}-linux-x64.tar.xz"
+        pages[f"/release/Blender4.{y}/"] = f'<a href="blender-4.{y}.0-linux-x64.tar.xz">x</a>\n<a href="{archive}">x</a>\n'
+        pages[f"/release/Blender4.{y}/blender-4.{y}.{z}.sha256"] = f"{hashlib.sha256(archive.encode()).hexdigest()}  {archive}\n"
+    return pages
+
+
+def site_handler(pages: dict, log: list):
+    """Serve pages; HEAD requests for archives report a size derived from the path."""
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_HEAD(self):
+            with lock:
+                log.append(("HEAD", self.path))
+            self.send_response(200)
+            self.send_header("Content-Length", str(1000 + len(self.path)))
+            self.end_headers()
+
+        def do_GET(self):
+            with lock:
+                log.append(("GET", self.path))
+            body = pages.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def live(serve, monkeypatch, tmp_path):
+    """Release pages served locally, returns the request log."""
+    log = []
+    pages = {}
+    base_url = serve(site_handler(pages, log))
+    pages.update(site(base_url))
+    monkeypatch.setattr(gbr, "RELEASES_URL", base_url + "release/")
+    monkeypatch.setattr(gbr, "DAILYS_URL", base_url + "download/daily/")
+    monkeypatch.setattr(gbr, "PAGE_CACHE_DIR", str(tmp_path / "pages"))
+    monkeypatch.setattr(gbr, "FETCH_CHECKSUMS", True)
+    monkeypatch.setattr(gbr, "_session", None)
+    monkeypatch.setattr(build, "RELEASE_MANIFEST", "")
+    yield log
+    gbr._session = None
+
+
+def test_manifest_round_trip(tmp_path):
+    releases = [
+        gbr.Release((4, 1, 1), "stable", "", "", "x64", "linux", "https://example.org/a.tar.xz", "ab" * 32, 123),
+        gbr.Release((4, 2, 0), "alpha", "0123abcd", "Today", "x64", "linux", "https://example.org/b.tar.xz"),
+    ]
+    path = str(tmp_path / "release-manifest.json")
+
+    gbr.write_manifest(path, releases)
+
+    loaded = gbr.load_manifest(path)
+    assert [release.to_dict() for release in loaded] == [release.to_dict() for release in releases]
+    assert all(isinstance(release.version, tuple) for release in loaded)
+
+
+def test_offline_discovery_matches_live_parsing(live, tmp_path, monkeypatch):
+    expected = build.discover_releases()
+    assert [(release.version, release.stage) for release in expected] == [((4, 0, 2), "stable"), ((4, 1, 1), "stable"), ((4, 2, 0), "alpha")]
+    assert all(release.sha256 for release in expected)
+
+    path = str(tmp_path / "release-manifest.json")
+    gbr.write_manifest(path, gbr.build_manifest())
+    monkeypatch.setattr(build, "RELEASE_MANIFEST", path)
+    live.clear()
+
+    releases = build.discover_releases()
+
+    assert live == []
+    assert releases == expected
+    assert [release.sha256 for release in releases] == [release.sha256 for release in expected]
+    assert all(release.size is not None for release in releases)
+    assert build.discover_releases(stable_only=True) == expected[:2]
+
+
+def write(path, text: str) -> str:
+    path.write_text(text)
+    return str(path)
+
+
+@pytest.mark.parametrize("manifest", [
+    lambda tmp_path: str(tmp_path / "missing.json"),
+    lambda tmp_path: write(tmp_path / "corrupt.json", '{"manifest_version": 1, "releases": ['),
+    lambda tmp_path: write(tmp_path / "future.json", json.dumps({"manifest_version": gbr.MANIFEST_VERSION + 1, "releases": []})),
+    lambda tmp_path: write(tmp_path / "incomplete.json", json.dumps({"manifest_version": gbr.MANIFEST_VERSION, "releases": [{"version": [4, 2, 0]}]})),
+])
+def test_unusable_manifest_fails_discovery(manifest, tmp_path, monkeypatch):
+    monkeypatch.setattr(build, "RELEASE_MANIFEST", manifest(tmp_path))
+
+    assert build.discover_releases() is None
@@ -0,0 +1,200 @@
+import io
+import os
+import gzip
+import json
+import hashlib
+import tarfile
+
+import pytest
+
+import oci
+import build
+from registry import RegistryClient, load_credentials
+
+
+def sha256(data: bytes) -> str:
+    return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+
+BASE_LAYER = gzip.compress(b"base layer tar", mtime=0)
+BASE_CONFIG = {
+    "architecture": "amd64",
+    "os": "linux",
+    "config": {"WorkingDir": "/home/headless", "Labels": {"base": "yes"}, "Entrypoint": ["/dockerstartup/startup.sh"]},
+    "rootfs": {"type": "layers", "diff_ids": [sha256(b"base layer tar")]},
+}
+
+
+def publish_base(registry, repository: str = "base/desktop") -> str:
+    """Publish a Docker schema 2 base image as the amd64 entry of a multi-platform index tagged 1.0, return its manifest digest."""
+    config = json.dumps(BASE_CONFIG).encode()
+    manifest = {
+        "schemaVersion": 2,
+        "mediaType": "application/vnd.docker.distribution.manifest.v2+json",
+        "config": {"mediaType": "application/vnd.docker.container.image.v1+json", "digest": registry.add_blob(repository, config), "size": len(config)},
+        "layers": [{"mediaType": "application/vnd.docker.image.rootfs.diff.tar.gzip", "digest": registry.add_blob(repository, BASE_LAYER), "size": len(BASE_LAYER)}],
+    }
+    data, digest = registry.add_manifest(repository, "amd64", manifest)
+    registry.add_manifest(repository, "1.0", {
+        "schemaVersion": 2,
+        "mediaType": "application/vnd.docker.distribution.manifest.list.v2+json",
+        "manifests": [
+            {"mediaType": manifest["mediaType"], "digest": sha256(b"arm64"), "size": 1, "platform": {"os": "linux", "architecture": "arm64"}},
+            {"mediaType": manifest["mediaType"], "digest": digest, "size": len(data), "platform": {"os": "linux", "architecture": "amd64"}},
+        ],
+    })
+    return digest
+
+
+def blender_tree(root) -> str:
+    tree = root / "blender"
+    (tree / "4.2" / "scripts").mkdir(parents=True)
+    (tree / "blender").write_bytes(b"\x7fELF blender")
+    (tree / "4.2" / "scripts" / "startup.py").write_text("print('hello')\n")
+    os.link(tree / "blender", tree / "blender-hardlink")
+    return str(tree)
+
+
+def test_layer_digests_match_written_blob(tmp_path):
+    src = blender_tree(tmp_path)
+    out = str(tmp_path / "layer")
+
+    layer = oci.write_layer(src, "/home/headless/blender", out, "gzip")
+
+    with open(out, "rb") as file:
+        blob = file.read()
+    assert layer["mediaType"] == oci.LAYER_MEDIA_TYPES["gzip"]
+    assert layer["digest"] == sha256(blob) and layer["size"] == len(blob)
+    tar_bytes = gzip.decompress(blob)
+    assert layer["diff_id"] == sha256(tar_bytes)
+    with tarfile.open(fileobj=io.BytesIO(tar_bytes)) as tar:
+        members = {member.name: member for member in tar.getmembers()}
+    assert "home/headless/blender/4.2/scripts/startup.py" in members
+    assert members["home/headless/blender/blender-hardlink"].islnk() or members["home/headless/blender/blender"].islnk()
+    assert all(member.uid == 0 and member.gid == 0 for member in members.values())
+
+
+def test_build_layout_adds_one_layer_to_the_base(registries, credentials, tmp_path):
+    registry = registries()
+    base_digest = publish_base(registry)
+
+    base = oci.load_base_image(f"{registry.host}/base/desktop:1.0", str(tmp_path / "cache"))
+    layout_dir = str(tmp_path / "oci")
+    manifest_bytes = oci.build_layout(layout_dir, blender_tree(tmp_path), "/home/headless/blender", base,
+                                      {"blender_version": "4.2.1"}, ["blender-4.2", "blender-4.2-stable"])
+
+    assert base["digest"] == base_digest and base["repository"] == "base/desktop"
+    manifest = json.loads(manifest_bytes)
+    assert manifest["mediaType"] == oci.OCI_MANIFEST
+    # base layers are referenced as OCI layers, the Blender layer follows them
+    assert manifest["layers"][0] == {"mediaType": oci.LAYER_MEDIA_TYPES["gzip"], "digest": sha256(BASE_LAYER), "size": len(BASE_LAYER)}
+    assert len(manifest["layers"]) == 2
+    # every blob of the layout is stored under its own digest, base layers are not copied
+    blobs = os.listdir(os.path.join(layout_dir, "blobs", "sha256"))
+    for name in blobs:
+        with open(os.path.join(layout_dir, "blobs", "sha256", name), "rb") as file:
+            assert sha256(file.read()) == f"sha256:{name}"
+    own = [sha256(manifest_bytes), manifest["config"]["digest"], manifest["layers"][1]["digest"]]
+    assert sorted(blobs) == sorted(digest.split(":", 1)[1] for digest in own)
+    with open(oci.blob_path(layout_dir, manifest["config"]["digest"]), "rb") as file:
+        config = json.loads(file.read())
+    assert config["rootfs"]["diff_ids"][0] == BASE_CONFIG["rootfs"]["diff_ids"][0] and len(config["rootfs"]["diff_ids"]) == 2
+    assert config["config"]["Labels"] == {"base": "yes", "blender_version": "4.2.1"}
+    assert config["config"]["Entrypoint"] == BASE_CONFIG["config"]["Entrypoint"]
+    with open(os.path.join(layout_dir, "index.json"), encoding="utf-8") as file:
+        index = json.load(file)
+    assert [(entry["digest"], entry["annotations"]["org.opencontainers.image.ref.name"]) for entry in index["manifests"]] == [
+        (sha256(manifest_bytes), "blender-4.2"), (sha256(manifest_bytes), "blender-4.2-stable"),
+    ]
+
+
+def assembled(host: str, tmp_path, base_repository: str = "base/desktop"):
+    base = oci.load_base_image(f"{host}/{base_repository}:1.0", str(tmp_path / "cache"))
+    layout_dir = str(tmp_path / "oci")
+    manifest_bytes = oci.build_layout(layout_dir, blender_tree(tmp_path), "/home/headless/blender", base,
+                                      {"blender_version": "4.2.1"}, ["blender-4.2"])
+    return layout_dir, manifest_bytes, base
+
+
+@pytest.mark.parametrize("token", [None, "t0k3n"])
+def test_push_mounts_base_layers_and_uploads_the_rest(registries, credentials, tmp_path, token):
+    registry = registries(token)
+    credentials(registry.host)
+    publish_base(registry)
+    layout_dir, manifest_bytes, base = assembled(registry.host, tmp_path)
+    manifest = json.loads(manifest_bytes)
+    client = RegistryClient(registry.host, "blenderkit/headless-blender", auth=load_credentials(registry.host))
+
+    uploaded = oci.push_layout(client, layout_dir, manifest_bytes, ["blender-4.2", "blender-4.2-stable"], base)
+
+    own = [manifest["config"], manifest["layers"][1]]
+    assert uploaded == sum(descriptor["size"] for descriptor in own)
+    blobs = registry.blobs["blenderkit/headless-blender"]
+    # uploads were accepted by digest, so their bytes match the manifest
+    assert sorted(blobs) == sorted(descriptor["digest"] for descriptor in [manifest["config"], *manifest["layers"]])
+    assert [query for _, query in registry.requests("POST", "/uploads/") if "mount" in query] == [
+        {"mount": sha256(BASE_LAYER), "from": "base/desktop"},
+    ]
+    for tag in ("blender-4.2", "blender-4.2-stable"):
+        assert registry.manifests["blenderkit/headless-blender"][tag] == (manifest_bytes, oci.OCI_MANIFEST)
+    if token is not None:
+        assert len(registry.requests("GET", "/token")) >= 1
+
+    # a second push finds every blob and only writes the manifests
+    registry.log.clear()
+    assert oci.push_layout(client, layout_dir, manifest_bytes, ["blender-4.2"], base) == 0
+    assert registry.requests("POST", "/uploads/") == [] and len(registry.requests("PUT", "/manifests/")) == 1
+
+
+def test_push_streams_base_layers_from_another_registry(registries, credentials, tmp_path):
+    source, target = registries("s0urce"), registries()
+    credentials(source.host)
+    publish_base(source)
+    layout_dir, manifest_bytes, base = assembled(source.host, tmp_path)
+    client = RegistryClient(target.host, "blenderkit/headless-blender")
+
+    oci.push_layout(client, layout_dir, manifest_bytes, ["blender-4.2"], base)
+
+    assert target.blobs["blenderkit/headless-blender"][sha256(BASE_LAYER)] == BASE_LAYER
+    assert not [query for _, query in target.requests("POST", "/uploads/") if "mount" in query]
+    assert target.manifests["blenderkit/headless-blender"]["blender-4.2"][0] == manifest_bytes
+
+
+def test_token_request_failure_leaves_the_401(registries, credentials, tmp_path):
+    registry = registries("t0k3n")
+    publish_base(registry)
+    # no login: the token endpoint refuses the anonymous request
+    client = RegistryClient(registry.host, "base/desktop")
+
+    assert client.request("GET", "manifests/1.0").status_code == 401
+    assert client.token is None
+
+
+def test_native_single_image_reaches_every_registry(registries, credentials, tmp_path, monkeypatch):
+    base_registry, other = registries("t0k3n"), registries()
+    credentials(base_registry.host)
+    publish_base(base_registry)
+    monkeypatch.setattr(build, "OCI_BASE_IMAGE", f"{base_registry.host}/base/desktop:1.0")
+    monkeypatch.setattr(build, "OCI_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(build, "OCI_COMPRESSION", "gzip")
+    monkeypatch.setattr(build, "REGISTRIES", [base_registry.host, other.host])
+    monkeypatch.setattr(build, "SKIP_IMAGE_PUSH", False)
+    monkeypatch.setattr(build, "PUSH_FAILURES", {})
+    monkeypatch.setattr(build.METRICS, "path", None)
+    build_dir = tmp_path / "4.2"
+    build_dir.mkdir()
+    blender_tree(build_dir)
+    tags = [f"{base_registry.host}/{build.IMAGE_REPOSITORY}:blender-4.2", f"{base_registry.host}/{build.IMAGE_REPOSITORY}:blender-4.2-stable"]
+
+    result = build.assemble_single_image((4, 2, 1), "stable", "abc", str(build_dir), tags)
+    assert result is not None
+    assert build.push_native_image(result)
+
+    _, manifest_bytes, _, _ = result
+    with open(oci.blob_path(result[0], json.loads(manifest_bytes)["config"]["digest"]), "rb") as file:
+        labels = json.loads(file.read())["config"]["Labels"]
+    assert labels["blender_version"] == "4.2.1" and labels["blender_stage"] == "stable" and labels["blender_reference"] == "abc"
+    for registry in (base_registry, other):
+        assert registry.manifests[build.IMAGE_REPOSITORY]["blender-4.2"][0] == manifest_bytes
+        assert registry.manifests[build.IMAGE_REPOSITORY]["blender-4.2-stable"][0] == manifest_bytes
+    assert build.PUSH_FAILURES == {}
@@ -0,0 +1,46 @@
+import pytest
+
+import get_blender_release as gbr
+
+
+BUILD = """<li>
+  <a class="b-version">Blender {version}</a> <a class="b-variant">{variant}</a> <a class="b-reference">{reference}</a>
+  <div class="b-date">Today</div> <div class="b-arch">Linux x64</div>
+  <div class="b-down"><a href="https://example.org/blender-{version}-{reference}.tar.xz">download</a></div>
+"""
+BUILDS = [("4.3.0", "Alpha", "0123abcd"), ("4.2.1", "Candidate", "4567ef01"), ("4.1.2", "Stable", "89ab2345")]
+
+
+def daily_page(close_li: bool) -> str:
+    items = "".join(
+        BUILD.format(version=version, variant=variant, reference=reference) + ("</li>\n" if close_li else "")
+        for version, variant, reference in BUILDS
+    )
+    return f"""<div class="builds-list-container" data-platform="windows"><ul>{BUILD.format(version="9.9.9", variant="Alpha", reference="ffffffff")}</ul></div>
+<div class="builds-list-container" data-platform="linux"><ul>
+{items}</ul></div>
+"""
+
+
+@pytest.mark.parametrize("close_li", [True, False])
+def test_stream_parser_agrees_with_bs4(close_li):
+    page = daily_page(close_li)
+
+    builds = gbr.daily_builds(page, "linux", "stream")
+
+    assert builds == gbr.daily_builds(page, "linux", "bs4")
+    assert [(build["version"], build["reference"]) for build in builds] == [
+        (f"Blender {version}", reference) for version, _, reference in BUILDS
+    ]
+    assert builds[1]["download"] == "https://example.org/blender-4.2.1-4567ef01.tar.xz"
+
+
+def test_nested_list_does_not_split_a_build():
+    page = daily_page(True).replace(
+        '<div class="b-date">Today</div>', '<div class="b-date">Today<ul><li>note</li><li>other</li></ul></div>', 1
+    )
+
+    builds = gbr.daily_builds(page, "linux", "stream")
+
+    assert len(builds) == 3
+    assert builds[0]["version"] == "Blender 4.3.0" and builds[0]["download"].endswith("0123abcd.tar.xz")
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+import build
+import get_blender_release as gbr
+
+
+def releases(count: int) -> list:
+    return [gbr.Release((4, y, 0), "stable", "", "", "x64", "linux", f"http://example.org/4.{y}", None, 1000) for y in range(count)]
+
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path):
+    """Pipelined builds in tmp_path whose releases extract a 3000 byte tree next to a 1000 byte archive.
+    Returns the reservations DiskAdmission was adjusted to and the versions build_profiles was called for."""
+    monkeypatch.setattr(build, "__file__", str(tmp_path / "build.py"))
+    monkeypatch.setattr(build, "PARALLEL_BUILDS", 2)
+    monkeypatch.setattr(build, "MIN_FREE_GB", 0)
+    monkeypatch.setattr(build, "KEEP_BUILD_DIRS", False)
+    monkeypatch.setattr(build.METRICS, "path", None)
+    adjusted, built = [], []
+
+    def prepare_blender(url, build_dir, sha256=None):
+        if url.endswith("4.1"):
+            raise OSError("disk on fire")
+        os.makedirs(os.path.join(build_dir, "blender"))
+        with open(os.path.join(build_dir, "blender.tar.xz"), "wb") as file:
+            file.write(b"a" * 1000)
+        with open(os.path.join(build_dir, "blender", "blender"), "wb") as file:
+            file.write(b"t" * 3000)
+        return True
+
+    class Admission(build.DiskAdmission):
+        def adjust(self, old: int, new: int):
+            adjusted.append(new)
+            super().adjust(old, new)
+
+        def release(self, need: int):
+            super().release(need)
+            assert self.reserved >= 0
+
+    monkeypatch.setattr(build, "prepare_blender", prepare_blender)
+    monkeypatch.setattr(build, "DiskAdmission", Admission)
+    monkeypatch.setattr(build, "build_profiles", lambda version, *args: built.append(version) or True)
+    return adjusted, built
+
+
+def test_extracted_release_only_reserves_its_image_layer(pipeline, tmp_path):
+    adjusted, built = pipeline
+
+    build.build_containers_pipelined(releases(3), "good.io")
+
+    # the failing 4.1 does not hold back the others
+    assert sorted(built) == [(4, 0, 0), (4, 2, 0)]
+    # the archive and the tree are already on disk, only the layer (about the tree) is still to be written
+    assert adjusted == [3000, 3000]
+    assert not os.path.exists(tmp_path / "build" / "4.0")
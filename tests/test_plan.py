@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+import build
+import get_blender_release as gbr
+
+
+RELEASE = gbr.Release((4, 2, 1), "stable", "abc123", "", "x64", "linux", "https://example.org/blender-4.2.1.tar.xz")
+
+
+def publish(registry, tag: str, labels: dict):
+    """Publish an image with labels under tag in the headless-blender repository of registry."""
+    config = json.dumps({"architecture": "amd64", "os": "linux", "config": {"Labels": labels}}).encode()
+    registry.add_manifest(build.IMAGE_REPOSITORY, tag, {
+        "schemaVersion": 2,
+        "mediaType": "application/vnd.oci.image.manifest.v1+json",
+        "config": {"mediaType": "application/vnd.oci.image.config.v1+json", "digest": registry.add_blob(build.IMAGE_REPOSITORY, config), "size": len(config)},
+        "layers": [],
+    })
+
+
+def publish_release(registry, release: gbr.Release = RELEASE, **changes):
+    """Publish every tag plan_builds checks for release, with the labels it expects (updated by changes)."""
+    labels = {**build.single_image_labels(release, "desktop"), **changes}
+    for tag in build.single_release_tags(release, "desktop"):
+        publish(registry, tag, labels)
+
+
+@pytest.fixture
+def planner(registries, credentials, monkeypatch):
+    """Two registries (the first needs a login), returns them."""
+    first, second = registries("t0k3n"), registries()
+    credentials(first.host)
+    monkeypatch.setattr(build, "BASE_PROFILES", ["desktop"])
+    monkeypatch.setattr(build, "PUSH_COMPRESSION", "")
+    monkeypatch.setattr(build, "SLIM_BUILD", False)
+    monkeypatch.setattr(build, "NATIVE_ASSEMBLY", False)
+    # no registry lookups for the base digest
+    monkeypatch.setattr(build, "base_key", lambda profile: "b4se")
+    build.single_base_key.cache_clear()
+    yield first, second
+    build.single_base_key.cache_clear()
+
+
+def plan(*registries) -> list:
+    return build.plan_builds([RELEASE], [registry.host for registry in registries])
+
+
+def test_up_to_date_release_is_skipped(planner):
+    for registry in planner:
+        publish_release(registry)
+
+    assert plan(*planner) == []
+    # the first registry was only readable with the stored login
+    assert planner[0].requests("GET", "/token")
+
+
+@pytest.mark.parametrize("label", ["blender_reference", "blender_version", "blender_base"])
+def test_changed_label_is_rebuilt(planner, label):
+    publish_release(planner[0])
+    publish_release(planner[1], **{label: "old"})
+
+    assert plan(*planner) == [RELEASE]
+
+
+def test_missing_tag_is_rebuilt(planner):
+    publish_release(planner[0])
+
+    assert plan(*planner) == [RELEASE]
+
+
+def test_missing_variant_is_rebuilt(planner, monkeypatch):
+    for registry in planner:
+        publish_release(registry)
+    monkeypatch.setattr(build, "PUSH_COMPRESSION", "zstd")
+    monkeypatch.setattr(build, "SLIM_BUILD", True)
+
+    assert plan(*planner) == [RELEASE]
+    publish(planner[0], "blender-4.2-zstd", build.single_image_labels(RELEASE, "desktop"))
+    publish(planner[0], "blender-4.2-slim", build.single_image_labels(RELEASE, "desktop"))
+    assert plan(planner[0]) == []
+
+
+def test_unknown_base_is_rebuilt(planner, monkeypatch):
+    for registry in planner:
+        publish_release(registry)
+    monkeypatch.setattr(build, "base_key", lambda profile: None)
+    build.single_base_key.cache_clear()
+
+    assert plan(*planner) == [RELEASE]
+
+
+def test_registry_error_is_rebuilt(planner, credentials):
+    for registry in planner:
+        publish_release(registry)
+    # without the login the first registry answers 401
+    credentials()
+
+    assert plan(*planner) == [RELEASE]
@@ -0,0 +1,112 @@
+import os
+import stat
+
+import pytest
+
+import build
+
+
+# Stands in for podman: logs every command, fails pushes to bad.io and reports a size for `image inspect`.
+FAKE_PODMAN = """#!/bin/sh
+echo "$*" >> "$FAKE_RUNTIME_LOG"
+case "$1" in
+push)
+  case "$2" in
+  bad.io/*) echo "Error: unauthorized"; exit 125;;
+  esac
+  echo "Copying blob sha256:aaaaaaaaaaaa1111 done";;
+image)
+  [ "$2" = inspect ] && echo 1000;;
+esac
+exit 0
+"""
+
+
+@pytest.fixture
+def runtime(tmp_path, monkeypatch):
+    """A fake podman first on PATH, registries good.io (first) and bad.io. Yields a function reading the command log."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    podman = bin_dir / "podman"
+    podman.write_text(FAKE_PODMAN)
+    podman.chmod(podman.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / "runtime.log"
+    log.touch()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_RUNTIME_LOG", str(log))
+    monkeypatch.setattr(build, "CONTAINER_RUNTIME", "podman")
+    monkeypatch.setattr(build, "REGISTRIES", ["good.io", "bad.io"])
+    monkeypatch.setattr(build, "SKIP_IMAGE_PUSH", False)
+    monkeypatch.setattr(build, "KEEP_IMAGES", False)
+    monkeypatch.setattr(build, "NATIVE_ASSEMBLY", False)
+    monkeypatch.setattr(build, "SLIM_BUILD", False)
+    monkeypatch.setattr(build, "PUSH_COMPRESSION", "")
+    monkeypatch.setattr(build, "PUSH_FAILURES", {})
+    monkeypatch.setattr(build.METRICS, "path", None)
+    # no registry lookups for the base digest
+    monkeypatch.setattr(build, "base_key", lambda profile: f"{profile}-key")
+    build.single_base_key.cache_clear()
+    yield lambda: log.read_text().splitlines()
+    build.single_base_key.cache_clear()
+
+
+def pushed(commands: list, registry: str) -> list:
+    return sorted(command.split()[1].split(":", 1)[1] for command in commands
+                  if command.startswith(f"push {registry}/"))
+
+
+def test_failing_registry_does_not_hold_back_the_other(runtime):
+    failed = build.push_to_registries("good.io/blenderkit/headless-blender:blender-4.2")
+
+    assert failed == ["bad.io"]
+    assert build.PUSH_FAILURES == {"bad.io": ["blenderkit/headless-blender:blender-4.2"]}
+    assert pushed(runtime(), "good.io") == ["blender-4.2"]
+    # the tag created for bad.io is removed again
+    assert "rmi bad.io/blenderkit/headless-blender:blender-4.2" in runtime()
+
+
+def test_every_profile_is_built_pushed_and_removed(runtime, tmp_path, monkeypatch):
+    monkeypatch.setattr(build, "BASE_PROFILES", ["desktop", "minimal"])
+    build_dir = tmp_path / "4.2"
+    (build_dir / "blender").mkdir(parents=True)
+
+    ok = build.build_profiles((4, 2, 1), "stable", "abc", str(build_dir), "good.io")
+
+    assert ok is False
+    commands = runtime()
+    assert len([command for command in commands if command.startswith("build ")]) == 2
+    assert pushed(commands, "good.io") == [
+        "blender-4.2", "blender-4.2-minimal", "blender-4.2-stable", "blender-4.2-stable-minimal",
+    ]
+    assert build.PUSH_FAILURES == {"bad.io": ["blenderkit/headless-blender:blender-4.2", "blenderkit/headless-blender:blender-4.2-minimal"]}
+    for tag in ("blender-4.2", "blender-4.2-stable", "blender-4.2-minimal", "blender-4.2-stable-minimal"):
+        assert f"rmi good.io/blenderkit/headless-blender:{tag}" in commands
+
+
+def test_local_images_are_removed_when_a_later_profile_raises(runtime, tmp_path, monkeypatch):
+    monkeypatch.setattr(build, "BASE_PROFILES", ["desktop", "minimal"])
+    build_dir = tmp_path / "4.2"
+    (build_dir / "blender").mkdir(parents=True)
+    real_build = build.build_single_image
+
+    def build_single_image(version, stage, reference, build_dir, base_tag, stage_tag, profile="desktop"):
+        if profile == "minimal":
+            raise OSError("disk full")
+        return real_build(version, stage, reference, build_dir, base_tag, stage_tag, profile)
+
+    monkeypatch.setattr(build, "build_single_image", build_single_image)
+    with pytest.raises(OSError):
+        build.build_profiles((4, 2, 1), "stable", "abc", str(build_dir), "good.io")
+
+    commands = runtime()
+    assert "rmi good.io/blenderkit/headless-blender:blender-4.2" in commands
+    assert "rmi good.io/blenderkit/headless-blender:blender-4.2-stable" in commands
+
+
+def test_single_images_carry_the_base_key(runtime, tmp_path, monkeypatch):
+    monkeypatch.setattr(build, "PREWARM", False)
+    monkeypatch.setattr(build, "PREWARM_BLENDER", False)
+
+    containerfile = build.generate_single_containerfile((4, 2, 1), "stable", "abc", "minimal")
+
+    assert 'LABEL blender_base="minimal-key"\n' in containerfile
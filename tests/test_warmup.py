@@ -0,0 +1,43 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+import build
+
+
+def blender_tree(root, interpreter: bool = True):
+    """A Blender tree at root/blender with CPython's broken test files, using this interpreter as the bundled one."""
+    lib = root / "blender" / "4.2" / "python" / "lib" / "python3.11"
+    for package in ("test", "lib2to3/tests/data", "site-packages/addon"):
+        (lib / package).mkdir(parents=True)
+    (lib / "test" / "badsyntax_3131.py").write_text("€ = 1\n")
+    (lib / "lib2to3" / "tests" / "data" / "py2_test_grammar.py").write_text("print 'hello'\n")
+    (lib / "site-packages" / "addon" / "__init__.py").write_text("VALUE = 1\n")
+    if interpreter:
+        (root / "blender" / "4.2" / "python" / "bin").mkdir()
+        os.symlink(sys.executable, root / "blender" / "4.2" / "python" / "bin" / "python3.11")
+    return lib
+
+
+def warmup_compile(root) -> subprocess.CompletedProcess:
+    command = build.WARMUP_COMPILE.format(root="blender").removeprefix("RUN ")
+    return subprocess.run(["sh", "-c", command], cwd=root, capture_output=True, text=True)
+
+
+def test_compiles_everything_but_cpython_tests(tmp_path):
+    lib = blender_tree(tmp_path)
+
+    assert warmup_compile(tmp_path).returncode == 0
+    assert os.listdir(lib / "site-packages" / "addon" / "__pycache__")
+    assert not (lib / "test" / "__pycache__").exists()
+
+
+@pytest.mark.parametrize("broken", ["interpreter", "syntax"])
+def test_fails_instead_of_skipping(tmp_path, broken):
+    lib = blender_tree(tmp_path, interpreter=broken != "interpreter")
+    if broken == "syntax":
+        (lib / "site-packages" / "addon" / "broken.py").write_text("def (:\n")
+
+    assert warmup_compile(tmp_path).returncode != 0